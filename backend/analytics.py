@@ -0,0 +1,80 @@
+import itertools
+import numpy as np
+from grading import GRADE_POINTS
+
+PERCENTILES = (10, 25, 75, 90)
+
+def _percentile(sorted_values, starts, counts, q):
+    """Linear-interpolated percentile of every group at once.
+
+    ``sorted_values`` holds the groups back to back, each sorted ascending;
+    group ``i`` occupies ``starts[i]:starts[i] + counts[i]``.
+    """
+    position = starts + (counts - 1) * (q / 100.0)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def _factorize(values):
+    """Integer codes for a column plus the sorted distinct values they index"""
+    # setdefault records each value's first position; map() keeps the loop in C
+    first_seen = np.fromiter(map({}.setdefault, values, itertools.count()),
+                             dtype=np.int64, count=len(values))
+    positions, codes = np.unique(first_seen, return_inverse=True)
+    names = [str(values[position]) for position in positions]
+    order = sorted(range(len(names)), key=names.__getitem__)
+    remap = np.empty(len(names), dtype=np.int64)
+    remap[order] = np.arange(len(names))
+    return [names[i] for i in order], remap[codes]
+
+def grade_statistics(keys, marks, letters):
+    """Per-group mark statistics, letter histograms and pass rates.
+
+    ``keys``, ``marks`` and ``letters`` are parallel columns (one entry per
+    grade row). Everything is computed with array operations over the whole
+    column; the only Python loop is over the (few) groups when building the
+    result. A grade passes when its letter earns grade points.
+    """
+    marks = np.asarray(marks, dtype=np.float64)
+    if marks.size == 0:
+        return []
+
+    group_names, group = _factorize(keys)
+    letter_names, letter = _factorize(letters)
+    n_groups = len(group_names)
+
+    counts = np.bincount(group, minlength=n_groups)
+    sums = np.bincount(group, weights=marks, minlength=n_groups)
+    squares = np.bincount(group, weights=marks * marks, minlength=n_groups)
+    means = sums / counts
+    stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+
+    passing_letters = np.array([GRADE_POINTS.get(name, 0.0) > 0 for name in letter_names])
+    passes = np.bincount(group, weights=passing_letters[letter].astype(np.float64), minlength=n_groups)
+
+    histogram = np.bincount(group * len(letter_names) + letter,
+                            minlength=n_groups * len(letter_names)).reshape(n_groups, len(letter_names))
+
+    order = np.lexsort((marks, group))
+    sorted_marks = marks[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = _percentile(sorted_marks, starts, counts, 50)
+    percentiles = {q: _percentile(sorted_marks, starts, counts, q) for q in PERCENTILES}
+    minimums = sorted_marks[starts]
+    maximums = sorted_marks[starts + counts - 1]
+
+    results = []
+    for i, name in enumerate(group_names):
+        results.append({
+            "key": name,
+            "count": int(counts[i]),
+            "mean": round(float(means[i]), 2),
+            "median": round(float(medians[i]), 2),
+            "std": round(float(stds[i]), 2),
+            "min": float(minimums[i]),
+            "max": float(maximums[i]),
+            "percentiles": {f"p{q}": round(float(values[i]), 2) for q, values in percentiles.items()},
+            "histogram": {letter_names[j]: int(histogram[i, j]) for j in np.flatnonzero(histogram[i])},
+            "pass_rate": round(float(passes[i] / counts[i]), 4),
+        })
+    return results
@@ -0,0 +1,11 @@
+"""Reproducible benchmarks for the API.
+
+Run from the backend directory:
+
+    python -m benchmarks.datagen --students 100000 --grades 2000000   load synthetic data
+    python -m benchmarks.loadgen --duration 60 --out run.json          replay dashboard traffic
+    python -m benchmarks.report run.json --baseline benchmarks/baseline.json
+
+Everything the generators produce is derived from ``--seed``, so two runs with
+the same arguments issue the same data and the same request sequence.
+"""
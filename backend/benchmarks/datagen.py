@@ -0,0 +1,208 @@
+"""Seeded synthetic data for the schema in database/schema.sql.
+
+Every generated key starts with PREFIX so the data can live next to real rows
+and be removed again with --reset. Rows are produced lazily and written with
+executemany() in BULK_BATCH_SIZE transactions, so memory use stays flat at
+any scale.
+
+    python -m benchmarks.datagen --departments 20 --courses 2000 --students 100000 --grades 2000000
+"""
+import argparse
+import itertools
+import random
+import time
+from datetime import date, timedelta
+from config import settings
+from database import get_db_connection, close_db_connection
+from grading import letter_for
+from gpa import rebuild_summaries
+from registration import rebuild_seat_counts
+from changes import log_reset
+from routers.auth import hash_password
+
+PREFIX = "BM"
+PASSWORD = "benchmark"
+SEMESTERS = 8
+# Fixed reference date so the data does not depend on when it was generated
+EPOCH = date(2024, 1, 1)
+
+FIRST_NAMES = ("Aarav", "Ananya", "Ben", "Chen", "Diya", "Elena", "Farah", "Gabriel", "Hana", "Ivan",
+               "Jia", "Kofi", "Lena", "Mateo", "Nia", "Omar", "Priya", "Quinn", "Rohan", "Sara")
+LAST_NAMES = ("Ahmed", "Brown", "Costa", "Das", "Evans", "Fischer", "Garcia", "Huang", "Iyer", "Jones",
+              "Kim", "Lopez", "Mehta", "Novak", "Okafor", "Patel", "Rossi", "Singh", "Tanaka", "Wong")
+SUBJECTS = ("Algorithms", "Circuits", "Mechanics", "Statistics", "Materials", "Networks", "Optics",
+            "Thermodynamics", "Compilers", "Structures", "Signals", "Databases", "Robotics", "Ethics")
+CITIES = (("Mumbai", "MH"), ("Pune", "MH"), ("Bengaluru", "KA"), ("Chennai", "TN"), ("Delhi", "DL"),
+          ("Hyderabad", "TS"), ("Kolkata", "WB"), ("Jaipur", "RJ"))
+
+def dept_id(n):
+    return f"{PREFIX}{n:02d}"
+
+def course_id(n):
+    return f"{PREFIX}{n:05d}"
+
+def student_id(n):
+    return f"{PREFIX}S{n:07d}"
+
+def departments(rng, count):
+    for n in range(count):
+        yield dept_id(n), f"Department of {SUBJECTS[n % len(SUBJECTS)]} {n}", f"Dr. {rng.choice(LAST_NAMES)}"
+
+def courses(rng, count, n_departments):
+    for n in range(count):
+        name = f"{rng.choice(SUBJECTS)} {100 + n % 400}"
+        yield course_id(n), name, rng.choice((2, 3, 3, 4, 4, 4)), dept_id(n % n_departments)
+
+def students(rng, count, n_departments):
+    """(college_id, student, address, login) rows for each student"""
+    password = hash_password(PASSWORD)
+    for n in range(count):
+        sid = student_id(n)
+        cid = f"CID{sid}"
+        issued = EPOCH - timedelta(days=rng.randrange(4 * 365))
+        expires = issued + timedelta(days=4 * 365)
+        status = "Active" if expires > EPOCH else "Expired"
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, state = rng.choice(CITIES)
+        yield (
+            (cid, issued, expires, status),
+            (sid, first, last, issued - timedelta(days=rng.randrange(17 * 365, 21 * 365)),
+             f"{first}.{last}.{n}@bench.college.edu".lower(), f"9{rng.randrange(10**9):09d}",
+             dept_id(n % n_departments), cid),
+            (f"{rng.randrange(1, 999)} {rng.choice(LAST_NAMES)} Street", city, state,
+             f"{rng.randrange(100000, 999999)}", cid),
+            (sid, password),
+        )
+
+def grades(rng, n_students, n_courses, total):
+    """(enrollment, grade) rows; each student takes distinct courses spread over the semesters"""
+    per_student, remainder = divmod(total, n_students) if n_students else (0, 0)
+    for n in range(n_students):
+        count = min(per_student + (1 if n < remainder else 0), n_courses)
+        sid = student_id(n)
+        for i, course in enumerate(rng.sample(range(n_courses), count)):
+            semester = 1 + i * SEMESTERS // max(count, 1)
+            marks = round(min(max(rng.gauss(65, 15), 0), 100), 2)
+            year = EPOCH.year - SEMESTERS // 2 + (semester - 1) // 2
+            enrolled = date(year, 7 if semester % 2 else 1, 1) + timedelta(days=rng.randrange(14))
+            yield ((sid, course_id(course), semester, enrolled, f"{year}-{(year + 1) % 100:02d}"),
+                   (sid, course_id(course), semester, marks, letter_for(marks)))
+
+def batched(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def insert(conn, sql, rows, label, batch_size):
+    """executemany() ``rows`` in batches, one transaction each; returns the row count"""
+    cursor = conn.cursor()
+    done = 0
+    try:
+        for batch in batched(rows, batch_size):
+            cursor.executemany(sql, batch)
+            conn.commit()
+            done += len(batch)
+            print(f"  {label}: {done}", end="\r")
+    finally:
+        cursor.close()
+    print(f"✓ {label}: {done}")
+    return done
+
+def insert_students(conn, rows, batch_size):
+    cursor = conn.cursor()
+    done = 0
+    statements = (
+        "INSERT INTO COLLEGE_ID (College_ID_Number, Issue_Date, Expiry_Date, Status) VALUES (%s, %s, %s, %s)",
+        """INSERT INTO STUDENT (Student_ID, First_Name, Last_Name, DOB, Email, Phone, Dept_ID, College_ID_Number)
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+        "INSERT INTO ADDRESS (Street, City, State, ZIP, College_ID_Number) VALUES (%s, %s, %s, %s, %s)",
+        "INSERT INTO USER_LOGIN (User_ID, User_Type, Password) VALUES (%s, 'student', %s)",
+    )
+    try:
+        for batch in batched(rows, batch_size):
+            for index, sql in enumerate(statements):
+                cursor.executemany(sql, [row[index] for row in batch])
+            conn.commit()
+            done += len(batch)
+            print(f"  students: {done}", end="\r")
+    finally:
+        cursor.close()
+    print(f"✓ students: {done}")
+
+def insert_grades(conn, rows, batch_size):
+    cursor = conn.cursor()
+    done = 0
+    try:
+        for batch in batched(rows, batch_size):
+            cursor.executemany("""
+                INSERT INTO ENROLLMENT (Student_ID, Course_ID, Semester_No, Enrollment_Date, Academic_Year)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [enrollment for enrollment, _ in batch])
+            cursor.executemany("""
+                INSERT INTO GRADE (Student_ID, Course_ID, Semester_No, Marks, Grade_Letter)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [grade for _, grade in batch])
+            conn.commit()
+            done += len(batch)
+            print(f"  grades: {done}", end="\r")
+    finally:
+        cursor.close()
+    print(f"✓ grades: {done}")
+
+def reset(conn):
+    """Delete everything a previous run generated; the foreign keys cascade the rest"""
+    cursor = conn.cursor()
+    try:
+        pattern = PREFIX + "%"
+        cursor.execute("DELETE FROM USER_LOGIN WHERE User_Type = 'student' AND User_ID LIKE %s", (pattern,))
+        cursor.execute("DELETE FROM COLLEGE_ID WHERE College_ID_Number LIKE %s", ("CID" + pattern,))
+        cursor.execute("DELETE FROM COURSE WHERE Course_ID LIKE %s", (pattern,))
+        cursor.execute("DELETE FROM DEPARTMENT WHERE Dept_ID LIKE %s", (pattern,))
+        conn.commit()
+    finally:
+        cursor.close()
+    print("✓ Removed previously generated data")
+
+def generate(conn, n_departments, n_courses, n_students, n_grades, seed, batch_size):
+    # Each table gets its own stream so changing one count leaves the others identical
+    insert(conn, "INSERT INTO DEPARTMENT (Dept_ID, Dept_Name, HOD_Name) VALUES (%s, %s, %s)",
+           departments(random.Random(f"{seed}:departments"), n_departments), "departments", batch_size)
+    insert(conn, "INSERT INTO COURSE (Course_ID, Course_Name, Credits, Dept_ID) VALUES (%s, %s, %s, %s)",
+           courses(random.Random(f"{seed}:courses"), n_courses, n_departments), "courses", batch_size)
+    insert_students(conn, students(random.Random(f"{seed}:students"), n_students, n_departments), batch_size)
+    insert_grades(conn, grades(random.Random(f"{seed}:grades"), n_students, n_courses, n_grades), batch_size)
+    rebuild_summaries(conn, progress=lambda done: print(f"  GPA summaries: {done}", end="\r"))
+    print("✓ GPA summaries rebuilt")
+    rebuild_seat_counts(conn)
+    print("✓ Course seat counts rebuilt")
+    # Nothing above went through the change log, so dashboards have to refetch
+    log_reset(conn)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--departments", type=int, default=20)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--grades", type=int, default=2000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_BATCH_SIZE)
+    parser.add_argument("--reset", action="store_true", help="remove previously generated data first")
+    args = parser.parse_args()
+    if not 0 < args.departments <= 100 or args.courses <= 0:
+        parser.error("need 1-100 departments and at least one course")
+
+    conn = get_db_connection()
+    started = time.perf_counter()
+    try:
+        if args.reset:
+            reset(conn)
+        generate(conn, args.departments, args.courses, args.students, args.grades, args.seed, args.batch_size)
+    finally:
+        close_db_connection(conn)
+    print(f"✓ Generated data in {time.perf_counter() - started:.1f}s (student password: {PASSWORD})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Scripted load against a running API, replaying admin and student dashboard traffic.
+
+Each worker thread keeps one HTTP connection open and plays sessions back to
+back: most are students logging in and opening their dashboard, the rest are
+admins paging through lists and reports. Workers draw from their own seeded
+RNG, so a run with the same arguments issues the same request sequence.
+Student IDs are picked from the range written by benchmarks.datagen.
+
+    python -m benchmarks.loadgen --url http://localhost:8000 --duration 60 --concurrency 16 --out run.json
+
+``--scenario registration`` instead replays a registration opening: every
+session tries to enroll in two of the same ten courses.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlencode
+from benchmarks.datagen import PASSWORD, dept_id, course_id, student_id
+from benchmarks.report import summarize, save, report
+
+# Share of sessions that are student dashboard visits
+STUDENT_SHARE = 0.8
+# Courses the registration scenario competes for (set their capacity to create waitlists)
+REGISTRATION_COURSES = 10
+
+class Client:
+    """Keep-alive HTTP client that records (endpoint, seconds, status) per request"""
+
+    def __init__(self, base_url, samples, recording):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.samples = samples
+        self.recording = recording
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, endpoint, method, path, params=None, body=None):
+        """Send one request; ``endpoint`` is the label it is reported under"""
+        if params:
+            path += "?" + urlencode(params)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            status = 0
+        if self.recording.is_set():
+            self.samples.append((endpoint, time.perf_counter() - start, status))
+        return status
+
+def student_session(client, rng, scale):
+    sid = student_id(rng.randrange(scale.students))
+    client.request("POST /auth/login", "POST", "/auth/login",
+                   body={"userId": sid, "password": PASSWORD, "userType": "student"})
+    client.request("GET /students/{id}/dashboard", "GET", f"/students/{sid}/dashboard")
+    if rng.random() < 0.5:
+        client.request("GET /grades/{id}/summary", "GET", f"/grades/{sid}/summary")
+    if rng.random() < 0.3:
+        client.request("GET /enrollments/{id}", "GET", f"/enrollments/{sid}")
+
+def admin_session(client, rng, scale):
+    client.request("POST /auth/login", "POST", "/auth/login",
+                   body={"userId": "admin001", "password": "admin123", "userType": "admin"})
+    client.request("GET /departments", "GET", "/departments")
+    client.request("GET /courses", "GET", "/courses", {"limit": 500})
+    client.request("GET /students", "GET", "/students",
+                   {"limit": 100, "after": student_id(rng.randrange(scale.students))})
+    client.request("GET /students?dept_id", "GET", "/students",
+                   {"limit": 100, "dept_id": dept_id(rng.randrange(scale.departments))})
+    client.request("GET /students/{id}", "GET", f"/students/{student_id(rng.randrange(scale.students))}")
+    client.request("GET /college-ids?status", "GET", "/college-ids", {"limit": 100, "status": "Active"})
+    client.request("GET /grades/course/{id}", "GET", f"/grades/course/{course_id(rng.randrange(scale.courses))}")
+    client.request("GET /grades/rankings", "GET", "/grades/rankings",
+                   {"dept_id": dept_id(rng.randrange(scale.departments)), "limit": 50})
+    if rng.random() < 0.2:
+        client.request("GET /grades/analytics", "GET", "/grades/analytics",
+                       {"group_by": "course", "dept_id": dept_id(rng.randrange(scale.departments))})
+
+def registration_session(client, rng, scale):
+    """Registration opening: everyone goes for the same few courses of a new term"""
+    sid = student_id(rng.randrange(scale.students))
+    client.request("POST /auth/login", "POST", "/auth/login",
+                   body={"userId": sid, "password": PASSWORD, "userType": "student"})
+    for course in rng.sample(range(min(REGISTRATION_COURSES, scale.courses)), 2):
+        client.request("POST /enrollments", "POST", "/enrollments",
+                       body={"student_id": sid, "course_id": course_id(course), "semester_no": 1,
+                             "enrollment_date": "2030-07-01", "academic_year": "2030-31"})
+    client.request("GET /enrollments/waitlist/{id}", "GET", f"/enrollments/waitlist/{sid}")
+
+def worker(index, args, samples, recording, stop):
+    rng = random.Random(f"{args.seed}:{index}")
+    client = Client(args.url, samples, recording)
+    try:
+        while not stop.is_set():
+            if args.scenario == "registration":
+                session = registration_session
+            else:
+                session = student_session if rng.random() < STUDENT_SHARE else admin_session
+            session(client, rng, args)
+            if args.think_ms:
+                time.sleep(rng.expovariate(1000 / args.think_ms))
+    finally:
+        client.connection.close()
+
+def run(args):
+    """Run the load for warmup + duration seconds; returns the summary of the measured part"""
+    samples = []  # list.append is atomic, so workers share it without a lock
+    recording, stop = threading.Event(), threading.Event()
+    threads = [threading.Thread(target=worker, args=(i, args, samples, recording, stop), daemon=True)
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    if args.warmup:
+        print(f"→ Warming up for {args.warmup}s")
+        time.sleep(args.warmup)
+    print(f"→ Measuring for {args.duration}s with {args.concurrency} workers")
+    recording.set()
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recording.clear()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    result = summarize(samples, elapsed)
+    result["config"] = {key: getattr(args, key) for key in
+                        ("url", "scenario", "concurrency", "duration", "seed", "students", "courses", "departments")}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--scenario", choices=("dashboard", "registration"), default="dashboard")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between sessions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--students", type=int, default=100000, help="as passed to benchmarks.datagen")
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--departments", type=int, default=20)
+    parser.add_argument("--out", help="write the summary as JSON")
+    parser.add_argument("--baseline", help="compare against a stored summary")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.out:
+        save(result, args.out)
+    ok = report(result, args.baseline)
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Latency and throughput report for a load-generator run, with baseline comparison.
+
+    python -m benchmarks.report run.json                          print the report
+    python -m benchmarks.report run.json --baseline base.json     compare and flag regressions
+    python -m benchmarks.report run.json --save-baseline base.json
+"""
+import argparse
+import json
+import math
+import sys
+
+PERCENTILES = (50, 95, 99)
+# A p95 more than this much slower than the baseline counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(position), math.ceil(position)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def summarize(samples, duration):
+    """Per-endpoint stats from ``(endpoint, seconds, status)`` samples of a run lasting ``duration`` seconds"""
+    by_endpoint = {}
+    for endpoint, seconds, status in samples:
+        by_endpoint.setdefault(endpoint, []).append((seconds, status))
+    endpoints = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in rows)
+        errors = sum(1 for _, status in rows if not 200 <= status < 400)
+        endpoints[endpoint] = {
+            "requests": len(rows),
+            "errors": errors,
+            "rps": round(len(rows) / duration, 2),
+            **{f"p{q}_ms": round(percentile(latencies, q), 2) for q in PERCENTILES},
+            "max_ms": round(latencies[-1], 2),
+        }
+    total = len(samples)
+    return {
+        "duration_s": round(duration, 2),
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "rps": round(total / duration, 2) if duration else 0.0,
+        "endpoints": endpoints,
+    }
+
+def _change(current, baseline):
+    if current is None or not baseline:
+        return ""
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+def render(result, baseline=None, threshold=REGRESSION_THRESHOLD):
+    """Format a summary as a table; returns (text, regressed endpoints)"""
+    base = (baseline or {}).get("endpoints", {})
+    header = f"{'endpoint':<40} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'Δ p95':>7} {'Δ rps':>7}"
+    lines = [header, "-" * len(header)]
+    regressions = []
+    for endpoint, stats in result["endpoints"].items():
+        line = (f"{endpoint:<40} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+        previous = base.get(endpoint)
+        if previous:
+            line += f" {_change(stats['p95_ms'], previous['p95_ms']):>7} {_change(stats['rps'], previous['rps']):>7}"
+            if stats["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+                regressions.append(endpoint)
+                line += "  ✗"
+        elif baseline:
+            line += f" {'new':>7}"
+        lines.append(line)
+    lines.append(f"total: {result['requests']} requests, {result['errors']} errors, "
+                 f"{result['rps']:.1f} req/s over {result['duration_s']:.0f}s")
+    if baseline:
+        lines.append(f"total req/s vs baseline: {_change(result['rps'], baseline.get('rps'))}")
+    return "\n".join(lines), regressions
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save(result, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+        f.write("\n")
+
+def report(result, baseline_path=None, threshold=REGRESSION_THRESHOLD):
+    """Print a run's report; returns False if an endpoint regressed against the baseline"""
+    baseline = load(baseline_path) if baseline_path else None
+    text, regressions = render(result, baseline, threshold)
+    print(text)
+    if regressions:
+        print(f"✗ p95 regressed by more than {threshold:.0%} on: {', '.join(regressions)}")
+    elif baseline:
+        print("✓ No regressions against the baseline")
+    return not regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("result")
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    result = load(args.result)
+    ok = report(result, args.baseline, args.threshold)
+    if args.save_baseline:
+        save(result, args.save_baseline)
+        print(f"✓ Saved baseline to {args.save_baseline}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""One-off database setup shared by every way of starting the API."""
+from database import get_db_connection, close_db_connection
+from routers.auth import hash_password
+
+LOCK_NAME = "college_db_seed"
+
+def seed_admin():
+    """Create the default admin unless it exists.
+
+    Safe to run from several processes at once: a GET_LOCK advisory lock
+    serialises them and the inserts are no-ops once the rows are there.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 10)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            print("! Admin seeding skipped: another process holds the lock")
+            return
+        try:
+            cursor.execute("SELECT 1 FROM ADMIN WHERE Admin_ID = 'admin001'")
+            if cursor.fetchone():
+                return
+            cursor.execute("""
+                INSERT IGNORE INTO ADMIN (Admin_ID, Email, First_Name, Last_Name)
+                VALUES ('admin001', 'admin@college.edu', 'System', 'Administrator')
+            """)
+            cursor.execute("""
+                INSERT IGNORE INTO USER_LOGIN (User_ID, User_Type, Password)
+                VALUES ('admin001', 'admin', %s)
+            """, (hash_password('admin123'),))
+            conn.commit()
+            print("✓ Default admin created: admin001 / admin123")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        close_db_connection(conn)
@@ -0,0 +1,145 @@
+import asyncio
+import collections
+import hashlib
+import time
+from email.utils import formatdate
+from fastapi import Request, Response
+from config import settings
+from database import run_sync
+from responses import dumps
+
+class LocalBackend:
+    """Per-process generation counters; enough for a single worker"""
+
+    def __init__(self):
+        self._generations = {}
+
+    def generation(self, namespace):
+        return self._generations.setdefault(namespace, (0, time.time()))
+
+    def bump(self, namespace):
+        gen, _ = self.generation(namespace)
+        self._generations[namespace] = (gen + 1, time.time())
+
+class RedisBackend:
+    """Generation counters kept in Redis so every worker sees an invalidation"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND_URL is set but the 'redis' package is not installed")
+        self._client = redis.Redis.from_url(url)
+
+    def generation(self, namespace):
+        values = self._client.hmget(f"cache:gen:{namespace}", "gen", "modified")
+        if values[0] is None:
+            return 0, time.time()
+        return int(values[0]), float(values[1])
+
+    def bump(self, namespace):
+        pipe = self._client.pipeline()
+        pipe.hincrby(f"cache:gen:{namespace}", "gen", 1)
+        pipe.hset(f"cache:gen:{namespace}", "modified", time.time())
+        pipe.execute()
+
+class CacheEntry:
+    """A page rendered to JSON once, so hits are served without re-encoding"""
+
+    def __init__(self, content, next_cursor, generation, modified):
+        self.body = dumps(content)
+        self.next_cursor = next_cursor
+        self.generation = generation
+        self.expires_at = time.monotonic() + settings.CACHE_TTL
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self.last_modified = formatdate(modified, usegmt=True)
+
+class ReferenceCache:
+    """Read-through cache for small, rarely-written reference tables.
+
+    Entries live in process memory and expire after ``CACHE_TTL`` seconds; at
+    most ``CACHE_MAX_ENTRIES`` are kept, least recently used dropped first.
+    Writers call ``invalidate(namespace)``, which bumps a generation counter;
+    with a shared backend every worker checks that counter before serving a
+    cached entry, so an invalidation in one worker is seen by all of them.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._local = LocalBackend()
+        self._entries = collections.OrderedDict()
+        self._loading = {}
+
+    async def _generation(self, namespace):
+        if self.backend is None:
+            return self._local.generation(namespace)
+        return await run_sync(self.backend.generation, namespace)
+
+    async def get_or_load(self, namespace, key, loader):
+        """Return the cached page for ``key``, calling ``loader()`` on a miss.
+
+        ``loader`` is an async callable returning ``(content, next_cursor)``.
+        Concurrent misses for the same key share a single load.
+        """
+        generation, modified = await self._generation(namespace)
+        entry = self._entries.get((namespace, key))
+        if entry:
+            if entry.generation == generation and entry.expires_at > time.monotonic():
+                self._entries.move_to_end((namespace, key))
+                return entry
+            self._entries.pop((namespace, key), None)
+        pending = self._loading.get((namespace, key, generation))
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(namespace, key, generation, modified, loader))
+            self._loading[(namespace, key, generation)] = pending
+            pending.add_done_callback(lambda _: self._loading.pop((namespace, key, generation), None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, namespace, key, generation, modified, loader):
+        content, next_cursor = await loader()
+        entry = CacheEntry(content, next_cursor, generation, modified)
+        self._entries[(namespace, key)] = entry
+        self._entries.move_to_end((namespace, key))
+        self._evict()
+        return entry
+
+    def _evict(self):
+        """Drop the least recently used entries over CACHE_MAX_ENTRIES, and expired ones at the old end"""
+        now = time.monotonic()
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if len(self._entries) <= settings.CACHE_MAX_ENTRIES and oldest.expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, *namespaces):
+        """Drop cached pages for the given namespaces in every worker"""
+        for namespace in namespaces:
+            for cached_key in [k for k in self._entries if k[0] == namespace]:
+                self._entries.pop(cached_key, None)
+            if self.backend is None:
+                self._local.bump(namespace)
+            else:
+                await run_sync(self.backend.bump, namespace)
+
+reference_cache = ReferenceCache(RedisBackend(settings.CACHE_BACKEND_URL) if settings.CACHE_BACKEND_URL else None)
+
+async def cached_page(request: Request, namespace, key, loader):
+    """Serve a list page from the reference cache with ETag/Last-Modified validation.
+
+    ``key`` identifies the page: the route's parsed parameters, normalised and
+    in a fixed order, so reordered or unknown query parameters share an entry.
+    """
+    entry = await reference_cache.get_or_load(namespace, key, loader)
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": "no-cache",
+    }
+    if entry.next_cursor is not None:
+        headers["X-Next-Cursor"] = entry.next_cursor
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or
+                          entry.etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
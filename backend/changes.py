@@ -0,0 +1,123 @@
+"""Change feed over the tables the admin dashboard shows.
+
+Every write to STUDENT, DEPARTMENT, COURSE or COLLEGE_ID also appends the
+keys it touched to CHANGE_LOG, in the same transaction, so the log can't
+miss a committed change or mention a rolled-back one. ``GET /changes?since=``
+collapses the entries after a client's cursor to one operation per row and
+returns the current version of every upserted row plus the keys of deleted
+ones, so a refresh costs O(changes) rather than O(table size).
+
+Seq comes from AUTO_INCREMENT, which is assigned at insert time, not at
+commit: a slow transaction can commit an entry below a Seq a client has
+already seen. The cursor handed out therefore only advances past entries
+older than CHANGE_FEED_SETTLE seconds, and stops at the first newer one even
+if later entries have settled. Entries past the cursor are returned but will
+be returned again, which is harmless because applying a change is
+idempotent. ``has_more`` is only set when the cursor moved, so a page full of
+unsettled entries does not send clients straight back for the same page.
+"""
+from config import settings
+
+UPSERT, DELETE, RESET = "upsert", "delete", "reset"
+
+HEAD_SQL = """
+    SELECT Seq FROM CHANGE_LOG WHERE Changed_At < NOW() - INTERVAL %s SECOND
+    ORDER BY Seq DESC LIMIT 1
+"""
+SINCE_SQL = """
+    SELECT Seq, Entity, Entity_Key, Op, Changed_At < NOW() - INTERVAL %s SECOND FROM CHANGE_LOG
+    WHERE Seq > %s ORDER BY Seq LIMIT %s
+"""
+PRUNE_SQL = "DELETE FROM CHANGE_LOG WHERE Changed_At < NOW() - INTERVAL %s DAY LIMIT %s"
+
+def log_changes(entity, op, keys):
+    """``(sql, params)`` appending one entry per key; execute it before the write commits"""
+    keys = list(keys)
+    return (f"INSERT INTO CHANGE_LOG (Entity, Entity_Key, Op) VALUES {', '.join(['(%s, %s, %s)'] * len(keys))}",
+            [value for key in keys for value in (entity, key, op)])
+
+def log_matching(entity, op, key_column, from_where, params=()):
+    """``(sql, params)`` appending an entry per row of ``SELECT key_column FROM from_where``,
+    for writes whose rows are only known to the database (cascades, SET NULL)"""
+    return (f"INSERT INTO CHANGE_LOG (Entity, Entity_Key, Op) SELECT %s, {key_column}, %s FROM {from_where}",
+            [entity, op, *params])
+
+def log_reset(conn):
+    """Tell every client to refetch from scratch (after bulk loads that bypass the API)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO CHANGE_LOG (Entity, Op) VALUES ('*', %s)", (RESET,))
+        conn.commit()
+    finally:
+        cursor.close()
+
+def _head(cursor):
+    """The newest settled Seq: a cursor from which nothing committed later can be missed"""
+    cursor.execute(HEAD_SQL, (settings.CHANGE_FEED_SETTLE,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def _reset(cursor):
+    return {"cursor": _head(cursor), "reset": True, "has_more": False, "latest_seq": None, "changes": {}}
+
+def read_changes(conn, entities, since=None, limit=None):
+    """Changes after ``since`` for ``entities`` (``{name: (table, key, columns)}``).
+
+    With no ``since``, or one from before the retained log, the answer is
+    ``reset``: refetch the tables, then continue from the returned cursor.
+    """
+    limit = limit or settings.CHANGE_FEED_MAX
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MIN(Seq) FROM CHANGE_LOG")
+        first = cursor.fetchone()[0]
+        if since is None or (first is not None and since < first - 1):
+            return _reset(cursor)
+        cursor.execute(SINCE_SQL, (settings.CHANGE_FEED_SETTLE, since, limit))
+        entries = cursor.fetchall()
+
+        next_cursor, latest, settling = since, {}, False
+        for seq, entity, key, op, settled in entries:
+            if op == RESET:
+                return _reset(cursor)
+            settling = settling or not settled
+            if not settling:
+                next_cursor = seq
+            if entity in entities:
+                latest[entity, key] = op
+
+        changes = {}
+        for entity, (table, key_column, columns) in entities.items():
+            upserts = [key for (name, key), op in latest.items() if name == entity and op == UPSERT]
+            deleted = [key for (name, key), op in latest.items() if name == entity and op == DELETE]
+            rows = []
+            if upserts:
+                cursor.execute(f"""
+                    SELECT {', '.join(columns)} FROM {table}
+                    WHERE {key_column} IN ({', '.join(['%s'] * len(upserts))})
+                """, upserts)
+                rows = [dict(zip(cursor.column_names, row)) for row in cursor.fetchall()]
+                # Deleted again after the entry was written
+                found = {str(row[key_column]) for row in rows}
+                deleted += [key for key in upserts if key not in found]
+            if rows or deleted:
+                changes[entity] = {"upserted": rows, "deleted": deleted}
+        return {"cursor": next_cursor, "reset": False,
+                "has_more": len(entries) == limit and next_cursor != since,
+                "latest_seq": entries[-1][0] if entries else since, "changes": changes}
+    finally:
+        cursor.close()
+
+def prune_changes(conn, batch_size=10000):
+    """Drop entries older than CHANGE_LOG_RETENTION_DAYS, a batch per transaction; returns how many"""
+    removed = 0
+    cursor = conn.cursor()
+    try:
+        while True:
+            cursor.execute(PRUNE_SQL, (settings.CHANGE_LOG_RETENTION_DAYS, batch_size))
+            conn.commit()
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return removed
+    finally:
+        cursor.close()
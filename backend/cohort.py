@@ -0,0 +1,139 @@
+"""Set-based removal of whole student cohorts.
+
+Students are selected by ID list, department and/or admission year (the year
+their college ID was issued) and removed in chunks of COHORT_CHUNK_SIZE, one
+transaction per chunk, with one ``DELETE ... WHERE ... IN (...)`` per table.
+With ``archive`` their grades and enrollments are first copied into
+GRADE_ARCHIVE and ENROLLMENT_ARCHIVE in the same transaction. The seats
+they held go to the offerings' waitlists once each chunk has committed.
+"""
+from datetime import date
+from config import settings
+from registration import release_seats, promote_offerings
+from changes import log_changes, DELETE
+
+def _selection(student_ids=None, dept_id=None, admission_year=None):
+    """WHERE clauses and parameters for a cohort"""
+    where, params = [], []
+    if student_ids is not None:
+        where.append(f"s.Student_ID IN ({', '.join(['%s'] * len(student_ids))})")
+        params.extend(student_ids)
+    if dept_id:
+        where.append("s.Dept_ID = %s")
+        params.append(dept_id)
+    if admission_year:
+        # A range on Issue_Date rather than YEAR(Issue_Date) so an index could serve it
+        where.append("s.College_ID_Number IN (SELECT College_ID_Number FROM COLLEGE_ID "
+                     "WHERE Issue_Date >= %s AND Issue_Date < %s)")
+        params.extend([date(admission_year, 1, 1), date(admission_year + 1, 1, 1)])
+    return where, params
+
+def count_cohort(conn, **selection):
+    where, params = _selection(**selection)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM STUDENT s WHERE {' AND '.join(where) or '1 = 1'}", params)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+# (live table, archive table, columns copied besides the key)
+ARCHIVES = [
+    ("GRADE", "GRADE_ARCHIVE", ("Marks", "Grade_Letter")),
+    ("ENROLLMENT", "ENROLLMENT_ARCHIVE", ("Enrollment_Date", "Academic_Year")),
+]
+
+def _archive(cursor, table, archive_table, columns, marks, ids):
+    """Copy the students' rows of ``table`` into ``archive_table``; returns how many were copied.
+
+    Rows archived before (a student deleted, restored and deleted again) are
+    overwritten in place. The count is taken with COUNT(*) because the
+    statement's own row count reports 2 for every overwritten row.
+    """
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE Student_ID IN ({marks})", ids)
+    copied = cursor.fetchone()[0]
+    if copied:
+        names = ", ".join(("Student_ID", "Course_ID", "Semester_No") + columns)
+        cursor.execute(f"""
+            INSERT INTO {archive_table} ({names})
+            SELECT {names} FROM {table} WHERE Student_ID IN ({marks})
+            ON DUPLICATE KEY UPDATE {', '.join(f"{column} = VALUES({column})" for column in columns)},
+                Archived_At = CURRENT_TIMESTAMP
+        """, ids)
+    return copied
+
+def purge_students(cursor, students, archive=False):
+    """Delete ``(student_id, college_id)`` pairs and everything hanging off them.
+
+    Runs inside the caller's transaction. Returns ``((archived grades,
+    archived enrollments), offerings)``, where offerings lost enrollments and
+    should be promote_offerings()-ed after the commit.
+    """
+    ids = [student_id for student_id, _ in students]
+    college_ids = [college_id for _, college_id in students if college_id]
+    marks = ", ".join(["%s"] * len(ids))
+    archived = (0, 0)
+    if archive:
+        archived = tuple(_archive(cursor, table, archive_table, columns, marks, ids)
+                         for table, archive_table, columns in ARCHIVES)
+    cursor.execute(f"DELETE FROM USER_LOGIN WHERE User_Type = 'student' AND User_ID IN ({marks})", ids)
+    offerings = release_seats(cursor, f"e.Student_ID IN ({marks})", ids)
+    # Children first, so the foreign-key cascades have nothing left to do row by row
+    for table in ("GRADE", "ENROLLMENT", "WAITLIST", "PHOTO", "STUDENT_SEMESTER_SUMMARY", "STUDENT_GPA_SUMMARY"):
+        cursor.execute(f"DELETE FROM {table} WHERE Student_ID IN ({marks})", ids)
+    if college_ids:
+        college_marks = ", ".join(["%s"] * len(college_ids))
+        cursor.execute(f"DELETE FROM ADDRESS WHERE College_ID_Number IN ({college_marks})", college_ids)
+    cursor.execute(f"DELETE FROM STUDENT WHERE Student_ID IN ({marks})", ids)
+    cursor.execute(*log_changes("students", DELETE, ids))
+    if college_ids:
+        cursor.execute(f"DELETE FROM COLLEGE_ID WHERE College_ID_Number IN ({college_marks})", college_ids)
+        cursor.execute(*log_changes("college_ids", DELETE, college_ids))
+    return archived, offerings
+
+def delete_students(conn, students, archive=False):
+    """purge_students() on a cursor of its own; does not commit"""
+    cursor = conn.cursor()
+    try:
+        return purge_students(cursor, students, archive)
+    finally:
+        cursor.close()
+
+def delete_cohort(conn, archive=False, chunk_size=None, progress=None, deleted=None, **selection):
+    """Remove a cohort chunk by chunk; returns totals for the whole run.
+
+    ``deleted`` is called with the student IDs of each chunk once it has committed.
+    """
+    chunk_size = chunk_size or settings.COHORT_CHUNK_SIZE
+    where, params = _selection(**selection)
+    totals = {"deleted": 0, "archived_grades": 0, "archived_enrollments": 0, "promoted": 0, "chunks": 0}
+    cursor = conn.cursor()
+    last = ""
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT s.Student_ID, s.College_ID_Number FROM STUDENT s
+                WHERE {' AND '.join(where + ['s.Student_ID > %s'])}
+                ORDER BY s.Student_ID LIMIT %s
+            """, params + [last, chunk_size])
+            students = cursor.fetchall()
+            if not students:
+                break
+            (grades, enrollments), offerings = purge_students(cursor, students, archive)
+            conn.commit()
+            if deleted:
+                deleted([student_id for student_id, _ in students])
+            totals["promoted"] += len(promote_offerings(conn, offerings))
+            totals["deleted"] += len(students)
+            totals["archived_grades"] += grades
+            totals["archived_enrollments"] += enrollments
+            totals["chunks"] += 1
+            last = students[-1][0]
+            if progress:
+                progress(totals["deleted"])
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return totals
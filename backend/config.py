@@ -6,6 +6,83 @@ class Settings(BaseSettings):
     DB_USER: str = "root"
     DB_PASSWORD: str = "215253"  # CHANGE THIS TO YOUR MYSQL PASSWORD!
     DB_NAME: str = "college_db"
+
+    # Connection pool settings
+    DB_POOL_SIZE: int = 10          # connections kept open between requests
+    DB_POOL_MAX_OVERFLOW: int = 10  # extra connections allowed under burst load
+    DB_POOL_TIMEOUT: float = 10.0   # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800     # reconnect connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True   # ping connections on checkout
+    DB_EXECUTOR_WORKERS: int = 0    # threads running blocking DB calls (0 = pool size + overflow)
+    SLOW_QUERY_MS: int = 200        # log statements slower than this (0 = off)
+    DB_POOL_WARM: int = -1          # connections each worker opens before serving (-1 = DB_POOL_SIZE)
+    
+    # Read replica settings; reads may be up to the replication lag stale, except
+    # for clients that wrote within READ_YOUR_WRITES_WINDOW seconds
+    DB_REPLICAS: str = ""            # comma-separated host[:port] of read replicas ("" = primary only)
+    DB_REPLICA_POOL_SIZE: int = 0    # connections kept open per replica (0 = DB_POOL_SIZE)
+    DB_REPLICA_RETRY_AFTER: int = 30 # seconds an unreachable replica is skipped
+    READ_YOUR_WRITES_WINDOW: int = 5 # seconds after a write that the client's reads go to the primary
+    
+    # List endpoint settings
+    LIST_PAGE_SIZE: int = 500        # default page size for keyset-paginated lists
+    LIST_MAX_PAGE_SIZE: int = 5000
+    STREAM_BATCH_SIZE: int = 1000    # rows fetched per round trip when streaming
+    BATCH_GET_MAX: int = 1000        # keys per batch-get request (and per IN list)
+    
+    # Bulk write settings
+    BULK_BATCH_SIZE: int = 1000      # rows per transaction for bulk imports
+    COHORT_CHUNK_SIZE: int = 500     # students per transaction for cohort deletes
+    
+    # Grading settings (same bands and points as the frontend)
+    GRADING_SCALE: str = "A+:90,A:80,B+:70,B:60,C+:50,C:40,F:0"        # letter:minimum marks
+    GRADE_POINTS: str = "A+:4.0,A:4.0,B+:3.5,B:3.0,C+:2.5,C:2.0,F:0.0"  # letter:points per credit
+    
+    # Reference data cache settings
+    CACHE_TTL: int = 300             # seconds before cached departments/courses are reloaded
+    CACHE_MAX_ENTRIES: int = 1024    # cached pages kept per process, least recently used dropped first
+    CACHE_BACKEND_URL: str = ""      # e.g. redis://localhost:6379/0 to share invalidations across workers
+    
+    # Photo storage settings
+    PHOTO_STORE_DIR: str = "photo_store"     # content-addressed photo files (relative to backend/)
+    PHOTO_MAX_BYTES: int = 10 * 1024 * 1024  # largest accepted upload
+    PHOTO_THUMBNAIL_SIZE: int = 256          # thumbnail bounding box in pixels
+    
+    # Student search settings
+    SEARCH_INDEX_TTL: int = 300      # seconds before the in-process index is reloaded from MySQL
+    SEARCH_MAX_LIMIT: int = 50
+    
+    # Change feed settings
+    CHANGE_FEED_SETTLE: int = 5       # seconds before a change counts as committed-in-order (cursor lags by this)
+    CHANGE_FEED_MAX: int = 5000       # log entries read per GET /changes
+    CHANGE_FEED_POLL_INTERVAL: float = 1.0  # seconds between checks of the /changes/stream SSE feed
+    CHANGE_LOG_RETENTION_DAYS: int = 7      # older entries are pruned; clients further behind refetch
+    CHANGE_LOG_PRUNE_INTERVAL: int = 3600   # seconds between prunes of CHANGE_LOG (run by the scheduler)
+    
+    # Background job settings
+    JOB_MODE: str = "inline"          # "inline": API processes run jobs; "worker": only `python jobs.py` does
+    JOB_CONCURRENCY: str = "students.import:2,students.cohort_delete:1,exports:2,gpa.rebuild:1,transcripts:1"  # type:max running per process
+    JOB_POLL_INTERVAL: float = 2.0    # seconds between checks for queued jobs
+    JOB_HEARTBEAT_INTERVAL: int = 5   # seconds between progress writes of a running job
+    JOB_STALE_AFTER: int = 120        # a running job without a heartbeat for this long is failed (checked every half of it)
+    JOB_FILES_DIR: str = "job_files"  # uploads and export results of jobs (relative to backend/)
+    
+    # Transcript settings
+    TRANSCRIPT_WORKERS: int = 0        # rendering processes per transcript job (0 = one per CPU core)
+    TRANSCRIPT_CHUNK_SIZE: int = 1000  # students fetched and rendered per batch
+    
+    # Scheduler settings (periodic tasks inside the API processes; one process runs each round)
+    SCHEDULER_ENABLED: bool = True
+    EXPIRY_SWEEP_INTERVAL: int = 3600  # seconds between college ID expiry sweeps
+    EXPIRY_SWEEP_CHUNK: int = 1000     # IDs expired per transaction
+    
+    # Serving settings (serve.py); every worker has its own pool, so MySQL's
+    # max_connections must cover WEB_WORKERS * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_WORKERS: int = 0             # worker processes (0 = one per CPU core)
+    GRACEFUL_TIMEOUT: int = 30       # seconds a stopping worker gets to finish its requests
+    SEED_ADMIN: bool = True          # create the default admin on startup (serve.py does it once instead)
     
     # API settings
     API_TITLE: str = "College DBMS API"
@@ -0,0 +1,50 @@
+"""Read-your-writes consistency on top of read replicas.
+
+Replicas apply the primary's changes with a small delay, so a client that
+has just created a student could read a list without it. Every successful
+write therefore stamps its response with an ``X-Read-Your-Writes`` header
+and an ``rw_until`` cookie holding the time until which that client's reads
+must go to the primary (READ_YOUR_WRITES_WINDOW seconds, comfortably above
+normal replication lag). Browsers send the cookie back by themselves; other
+clients can echo the header.
+"""
+import time
+from config import settings
+
+HEADER = "X-Read-Your-Writes"
+COOKIE = "rw_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# POST only because the key list can be too long for a query string
+READ_ONLY_SUFFIXES = ("/batch-get",)
+
+def recently_wrote(request):
+    """True while the client that sent ``request`` may not see its last write on a replica"""
+    token = request.headers.get(HEADER) or request.cookies.get(COOKIE)
+    try:
+        return float(token) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware marking the responses of successful writes with the read-your-writes token"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] in SAFE_METHODS
+                or scope["path"].endswith(READ_ONLY_SUFFIXES)):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + settings.READ_YOUR_WRITES_WINDOW:.3f}"
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (HEADER.lower().encode(), until.encode()),
+                    (b"set-cookie", f"{COOKIE}={until}; Max-Age={settings.READ_YOUR_WRITES_WINDOW}; "
+                                    f"Path=/; SameSite=Lax".encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,22 +1,532 @@
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+import time
 import mysql.connector
 from mysql.connector import Error
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import Request
 from config import settings
+from consistency import recently_wrote
+from metrics import observe_query
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+class TimedCursor:
+    """Cursor proxy that records how long every statement takes"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, **kwargs)
+        finally:
+            observe_query(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            observe_query(operation, time.perf_counter() - start)
+
+class PooledConnection:
+    """Proxy around a MySQL connection that remembers which pool it belongs to"""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self.created_at = time.monotonic()
+        self.in_use = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    @property
+    def raw(self):
+        return self._connection
+
+    def cursor(self, **kwargs):
+        return TimedCursor(self._connection.cursor(**kwargs))
+
+    def close(self):
+        """Return the connection to its pool instead of closing the socket"""
+        if self.in_use:
+            self._pool.release(self)
+
+    def invalidate(self):
+        """Drop the connection from its pool instead of returning it"""
+        self._pool.invalidate(self)
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with overflow, checkout timeout and recycling.
+
+    Up to ``size`` connections are kept open between requests. When all of them
+    are checked out, up to ``max_overflow`` extra connections may be opened;
+    these are closed again as soon as they are returned. A caller that finds the
+    pool exhausted waits up to ``timeout`` seconds before ``PoolTimeout`` is
+    raised. Connections older than ``recycle`` seconds are replaced on checkout.
+
+    Waiters sleep on a condition that is notified whenever a connection is
+    returned or closed; each wakeup re-checks both for an idle connection and
+    for room to open a new one, so capacity freed by a discarded connection
+    is not left unused while callers time out.
+    """
+
+    def __init__(self, size, max_overflow, timeout, recycle, pre_ping=True, **connect_args):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.connect_args = connect_args
+        self._idle = []  # most recently returned last; guarded by _lock
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._open = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _connect(self):
+        return PooledConnection(self, mysql.connector.connect(**self.connect_args))
+
+    def _discard(self, conn):
+        try:
+            conn.raw.close()
+        except Error:
+            pass
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def _is_healthy(self, conn):
+        if self.recycle and time.monotonic() - conn.created_at > self.recycle:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            conn.raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _lend(self, conn):
+        with self._lock:
+            self._checked_out += 1
+        conn.in_use = True
+        return conn
+
+    def checkout(self, timeout=None):
+        """Borrow a healthy connection, opening a new one if the pool allows it.
+
+        ``timeout`` overrides the pool's wait for a free connection.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        while True:
+            with self._available:
+                while not self._idle and self._open >= self.size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {timeout}s "
+                            f"({self._checked_out} checked out)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    self._open += 1
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Error:
+                    with self._available:
+                        self._open -= 1
+                        self._available.notify()
+                    raise
+                return self._lend(conn)
+            if self._is_healthy(conn):
+                return self._lend(conn)
+            self._discard(conn)
+
+    def _put_idle(self, conn):
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def release(self, conn):
+        """Return a borrowed connection, resetting any open transaction"""
+        conn.in_use = False
+        with self._lock:
+            self._checked_out -= 1
+            # Overflow connections are handed to a waiting caller if there is one
+            overflow = self._open > self.size and not self._waiting
+        try:
+            if conn.raw.is_connected() and conn.raw.in_transaction:
+                conn.raw.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        if overflow:
+            self._discard(conn)
+        else:
+            self._put_idle(conn)
+
+    def warm(self, count=None):
+        """Open idle connections up to ``count`` (default: the pool size) ahead of traffic.
+
+        Returns the number of idle connections afterwards.
+        """
+        count = min(self.size if count is None else count, self.size)
+        while True:
+            with self._lock:
+                if len(self._idle) >= count or self._open >= self.size:
+                    return len(self._idle)
+                self._open += 1
+            try:
+                conn = self._connect()
+            except Error:
+                with self._available:
+                    self._open -= 1
+                    self._available.notify()
+                raise
+            self._put_idle(conn)
+
+    def ping(self, timeout=1.0):
+        """Check that the database answers, waiting at most ``timeout`` for a connection"""
+        conn = self.checkout(timeout=timeout)
+        try:
+            conn.raw.ping(reconnect=False)
+        except Error:
+            self.invalidate(conn)
+            raise
+        self.release(conn)
+
+    def invalidate(self, conn):
+        """Drop a borrowed connection whose state can't be trusted (e.g. unread rows)"""
+        conn.in_use = False
+        with self._available:
+            self._checked_out -= 1
+            self._open -= 1
+            self._available.notify()
+        try:
+            conn.raw.shutdown()
+        except Error:
+            pass
+
+    def dispose(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    def status(self):
+        """Report pool usage; saturation is the share of the hard limit in use"""
+        limit = self.size + self.max_overflow
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "overflow_in_use": max(0, self._open - self.size),
+                "saturation": round(self._checked_out / limit, 3) if limit else 1.0,
+                "waiting": self._waiting,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def _make_pool(host, port=3306, size=None):
+    return ConnectionPool(
+        size=size or settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        timeout=settings.DB_POOL_TIMEOUT,
+        recycle=settings.DB_POOL_RECYCLE,
+        pre_ping=settings.DB_POOL_PRE_PING,
+        host=host,
+        port=port,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        database=settings.DB_NAME,
+    )
+
+def get_pool():
+    """Return the process-wide pool, creating it lazily (and again after a fork)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = _make_pool(settings.DB_HOST)
+                _pool_pid = os.getpid()
+    return _pool
+
+class ReplicaSet:
+    """Connection pools for the read replicas, with passive health tracking.
+
+    A read goes to the healthy replica with the fewest connections checked
+    out. A replica that refuses a connection is skipped for
+    DB_REPLICA_RETRY_AFTER seconds; while none is usable, reads go to the
+    primary.
+    """
+
+    def __init__(self, addresses):
+        self.pools = {}
+        for address in addresses:
+            host, _, port = address.partition(":")
+            self.pools[address] = _make_pool(host, int(port or 3306), settings.DB_REPLICA_POOL_SIZE)
+        self._down_until = {}
+
+    def _healthy(self):
+        now = time.monotonic()
+        return sorted((address for address in self.pools if self._down_until.get(address, 0) <= now),
+                      key=lambda address: self.pools[address].status()["checked_out"])
+
+    def _mark_down(self, address, error):
+        self._down_until[address] = time.monotonic() + settings.DB_REPLICA_RETRY_AFTER
+        print(f"! Replica {address} unavailable for {settings.DB_REPLICA_RETRY_AFTER}s: {error}")
+
+    def checkout(self):
+        """Borrow a connection from the least busy healthy replica; None if none is reachable"""
+        # First pass takes an idle connection wherever there is one ...
+        for address in self._healthy():
+            try:
+                return self.pools[address].checkout(timeout=0)
+            except PoolTimeout:
+                continue
+            except Error as e:
+                self._mark_down(address, e)
+        # ... and only if every replica is busy does a read queue for one
+        for address in self._healthy():
+            try:
+                return self.pools[address].checkout()
+            except Error as e:
+                self._mark_down(address, e)
+        return None
+
+    def dispose(self):
+        for pool in self.pools.values():
+            pool.dispose()
+
+    def status(self):
+        now = time.monotonic()
+        return {address: {**pool.status(), "healthy": self._down_until.get(address, 0) <= now}
+                for address, pool in self.pools.items()}
+
+_replicas = None
+_replicas_pid = None
+
+def get_replicas():
+    """The process-wide ReplicaSet, or None when no DB_REPLICAS are configured"""
+    global _replicas, _replicas_pid
+    if not settings.DB_REPLICAS:
+        return None
+    if _replicas is None or _replicas_pid != os.getpid():
+        with _pool_lock:
+            if _replicas is None or _replicas_pid != os.getpid():
+                _replicas = ReplicaSet([address.strip() for address in settings.DB_REPLICAS.split(",")
+                                        if address.strip()])
+                _replicas_pid = os.getpid()
+    return _replicas
 
 def get_db_connection():
-    """Create and return a MySQL database connection"""
+    """Check out a MySQL database connection from the pool"""
     try:
-        connection = mysql.connector.connect(
-            host=settings.DB_HOST,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            database=settings.DB_NAME
-        )
-        return connection
+        return get_pool().checkout()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         raise
 
+def get_read_connection(primary=False):
+    """Check out a connection for read-only work: a replica when one is usable, else the primary.
+
+    ``primary`` forces the primary, e.g. for a client that has just written.
+    """
+    replicas = get_replicas()
+    if replicas is not None and not primary:
+        conn = replicas.checkout()
+        if conn is not None:
+            return conn
+    return get_db_connection()
+
 def close_db_connection(connection):
-    """Close the database connection"""
-    if connection and connection.is_connected():
-        connection.close()
\ No newline at end of file
+    """Return the database connection to the pool"""
+    if connection:
+        connection.close()
+
+def get_db():
+    """FastAPI dependency yielding a pooled connection for the duration of a request"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        close_db_connection(conn)
+
+_executor = None
+_executor_pid = None
+
+def get_executor():
+    """Return the bounded thread pool that runs blocking driver calls"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _pool_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                workers = settings.DB_EXECUTOR_WORKERS or settings.DB_POOL_SIZE + settings.DB_POOL_MAX_OVERFLOW
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+                _executor_pid = os.getpid()
+    return _executor
+
+async def run_sync(fn, *args, **kwargs):
+    """Run a blocking call on the database executor without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+class AsyncCursor:
+    """Awaitable wrapper around a mysql.connector cursor; rows keep the driver's shape"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return self._cursor.column_names
+
+    async def execute(self, operation, params=None):
+        return await run_sync(self._cursor.execute, operation, params)
+
+    async def executemany(self, operation, seq_params):
+        return await run_sync(self._cursor.executemany, operation, seq_params)
+
+    async def fetchone(self):
+        return await run_sync(self._cursor.fetchone)
+
+    async def fetchmany(self, size=1):
+        return await run_sync(self._cursor.fetchmany, size)
+
+    async def fetchall(self):
+        return await run_sync(self._cursor.fetchall)
+
+    async def close(self):
+        return await run_sync(self._cursor.close)
+
+class AsyncConnection:
+    """Awaitable wrapper around a pooled connection"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    @property
+    def raw(self):
+        return self._connection
+
+    def cursor(self, **kwargs):
+        # Creating a cursor does no I/O, so it stays synchronous
+        return AsyncCursor(self._connection.cursor(**kwargs))
+
+    async def commit(self):
+        return await run_sync(self._connection.commit)
+
+    async def rollback(self):
+        return await run_sync(self._connection.rollback)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(connection, ...)`` on the executor in a single hop.
+
+        Useful for multi-statement units of work that would otherwise bounce
+        between the event loop and the executor once per statement.
+        """
+        return await run_sync(fn, self._connection, *args, **kwargs)
+
+async def get_async_db():
+    """FastAPI dependency yielding a pooled connection with an awaitable API"""
+    conn = await run_sync(get_db_connection)
+    try:
+        yield AsyncConnection(conn)
+    finally:
+        await run_sync(close_db_connection, conn)
+
+async def get_async_read_db(request: Request):
+    """Like get_async_db, but for read-only routes: served by a read replica
+    unless the client wrote within the last READ_YOUR_WRITES_WINDOW seconds"""
+    conn = await run_sync(get_read_connection, recently_wrote(request))
+    try:
+        yield AsyncConnection(conn)
+    finally:
+        await run_sync(close_db_connection, conn)
+
+@contextlib.asynccontextmanager
+async def async_connection(read=False):
+    """Check out a pooled connection outside of FastAPI's dependency injection.
+
+    ``read=True`` allows a read replica (for work that tolerates replication lag).
+    """
+    conn = await run_sync(get_read_connection if read else get_db_connection)
+    try:
+        yield AsyncConnection(conn)
+    finally:
+        await run_sync(close_db_connection, conn)
+
+async def stream_rows(sql, params=None, batch_size=None, dictionary=True, read=False):
+    """Yield batches of rows read incrementally from an unbuffered cursor.
+
+    The connection is checked out for the lifetime of the generator rather
+    than the request, so streaming responses keep it until the last batch.
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+    conn = await run_sync(get_read_connection if read else get_db_connection)
+    cursor = conn.cursor(dictionary=dictionary, buffered=False)
+    finished = False
+    try:
+        await run_sync(cursor.execute, sql, params)
+        while True:
+            rows = await run_sync(cursor.fetchmany, batch_size)
+            if not rows:
+                break
+            yield rows
+        finished = True
+    finally:
+        if finished:
+            await run_sync(cursor.close)
+            await run_sync(close_db_connection, conn)
+        else:
+            # Abandoned mid-stream: the remaining rows are still on the wire
+            conn.invalidate()
@@ -0,0 +1,126 @@
+"""Precomputed GPA summaries.
+
+STUDENT_SEMESTER_SUMMARY holds credits and grade points per student and
+semester; STUDENT_GPA_SUMMARY rolls those up into a CGPA per student. The
+grades router refreshes the affected rows inside the same transaction as
+every grade write, so readers never need to aggregate GRADE themselves.
+
+Run ``python gpa.py rebuild`` to backfill or repair the tables.
+"""
+import sys
+import time
+from grading import GRADE_POINTS
+
+def _points_case(column):
+    """SQL CASE expression mapping a grade letter column to grade points"""
+    whens = " ".join(f"WHEN '{letter}' THEN {points}" for letter, points in GRADE_POINTS.items()
+                     if "'" not in letter)
+    return f"(CASE {column} {whens} ELSE 0 END)"
+
+def semester_refresh_query(where, params):
+    """``(sql, params)`` recomputing the semester summaries of the grades matching ``where`` (alias g)"""
+    points = _points_case("g.Grade_Letter")
+    return f"""
+        INSERT INTO STUDENT_SEMESTER_SUMMARY
+            (Student_ID, Semester_No, Credits_Attempted, Credits_Earned, Grade_Points, SGPA)
+        SELECT g.Student_ID, g.Semester_No,
+               SUM(c.Credits),
+               SUM(CASE WHEN {points} > 0 THEN c.Credits ELSE 0 END),
+               SUM({points} * c.Credits),
+               ROUND(SUM({points} * c.Credits) / NULLIF(SUM(c.Credits), 0), 2)
+        FROM GRADE g
+        JOIN COURSE c ON g.Course_ID = c.Course_ID
+        WHERE {where}
+        GROUP BY g.Student_ID, g.Semester_No
+        ON DUPLICATE KEY UPDATE
+            Credits_Attempted = VALUES(Credits_Attempted),
+            Credits_Earned = VALUES(Credits_Earned),
+            Grade_Points = VALUES(Grade_Points),
+            SGPA = VALUES(SGPA)
+    """, params
+
+def _refresh_semesters(cursor, where, params):
+    cursor.execute(*semester_refresh_query(where, params))
+
+def _refresh_students(cursor, student_ids):
+    marks = ", ".join(["%s"] * len(student_ids))
+    cursor.execute(f"""
+        DELETE FROM STUDENT_GPA_SUMMARY
+        WHERE Student_ID IN ({marks})
+          AND Student_ID NOT IN (SELECT Student_ID FROM STUDENT_SEMESTER_SUMMARY WHERE Student_ID IN ({marks}))
+    """, student_ids + student_ids)
+    cursor.execute(f"""
+        INSERT INTO STUDENT_GPA_SUMMARY (Student_ID, Credits_Attempted, Credits_Earned, Grade_Points, CGPA)
+        SELECT Student_ID, SUM(Credits_Attempted), SUM(Credits_Earned), SUM(Grade_Points),
+               ROUND(SUM(Grade_Points) / NULLIF(SUM(Credits_Attempted), 0), 2)
+        FROM STUDENT_SEMESTER_SUMMARY
+        WHERE Student_ID IN ({marks})
+        GROUP BY Student_ID
+        ON DUPLICATE KEY UPDATE
+            Credits_Attempted = VALUES(Credits_Attempted),
+            Credits_Earned = VALUES(Credits_Earned),
+            Grade_Points = VALUES(Grade_Points),
+            CGPA = VALUES(CGPA)
+    """, student_ids)
+
+def refresh_summaries(conn, keys):
+    """Recompute the summaries touched by grade writes.
+
+    ``keys`` is an iterable of ``(student_id, semester_no)``. Only those
+    semester rows are re-aggregated from GRADE; each student's CGPA is then
+    rolled up from their semester rows. Does not commit: call it inside the
+    transaction that wrote the grades.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    cursor = conn.cursor()
+    try:
+        pairs = ", ".join(["(%s, %s)"] * len(keys))
+        params = [value for key in keys for value in key]
+        cursor.execute(f"""
+            DELETE FROM STUDENT_SEMESTER_SUMMARY
+            WHERE (Student_ID, Semester_No) IN ({pairs})
+        """, params)
+        _refresh_semesters(cursor, f"(g.Student_ID, g.Semester_No) IN ({pairs})", params)
+        _refresh_students(cursor, sorted({student_id for student_id, _ in keys}))
+    finally:
+        cursor.close()
+
+def rebuild_summaries(conn, batch_size=500, progress=None):
+    """Rebuild both summary tables from GRADE, one batch of students per transaction"""
+    cursor = conn.cursor()
+    done = 0
+    last = ""
+    try:
+        while True:
+            cursor.execute("""
+                SELECT Student_ID FROM STUDENT WHERE Student_ID > %s ORDER BY Student_ID LIMIT %s
+            """, (last, batch_size))
+            student_ids = [row[0] for row in cursor.fetchall()]
+            if not student_ids:
+                break
+            marks = ", ".join(["%s"] * len(student_ids))
+            cursor.execute(f"DELETE FROM STUDENT_SEMESTER_SUMMARY WHERE Student_ID IN ({marks})", student_ids)
+            _refresh_semesters(cursor, f"g.Student_ID IN ({marks})", student_ids)
+            _refresh_students(cursor, student_ids)
+            conn.commit()
+            done += len(student_ids)
+            last = student_ids[-1]
+            if progress:
+                progress(done)
+    finally:
+        cursor.close()
+    return done
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python gpa.py rebuild")
+    from database import get_db_connection, close_db_connection
+    conn = get_db_connection()
+    started = time.perf_counter()
+    try:
+        total = rebuild_summaries(conn, progress=lambda done: print(f"  {done} students", end="\r"))
+    finally:
+        close_db_connection(conn)
+    print(f"✓ Rebuilt GPA summaries for {total} students in {time.perf_counter() - started:.1f}s")
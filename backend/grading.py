@@ -0,0 +1,56 @@
+from config import settings
+
+def _parse_scale(value):
+    """Parse "A+:90,A:80,..." into [("A+", 90.0), ("A", 80.0), ...]"""
+    pairs = []
+    for item in value.split(","):
+        letter, _, number = item.strip().rpartition(":")
+        pairs.append((letter.strip(), float(number)))
+    return pairs
+
+# Minimum marks for each letter, highest band first
+GRADING_SCALE = sorted(_parse_scale(settings.GRADING_SCALE), key=lambda pair: pair[1], reverse=True)
+GRADE_POINTS = dict(_parse_scale(settings.GRADE_POINTS))
+
+def letter_for(marks):
+    """Grade letter for a mark according to GRADING_SCALE"""
+    for letter, minimum in GRADING_SCALE:
+        if marks >= minimum:
+            return letter
+    return GRADING_SCALE[-1][0]
+
+def points_for(letter):
+    """Grade points earned per credit for a letter (0 for unknown letters)"""
+    return GRADE_POINTS.get(letter, 0.0)
+
+def summarize(grades):
+    """Credit-weighted SGPA per semester and overall CGPA.
+
+    ``grades`` are rows with Semester_No, Grade_Letter and Credits. Credits
+    only count as earned when the letter carries grade points.
+    """
+    semesters = {}
+    for grade in grades:
+        credits = grade["Credits"] or 0
+        points = points_for(grade["Grade_Letter"])
+        totals = semesters.setdefault(grade["Semester_No"], [0, 0, 0.0])
+        totals[0] += credits
+        totals[1] += credits if points > 0 else 0
+        totals[2] += points * credits
+    summary = {"semesters": [], "credits_attempted": 0, "credits_earned": 0, "grade_points": 0.0, "cgpa": None}
+    for semester_no in sorted(semesters):
+        attempted, earned, weighted = semesters[semester_no]
+        summary["semesters"].append({
+            "semester_no": semester_no,
+            "credits_attempted": attempted,
+            "credits_earned": earned,
+            "grade_points": round(weighted, 2),
+            "sgpa": round(weighted / attempted, 2) if attempted else None,
+        })
+        summary["credits_attempted"] += attempted
+        summary["credits_earned"] += earned
+        summary["grade_points"] += weighted
+    if summary["credits_attempted"]:
+        summary["cgpa"] = round(summary["grade_points"] / summary["credits_attempted"], 2)
+    summary["grade_points"] = round(summary["grade_points"], 2)
+    return summary
@@ -0,0 +1,76 @@
+import codecs
+import csv
+import json
+from pydantic import ValidationError
+
+async def iter_lines(chunks):
+    """Split an async stream of byte chunks into text lines (terminators kept)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+async def iter_csv_records(chunks):
+    """Yield ``(record_no, dict)`` from a CSV stream whose first line is the header.
+
+    Header names are lower-cased so they line up with the pydantic field names.
+    Quoted fields may span lines; a record is complete once its quotes balance.
+    """
+    header = None
+    pending = ""
+    record_no = 0
+    async for line in iter_lines(chunks):
+        pending += line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        record_no += 1
+        yield record_no, {name: (value if value != "" else None) for name, value in zip(header, values)}
+
+async def iter_ndjson_records(chunks):
+    """Yield ``(record_no, dict)`` from a newline-delimited JSON stream"""
+    record_no = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        record_no += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = e
+        yield record_no, record
+
+def validation_message(error: ValidationError):
+    """Flatten a pydantic ValidationError into a one-line message"""
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+async def spool(chunks, path):
+    """Write a byte stream to ``path``; returns the number of bytes written"""
+    size = 0
+    with open(path, "wb") as f:
+        async for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+async def file_chunks(path, chunk_size=64 * 1024):
+    """Read a file back as an async byte stream (the shape request.stream() has)"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
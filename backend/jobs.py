@@ -0,0 +1,258 @@
+"""Background jobs for admin operations that outlive a request.
+
+Routers queue work with ``await job_runner.submit(type, params)`` and answer
+202 with the job ID straight away; ``GET /jobs/{id}`` reports progress,
+counts and errors. Jobs are rows in the JOB table. Every process running a
+JobRunner polls it and claims queued jobs with ``FOR UPDATE SKIP LOCKED``, so
+each job runs exactly once however many processes poll.
+
+With JOB_MODE=inline (the default) every API process runs jobs next to its
+requests. With JOB_MODE=worker the API only queues them and a separate
+process runs them:
+
+    python jobs.py
+
+JOB_CONCURRENCY caps how many jobs of each type one process runs at a time,
+so a burst of heavy jobs cannot take every pooled connection away from
+interactive traffic. Handlers are coroutines registered with ``@job_handler``;
+they receive a JobContext for progress reporting plus the job's parameters
+and return a JSON-serialisable result.
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from mysql.connector import Error
+from config import settings
+from database import async_connection, PoolTimeout
+from responses import FastJSONResponse
+
+HANDLERS = {}
+
+# {types} is one placeholder per job type with a free slot
+CLAIM_SQL = """
+    SELECT Job_ID, Job_Type, Params FROM JOB
+    WHERE Status = 'queued' AND Job_Type IN ({types})
+    ORDER BY Created_At LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+STALE_SQL = """
+    UPDATE JOB SET Status = 'failed', Error = 'Interrupted: the process running it stopped',
+                   Finished_At = NOW()
+    WHERE Status = 'running' AND Heartbeat_At < NOW() - INTERVAL %s SECOND
+"""
+
+def job_handler(job_type):
+    """Register a coroutine ``handler(ctx, **params)`` for a job type"""
+    def register(handler):
+        HANDLERS[job_type] = handler
+        return handler
+    return register
+
+def _parse_limits(value):
+    """Parse "students.import:2,gpa.rebuild:1" into {"students.import": 2, ...}"""
+    limits = {}
+    for item in value.split(","):
+        job_type, _, number = item.strip().rpartition(":")
+        if job_type:
+            limits[job_type.strip()] = int(number)
+    return limits
+
+def job_file(name):
+    """Path for an upload or result file of a job"""
+    os.makedirs(settings.JOB_FILES_DIR, exist_ok=True)
+    return os.path.join(settings.JOB_FILES_DIR, name)
+
+def accepted(job_id):
+    """202 response pointing the client at the job's status"""
+    return FastJSONResponse(status_code=202, headers={"Location": f"/jobs/{job_id}"},
+                            content={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"})
+
+class JobContext:
+    """Handed to a running handler; progress is written to the JOB row by the heartbeat"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.done = 0
+        self.total = None
+
+    def progress(self, done, total=None):
+        """Record how many items are done (safe to call from executor threads)"""
+        self.done = done
+        if total is not None:
+            self.total = total
+
+class JobRunner:
+    def __init__(self):
+        self.limits = _parse_limits(settings.JOB_CONCURRENCY)
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = {}
+        self._tasks = set()
+        self._wakeup = None
+        self._loop_task = None
+
+    async def submit(self, job_type, params, total=None):
+        """Queue a job; returns its ID"""
+        if job_type not in HANDLERS:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        job_id = uuid.uuid4().hex
+        async with async_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                await cursor.execute("""
+                    INSERT INTO JOB (Job_ID, Job_Type, Params, Total) VALUES (%s, %s, %s, %s)
+                """, (job_id, job_type, json.dumps(params, default=str), total))
+                await conn.commit()
+            finally:
+                await cursor.close()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def _free_types(self):
+        return [job_type for job_type in HANDLERS
+                if self._running.get(job_type, 0) < self.limits.get(job_type, 1)]
+
+    def _claim(self, conn, job_types):
+        """Mark the oldest queued job of the given types as ours; returns it or None"""
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cursor.execute(CLAIM_SQL.format(types=", ".join(["%s"] * len(job_types))), job_types)
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("""
+                    UPDATE JOB SET Status = 'running', Worker = %s, Started_At = NOW(), Heartbeat_At = NOW()
+                    WHERE Job_ID = %s
+                """, (self.worker, row[0]))
+            conn.commit()
+            return row
+        finally:
+            cursor.close()
+
+    def _fail_stale(self, conn):
+        """Fail running jobs whose process stopped sending heartbeats"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(STALE_SQL, (settings.JOB_STALE_AFTER,))
+            conn.commit()
+            if cursor.rowcount:
+                print(f"! Failed {cursor.rowcount} interrupted jobs")
+        finally:
+            cursor.close()
+
+    async def _update(self, job_id, sql, params):
+        async with async_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                await cursor.execute(f"UPDATE JOB SET {sql} WHERE Job_ID = %s", (*params, job_id))
+                await conn.commit()
+            finally:
+                await cursor.close()
+
+    async def _heartbeat(self, ctx):
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+            try:
+                await self._update(ctx.job_id, "Progress = %s, Total = COALESCE(%s, Total), Heartbeat_At = NOW()",
+                                   (ctx.done, ctx.total))
+            except (Error, PoolTimeout) as e:
+                print(f"! Job {ctx.job_id} heartbeat failed: {e}")
+
+    async def _execute(self, job_id, job_type, params):
+        ctx = JobContext(job_id)
+        heartbeat = asyncio.ensure_future(self._heartbeat(ctx))
+        result, error = None, None
+        try:
+            result = await HANDLERS[job_type](ctx, **params)
+            print(f"✓ Job {job_id} ({job_type}) finished")
+        except asyncio.CancelledError:
+            error = "Interrupted: the process running it was shut down"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            print(f"! Job {job_id} ({job_type}) failed: {error}")
+        finally:
+            heartbeat.cancel()
+        try:
+            await self._update(job_id, """
+                Status = %s, Progress = %s, Total = COALESCE(%s, Total), Result = %s, Error = %s,
+                Finished_At = NOW(), Heartbeat_At = NOW()
+            """, ("failed" if error else "succeeded", ctx.done, ctx.total,
+                  json.dumps(result, default=str) if result is not None else None, error))
+        except (Error, PoolTimeout) as e:
+            # Left as running; the stale-job sweep fails it later
+            print(f"! Job {job_id} could not be marked finished: {e}")
+
+    def _start(self, job_id, job_type, params):
+        self._running[job_type] = self._running.get(job_type, 0) + 1
+
+        def done(task):
+            self._tasks.discard(task)
+            self._running[job_type] -= 1
+            self._wakeup.set()
+
+        task = asyncio.ensure_future(self._execute(job_id, job_type, json.loads(params)))
+        self._tasks.add(task)
+        task.add_done_callback(done)
+
+    async def _check_stale(self):
+        try:
+            async with async_connection() as conn:
+                await conn.run(self._fail_stale)
+        except (Error, PoolTimeout) as e:
+            print(f"! Could not check for interrupted jobs: {e}")
+
+    async def work(self):
+        """Claim and start queued jobs until cancelled"""
+        self._wakeup = asyncio.Event()
+        print(f"✓ Job runner polling as {self.worker}")
+        next_stale_check = 0
+        while True:
+            # Other processes' workers can die at any time, not only before this one starts
+            if time.monotonic() >= next_stale_check:
+                await self._check_stale()
+                next_stale_check = time.monotonic() + settings.JOB_STALE_AFTER / 2
+            job = None
+            job_types = self._free_types()
+            if job_types:
+                try:
+                    async with async_connection() as conn:
+                        job = await conn.run(self._claim, job_types)
+                except (Error, PoolTimeout) as e:
+                    print(f"! Job polling failed: {e}")
+            if job:
+                self._start(*job)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._loop_task = asyncio.ensure_future(self.work())
+
+    async def stop(self):
+        """Stop polling and interrupt running jobs, recording them as failed"""
+        tasks = [task for task in [self._loop_task, *self._tasks] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+job_runner = JobRunner()
+
+async def run_worker():
+    """Run jobs until interrupted (JOB_MODE=worker)"""
+    try:
+        await job_runner.work()
+    finally:
+        await job_runner.stop()
+
+if __name__ == "__main__":
+    # This file runs as __main__ here, but the routers register their handlers
+    # with the ``jobs`` module, so go through that one
+    import main
+    import jobs
+    asyncio.run(jobs.run_worker())
@@ -0,0 +1,101 @@
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from config import settings
+from database import stream_rows
+from responses import dumps, rows_response
+
+def select_columns(fields, columns, key):
+    """Resolve a comma-separated ``fields=`` value against the allowed columns.
+
+    Names are matched case-insensitively; the key column is always included
+    because keyset pagination needs it.
+    """
+    if not fields:
+        return list(columns)
+    lookup = {column.lower(): column for column in columns}
+    selected = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        column = lookup.get(name.lower())
+        if column is None:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'")
+        if column not in selected:
+            selected.append(column)
+    if key not in selected:
+        selected.insert(0, key)
+    return selected
+
+def build_list_query(table, key, columns, fields=None, where=(), after=None, limit=None):
+    """Build a keyset-paginated SELECT ordered by the primary key.
+
+    ``where`` is a sequence of ``(clause, value)`` pairs joined with AND.
+    """
+    selected = select_columns(fields, columns, key)
+    clauses = [clause for clause, _ in where]
+    params = [value for _, value in where]
+    if after is not None:
+        clauses.append(f"{key} > %s")
+        params.append(after)
+    sql = f"SELECT {', '.join(selected)} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {key}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+def keyset_predicate(keys, values):
+    """Expand ``(k1, k2, ...) > (v1, v2, ...)`` into an index-friendly OR chain"""
+    clauses, params = [], []
+    for i, key in enumerate(keys):
+        parts = [f"{prior} = %s" for prior in keys[:i]] + [f"{key} > %s"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(list(values[:i]) + [values[i]])
+    return "(" + " OR ".join(clauses) + ")", params
+
+def page_size(limit):
+    """Clamp a requested page size to the configured bounds"""
+    if limit is None:
+        return settings.LIST_PAGE_SIZE
+    return max(1, min(limit, settings.LIST_MAX_PAGE_SIZE))
+
+async def ndjson_lines(batches):
+    """Encode row batches as newline-delimited JSON, one chunk per batch"""
+    async for rows in batches:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+async def fetch_page(conn, table, key, columns, fields=None, where=(), after=None, limit=None):
+    """Fetch one keyset page; returns ``(rows, next_cursor)``"""
+    limit = page_size(limit)
+    sql, params = build_list_query(table, key, columns, fields, where, after, limit)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(sql, params)
+        rows = await cursor.fetchall()
+    finally:
+        await cursor.close()
+    next_cursor = str(rows[-1][key]) if len(rows) == limit else None
+    return rows, next_cursor
+
+def stream_ndjson(table, key, columns, fields=None, where=(), after=None, limit=None):
+    """Stream the whole selection (or ``limit`` rows) as NDJSON, from a read replica if there is one"""
+    sql, params = build_list_query(table, key, columns, fields, where, after, limit)
+    return StreamingResponse(ndjson_lines(stream_rows(sql, params, read=True)),
+                             media_type="application/x-ndjson")
+
+async def list_rows(conn, table, key, columns, fields=None, where=(),
+                    after=None, limit=None, format="json"):
+    """Serve one page of a table, or stream the whole selection as NDJSON.
+
+    A JSON page carries the key of its last row in ``X-Next-Cursor`` when more
+    rows may follow; clients pass it back as ``after=`` to get the next page.
+    ``format=columnar`` sends the same page as column names plus value arrays.
+    """
+    if format == "ndjson":
+        return stream_ndjson(table, key, columns, fields, where, after, limit)
+    rows, next_cursor = await fetch_page(conn, table, key, columns, fields, where, after, limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return rows_response(rows, format, select_columns(fields, columns, key), headers)
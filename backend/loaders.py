@@ -0,0 +1,110 @@
+"""Batched lookups by key, coalesced within a request.
+
+A DataLoader collects the keys that coroutines ask for during one pass of
+the event loop and resolves all of them with a single ``WHERE key IN (...)``
+query; asking for the same key twice, concurrently or later in the same
+request, reuses the first answer. Routers register the lookups they offer:
+
+    register_loader("students", "SELECT * FROM STUDENT WHERE Student_ID IN ({keys})", "Student_ID")
+
+and handlers take ``loaders: Loaders = Depends(get_loaders)`` and call
+``await loaders["students"].load(student_id)`` or ``.load_many(ids)``.
+Loaders live for one request only, so nothing is cached across requests.
+"""
+import asyncio
+from fastapi import Depends, HTTPException
+from config import settings
+from database import get_async_read_db, AsyncConnection
+
+LOADERS = {}
+
+def register_loader(name, sql, key, many=False):
+    """Offer a lookup; ``sql`` has a ``{keys}`` placeholder for the IN list and returns
+    column ``key``. With ``many`` a key resolves to a list of rows instead of one row."""
+    LOADERS[name] = (sql, key, many)
+
+def fetch_by_keys(conn, sql, key, keys, many=False):
+    """Run a registered lookup for ``keys`` in chunks of BATCH_GET_MAX; returns ``{key: row or rows}``"""
+    found = {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for start in range(0, len(keys), settings.BATCH_GET_MAX):
+            chunk = keys[start:start + settings.BATCH_GET_MAX]
+            cursor.execute(sql.format(keys=", ".join(["%s"] * len(chunk))), chunk)
+            for row in cursor.fetchall():
+                if many:
+                    found.setdefault(row[key], []).append(row)
+                else:
+                    found[row[key]] = row
+    finally:
+        cursor.close()
+    return found
+
+class DataLoader:
+    def __init__(self, batch):
+        self._batch = batch
+        self._futures = {}
+        self._pending = []
+
+    def load(self, key):
+        """Awaitable for the row (rows, or None) of ``key``, fetched with the other keys of this tick"""
+        if key not in self._futures:
+            loop = asyncio.get_running_loop()
+            self._futures[key] = loop.create_future()
+            self._pending.append(key)
+            if len(self._pending) == 1:
+                loop.call_soon(self._dispatch)
+        return self._futures[key]
+
+    async def load_many(self, keys):
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def _dispatch(self):
+        keys, self._pending = self._pending, []
+        asyncio.ensure_future(self._resolve(keys))
+
+    async def _resolve(self, keys):
+        try:
+            found = await self._batch(keys)
+        except Exception as e:
+            for key in keys:
+                # Forget the failure so a later load() tries again
+                self._futures.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self._futures[key].set_result(found.get(key))
+
+class Loaders:
+    """The registered lookups for one request, sharing the request's connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # One connection runs one statement at a time; batches of different loaders take turns
+        self._lock = asyncio.Lock()
+        self._loaders = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaders:
+            sql, key, many = LOADERS[name]
+
+            async def batch(keys):
+                async with self._lock:
+                    return await self.conn.run(fetch_by_keys, sql, key, keys, many)
+
+            self._loaders[name] = DataLoader(batch)
+        return self._loaders[name]
+
+async def batch_get(loaders, name, keys):
+    """Body of a ``POST .../batch-get``: what each key resolved to, plus the keys that matched nothing"""
+    if len(keys) > settings.BATCH_GET_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_GET_MAX} keys per request")
+    keys = list(dict.fromkeys(keys))
+    values = await loaders[name].load_many(keys)
+    missing = [key for key, value in zip(keys, values) if not value]
+    if LOADERS[name][2]:
+        return {"found": {key: value for key, value in zip(keys, values) if value}, "missing": missing}
+    return {"found": [value for value in values if value], "missing": missing}
+
+async def get_loaders(conn: AsyncConnection = Depends(get_async_read_db)):
+    """Per-request Loaders on a read connection (FastAPI resolves it once per request)"""
+    return Loaders(conn)
@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from config import settings
-from database import get_db_connection, close_db_connection
-from routers import auth, students, departments, courses, enrollments, grades, collegeid
-import hashlib
+from database import get_pool, get_replicas, run_sync, PoolTimeout
+from bootstrap import seed_admin
+from jobs import job_runner
+from scheduler import scheduler
+from mysql.connector import Error
+from consistency import ReadYourWritesMiddleware
+from metrics import MetricsMiddleware, render as render_metrics
+from responses import FastJSONResponse
+from routers import (auth, students, departments, courses, enrollments, grades, collegeid, photos, exports,
+                     jobs, changes, transcripts)
 
-app = FastAPI(title=settings.API_TITLE, version=settings.API_VERSION)
+app = FastAPI(title=settings.API_TITLE, version=settings.API_VERSION,
+              default_response_class=FastJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -14,8 +23,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "X-Read-Your-Writes"],
 )
 
+# Route a client's reads to the primary for a moment after it writes
+if settings.DB_REPLICAS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Latency metrics (outermost, so time spent in other middleware is included)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(students.router)
@@ -24,36 +41,83 @@ app.include_router(courses.router)
 app.include_router(enrollments.router)
 app.include_router(grades.router)
 app.include_router(collegeid.router)
+app.include_router(photos.router)
+app.include_router(exports.router)
+app.include_router(jobs.router)
+app.include_router(changes.router)
+app.include_router(transcripts.router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database with default admin"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Seed the default admin and open pooled connections before taking traffic"""
+    app.state.ready = False
+    if settings.SEED_ADMIN:
+        try:
+            await run_sync(seed_admin)
+        except Exception as e:
+            print(f"Error initializing database: {e}")
     try:
-        cursor.execute("SELECT * FROM ADMIN WHERE Admin_ID = 'admin001'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                INSERT INTO ADMIN (Admin_ID, Email, First_Name, Last_Name)
-                VALUES ('admin001', 'admin@college.edu', 'System', 'Administrator')
-            """)
-            hashed_pw = hashlib.sha256('admin123'.encode()).hexdigest()
-            cursor.execute("""
-                INSERT INTO USER_LOGIN (User_ID, User_Type, Password)
-                VALUES ('admin001', 'admin', %s)
-            """, (hashed_pw,))
-            conn.commit()
-            print("✓ Default admin created: admin001 / admin123")
-    except Exception as e:
-        print(f"Error initializing database: {e}")
-    finally:
-        cursor.close()
-        close_db_connection(conn)
+        idle = await run_sync(get_pool().warm, None if settings.DB_POOL_WARM < 0 else settings.DB_POOL_WARM)
+        print(f"✓ Connection pool warmed ({idle} idle)")
+    except Error as e:
+        print(f"! Connection pool warm-up failed: {e}")
+    if settings.JOB_MODE == "inline":
+        job_runner.start()
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+    app.state.ready = True
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop reporting ready, interrupt running jobs, then close pooled database connections"""
+    app.state.ready = False
+    await job_runner.stop()
+    await scheduler.stop()
+    get_pool().dispose()
+    if get_replicas() is not None:
+        get_replicas().dispose()
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    """Shed load with 503 when the connection pool is exhausted"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.get("/pool")
+async def pool_status():
+    """Report database connection pool usage and saturation (per replica too, if any)"""
+    replicas = get_replicas()
+    if replicas is None:
+        return get_pool().status()
+    return {**get_pool().status(), "replicas": replicas.status()}
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the worker's event loop is answering (the database is not consulted,
+    so an outage makes workers unready rather than getting them restarted)"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: startup has finished and the database answers a ping within a second"""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        await run_sync(get_pool().ping)
+    except (Error, PoolTimeout) as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": str(e)})
+    return {"status": "ready"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request, query and pool metrics in Prometheus text format"""
+    return PlainTextResponse(render_metrics(get_pool().status()),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 async def root():
     return {"message": "College DBMS API", "docs": "/docs"}
 
 if __name__ == "__main__":
+    # Single-process development server; use serve.py for multiple workers
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host=settings.HOST, port=settings.PORT)
\ No newline at end of file
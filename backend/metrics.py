@@ -0,0 +1,164 @@
+"""Request and query latency metrics in Prometheus text format.
+
+MetricsMiddleware records every HTTP request under its route template, and
+the cursor wrapper in database.py records every statement under a
+normalized form of its SQL. Both only bump in-memory counters on the hot
+path; the text is built when /metrics is scraped. Values are per process.
+"""
+import bisect
+import re
+import threading
+import time
+from functools import lru_cache
+from config import settings
+
+# Upper bounds in seconds; anything slower lands in +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Latency histogram with one series per combination of label values"""
+
+    def __init__(self, name, help, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                # One slot per bucket, one for +Inf, then the running sum
+                series = self._series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(values, list(series)) for values, series in self._series.items()]
+        for values, series in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+class Counter:
+    """Monotonic counter with one series per combination of label values"""
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values, amount=1):
+        with self._lock:
+            self._series[values] = self._series.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._series.items())
+        lines.extend(f"{self.name}{_labels(self.labels, values)} {count}" for values, count in snapshot)
+        return lines
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds",
+                            "Time from receiving a request to sending the last byte of its response.",
+                            ("method", "route"))
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code.",
+                   ("method", "route", "status"))
+QUERY_LATENCY = Histogram("db_query_duration_seconds",
+                          "Time spent in cursor.execute()/executemany() per normalized statement.",
+                          ("statement",))
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ("statement",))
+_in_flight = 0
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_TUPLES = re.compile(r"(\((?:\?, )*\?\))(?:, \1)+")
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Collapse literals, placeholders and variable-length lists so that the
+    same statement always maps to the same label"""
+    sql = " ".join(sql.split())
+    sql = _STRING.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _NUMBER.sub("?", sql)
+    sql = re.sub(r"\s*,\s*", ", ", sql)
+    sql = _TUPLES.sub(r"\1, ...", sql)
+    sql = _IN_LIST.sub("(?, ...)", sql)
+    return sql[:300]
+
+def observe_query(sql, seconds):
+    """Record one statement's latency and log it if it was slow"""
+    statement = normalize_sql(sql) if isinstance(sql, str) else "?"
+    QUERY_LATENCY.observe((statement,), seconds)
+    if settings.SLOW_QUERY_MS and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        SLOW_QUERIES.inc((statement,))
+        print(f"! Slow query ({seconds * 1000:.0f} ms): {statement}")
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count per route.
+
+    Requests are labelled with the matched route template (``/students/{student_id}``)
+    rather than the raw path, so the number of series stays fixed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.observe((scope["method"], path), time.perf_counter() - start)
+            REQUESTS.inc((scope["method"], path, str(status)))
+
+def render(pool_status=None):
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in (REQUEST_LATENCY, REQUESTS, QUERY_LATENCY, SLOW_QUERIES):
+        lines.extend(metric.render())
+    lines += ["# HELP http_requests_in_flight Requests currently being handled.",
+              "# TYPE http_requests_in_flight gauge",
+              f"http_requests_in_flight {_in_flight}"]
+    for key, value in (pool_status or {}).items():
+        kind = "counter" if key in ("waits", "timeouts") else "gauge"
+        lines += [f"# TYPE db_pool_{key} {kind}", f"db_pool_{key} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,127 @@
+"""Versioned schema migrations.
+
+Migrations live in database/migrations as NNNN_description.sql and are
+applied in order; SCHEMA_MIGRATIONS records what has run. Version 1 is the
+original database/schema.sql: a database that already has its tables is
+marked as being at version 1 without re-running it.
+
+    python migrate.py              apply pending migrations
+    python migrate.py status       list applied and pending migrations
+    python migrate.py check-plans  EXPLAIN every router query, fail on full scans
+"""
+import hashlib
+import os
+import re
+import sys
+from mysql.connector import Error
+from database import get_db_connection, close_db_connection
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database")
+MIGRATIONS_DIR = os.path.join(DATABASE_DIR, "migrations")
+BASELINE = (1, "baseline", os.path.join(DATABASE_DIR, "schema.sql"))
+LOCK_NAME = "college_db_migrations"
+
+def discover():
+    """All migrations as (version, name, path), baseline first"""
+    migrations = [BASELINE]
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"^(\d+)_(\w+)\.sql$", filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise SystemExit("Duplicate migration versions in database/migrations")
+    return sorted(migrations)
+
+def read_statements(path):
+    """Split a migration file into statements, dropping comments and database selection"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    checksum = hashlib.sha256(text.encode()).hexdigest()
+    lines = [line for line in text.splitlines() if not line.strip().startswith("--")]
+    statements = []
+    for statement in "\n".join(lines).split(";"):
+        statement = statement.strip()
+        if not statement or re.match(r"^(CREATE DATABASE|USE)\b", statement, re.I):
+            continue
+        statements.append(statement)
+    return statements, checksum
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS (
+            Version INT PRIMARY KEY,
+            Name VARCHAR(100) NOT NULL,
+            Checksum CHAR(64) NOT NULL,
+            Applied_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT Version, Checksum FROM SCHEMA_MIGRATIONS")
+    return dict(cursor.fetchall())
+
+def record(cursor, version, name, checksum):
+    cursor.execute("""
+        INSERT INTO SCHEMA_MIGRATIONS (Version, Name, Checksum) VALUES (%s, %s, %s)
+    """, (version, name, checksum))
+
+def upgrade(conn):
+    """Apply every pending migration in version order"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            raise SystemExit("Another migration run holds the lock")
+        applied = applied_versions(cursor)
+        for version, name, path in discover():
+            statements, checksum = read_statements(path)
+            if version in applied:
+                if applied[version] != checksum:
+                    print(f"! {version:04d}_{name} changed after it was applied")
+                continue
+            if version == BASELINE[0]:
+                cursor.execute("SHOW TABLES LIKE 'STUDENT'")
+                if cursor.fetchall():
+                    record(cursor, version, name, checksum)
+                    conn.commit()
+                    print(f"✓ {version:04d}_{name} (existing schema adopted)")
+                    continue
+            print(f"→ {version:04d}_{name}")
+            # DDL commits implicitly, so each migration is recorded only once all of it has run
+            for statement in statements:
+                cursor.execute(statement)
+            record(cursor, version, name, checksum)
+            conn.commit()
+            print(f"✓ {version:04d}_{name}")
+    except Error as e:
+        conn.rollback()
+        raise SystemExit(f"Migration failed: {e}")
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+def status(conn):
+    cursor = conn.cursor()
+    try:
+        applied = applied_versions(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+    for version, name, _ in discover():
+        print(f"{'applied' if version in applied else 'pending'}  {version:04d}_{name}")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    conn = get_db_connection()
+    try:
+        if command == "upgrade":
+            upgrade(conn)
+        elif command == "status":
+            status(conn)
+        elif command == "check-plans":
+            from query_plans import check_plans
+            sys.exit(0 if check_plans(conn) else 1)
+        else:
+            sys.exit(__doc__)
+    finally:
+        close_db_connection(conn)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import date
 
 class LoginRequest(BaseModel):
@@ -34,6 +34,7 @@ class CourseCreate(BaseModel):
     course_name: str
     credits: int
     dept_id: str
+    capacity: Optional[int] = None  # seats per offering; None = unlimited
 
 class EnrollmentCreate(BaseModel):
     student_id: str
@@ -41,6 +42,12 @@ class EnrollmentCreate(BaseModel):
     semester_no: int
     enrollment_date: str
     academic_year: str
+    waitlist: bool = True  # join the waitlist if the offering is full
+
+class SeatCapacity(BaseModel):
+    semester_no: int
+    academic_year: str
+    capacity: Optional[int] = None  # None = unlimited
 
 class GradeCreate(BaseModel):
     student_id: str
@@ -53,6 +60,24 @@ class GradeUpdate(BaseModel):
     marks: float
     grade_letter: str
 
+class GradeEntry(BaseModel):
+    student_id: str
+    marks: float
+    grade_letter: Optional[str] = None  # derived from marks when omitted
+
+class GradeBulkUpsert(BaseModel):
+    course_id: str
+    semester_no: int
+    entries: List[GradeEntry]
+    derive_grade_letters: bool = False  # ignore supplied letters and use the grading scale
+
+class CohortDelete(BaseModel):
+    student_ids: Optional[List[str]] = None
+    dept_id: Optional[str] = None
+    admission_year: Optional[int] = None  # year the college ID was issued
+    archive: bool = True                  # copy grades and enrollments to the archive tables first
+    dry_run: bool = False                 # only count the matching students
+
 class AddressCreate(BaseModel):
     street: str
     city: str
@@ -69,4 +94,68 @@ class CollegeIDCreate(BaseModel):
     college_id_number: str
     issue_date: str
     expiry_date: str
-    status: str = "Active"
\ No newline at end of file
+    status: str = "Active"
+# Response rows, named after the table columns. Every field is optional
+# because list endpoints return only the columns picked with fields=.
+
+class DepartmentOut(BaseModel):
+    Dept_ID: Optional[str] = None
+    Dept_Name: Optional[str] = None
+    HOD_Name: Optional[str] = None
+
+class CourseOut(BaseModel):
+    Course_ID: Optional[str] = None
+    Course_Name: Optional[str] = None
+    Credits: Optional[int] = None
+    Dept_ID: Optional[str] = None
+    Capacity: Optional[int] = None
+
+class CollegeIDOut(BaseModel):
+    College_ID_Number: Optional[str] = None
+    Issue_Date: Optional[date] = None
+    Expiry_Date: Optional[date] = None
+    Status: Optional[str] = None
+
+class StudentOut(BaseModel):
+    Student_ID: Optional[str] = None
+    First_Name: Optional[str] = None
+    Last_Name: Optional[str] = None
+    DOB: Optional[date] = None
+    Email: Optional[str] = None
+    Phone: Optional[str] = None
+    Dept_ID: Optional[str] = None
+    College_ID_Number: Optional[str] = None
+
+class EnrollmentOut(BaseModel):
+    Student_ID: str
+    Course_ID: str
+    Semester_No: int
+    Enrollment_Date: date
+    Academic_Year: str
+    Course_Name: Optional[str] = None
+    Credits: Optional[int] = None
+
+class GradeOut(BaseModel):
+    Student_ID: str
+    Course_ID: str
+    Semester_No: int
+    Marks: Optional[float] = None  # DECIMAL(5,2), sent as a JSON number
+    Grade_Letter: Optional[str] = None
+    First_Name: Optional[str] = None
+    Last_Name: Optional[str] = None
+    Course_Name: Optional[str] = None
+    Credits: Optional[int] = None
+
+class TranscriptRequest(BaseModel):
+    dept_id: Optional[str] = None      # neither: the whole college
+    semester_no: Optional[int] = None  # students graded that semester, transcripts up to it
+    format: str = "html"               # html or pdf
+    output: str = "zip"                # zip archive or a directory of files
+
+class BatchGet(BaseModel):
+    keys: List[str]
+
+class ColumnarPage(BaseModel):
+    """Body of a format=columnar response: column names once, then one value array per row"""
+    columns: List[str]
+    rows: List[list]
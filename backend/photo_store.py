@@ -0,0 +1,195 @@
+"""Content-addressed storage for student photos.
+
+Uploaded files are stored once under PHOTO_STORE_DIR, named by their
+SHA-256 digest; the PHOTO table keeps only the digests and metadata. A JPEG
+thumbnail is generated once at upload time and stored the same way.
+
+    python photo_store.py import-legacy   move old PHOTO.Photo blobs into the store
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from PIL import Image, ImageOps
+from config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# Pillow format -> (content type, URL extension)
+FORMATS = {
+    "JPEG": ("image/jpeg", "jpg"),
+    "PNG": ("image/png", "png"),
+    "GIF": ("image/gif", "gif"),
+    "WEBP": ("image/webp", "webp"),
+}
+CONTENT_TYPES = {extension: content_type for content_type, extension in FORMATS.values()}
+
+class PhotoTooLarge(Exception):
+    """Raised when an upload exceeds PHOTO_MAX_BYTES"""
+
+class NotAnImage(Exception):
+    """Raised when an upload is not an image in a supported format"""
+
+def blob_path(digest):
+    return os.path.join(settings.PHOTO_STORE_DIR, digest[:2], digest[2:4], digest)
+
+def photo_url(digest, content_type):
+    """Immutable URL of a stored blob (see routers/photos.py)"""
+    if not digest:
+        return None
+    extension = next((ext for ctype, ext in FORMATS.values() if ctype == content_type), "jpg")
+    return f"/photos/{digest}.{extension}"
+
+def _temp_file():
+    os.makedirs(settings.PHOTO_STORE_DIR, exist_ok=True)
+    return tempfile.mkstemp(dir=settings.PHOTO_STORE_DIR, prefix=".upload-")
+
+def _commit(temp_path, digest):
+    """Move a finished temp file into place; identical content is stored only once"""
+    path = blob_path(digest)
+    if os.path.exists(path):
+        os.remove(temp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+def _thumbnail(image):
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((settings.PHOTO_THUMBNAIL_SIZE, settings.PHOTO_THUMBNAIL_SIZE))
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+def store_bytes(data):
+    fd, temp_path = _temp_file()
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    digest = hashlib.sha256(data).hexdigest()
+    _commit(temp_path, digest)
+    return digest
+
+def _finish(temp_path, sha, size):
+    """Validate a fully written upload, build its thumbnail and move it into place"""
+    try:
+        with Image.open(temp_path) as image:
+            if image.format not in FORMATS:
+                raise NotAnImage(f"Unsupported image format {image.format}")
+            content_type = FORMATS[image.format][0]
+            thumbnail = _thumbnail(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise NotAnImage(f"Not a valid image: {e}")
+    digest = sha.hexdigest()
+    _commit(temp_path, digest)
+    return digest, size, content_type, store_bytes(thumbnail)
+
+def _discard(temp_path):
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+def ingest(fileobj, max_bytes=None):
+    """Copy an uploaded file into the store in chunks and build its thumbnail.
+
+    Returns ``(digest, size, content_type, thumbnail_digest)``. The file is
+    hashed while it is copied, so it is read exactly once; it is validated
+    as an image before it becomes visible in the store.
+    """
+    max_bytes = max_bytes or settings.PHOTO_MAX_BYTES
+    fd, temp_path = _temp_file()
+    try:
+        sha = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PhotoTooLarge(f"Photo exceeds {max_bytes} bytes")
+                sha.update(chunk)
+                out.write(chunk)
+        return _finish(temp_path, sha, size)
+    except BaseException:
+        _discard(temp_path)
+        raise
+
+async def ingest_stream(chunks, max_bytes=None):
+    """ingest() for an async byte stream such as ``request.stream()``.
+
+    The body goes straight into the store as it arrives and the upload is
+    aborted as soon as it passes ``max_bytes``; file I/O runs on executor
+    threads so the event loop is never blocked.
+    """
+    max_bytes = max_bytes or settings.PHOTO_MAX_BYTES
+    loop = asyncio.get_running_loop()
+    fd, temp_path = await loop.run_in_executor(None, _temp_file)
+    try:
+        sha = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PhotoTooLarge(f"Photo exceeds {max_bytes} bytes")
+                sha.update(chunk)
+                await loop.run_in_executor(None, out.write, chunk)
+        return await loop.run_in_executor(None, _finish, temp_path, sha, size)
+    except BaseException:
+        _discard(temp_path)
+        raise
+
+def iter_file(path, start, end):
+    """Yield bytes ``start``..``end`` (inclusive) of a file in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def import_legacy(conn, batch_size=100):
+    """Move photos stored in PHOTO.Photo into the store and clear the blob column"""
+    cursor = conn.cursor()
+    moved = 0
+    try:
+        while True:
+            cursor.execute("""
+                SELECT Student_ID, Photo FROM PHOTO
+                WHERE Content_Hash IS NULL AND Photo IS NOT NULL
+                LIMIT %s
+            """, (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for student_id, blob in rows:
+                try:
+                    digest, size, content_type, thumbnail = ingest(io.BytesIO(blob), max_bytes=len(blob))
+                except NotAnImage as e:
+                    print(f"! {student_id}: {e}; blob left in place")
+                    cursor.execute("UPDATE PHOTO SET Content_Hash = '' WHERE Student_ID = %s", (student_id,))
+                    continue
+                cursor.execute("""
+                    UPDATE PHOTO
+                    SET Photo = NULL, Content_Hash = %s, Thumbnail_Hash = %s, Content_Type = %s, Size_Bytes = %s
+                    WHERE Student_ID = %s
+                """, (digest, thumbnail, content_type, size, student_id))
+                moved += 1
+            conn.commit()
+    finally:
+        cursor.close()
+    return moved
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["import-legacy"]:
+        sys.exit(__doc__)
+    from database import get_db_connection, close_db_connection
+    conn = get_db_connection()
+    try:
+        print(f"✓ Moved {import_legacy(conn)} photos into {settings.PHOTO_STORE_DIR}")
+    finally:
+        close_db_connection(conn)
@@ -0,0 +1,159 @@
+"""EXPLAIN-based regression checks for the queries the routers run.
+
+The SQL is imported from the modules that run it (module-level constants and
+``*_query()`` builders), so the check sees exactly what the app sends; every
+lookup registered with ``register_loader`` is checked as well. Plain
+``INSERT ... VALUES`` statements have no plan to check and are left out.
+The check fails when MySQL plans a full table scan (access type ALL) on a
+table that the query is not explicitly allowed to scan. Run it against a
+database loaded with realistic data (see benchmarks/datagen.py); on
+near-empty tables the optimizer may prefer scans that it would never choose
+in production.
+
+    python migrate.py check-plans
+
+tests/test_query_plans.py runs the same check with the test suite.
+"""
+from listing import build_list_query, page_size
+from loaders import LOADERS
+from changes import log_matching, HEAD_SQL, SINCE_SQL, PRUNE_SQL, UPSERT
+from exporter import export_query
+from gpa import semester_refresh_query
+from jobs import CLAIM_SQL, STALE_SQL
+from registration import WAITLIST_HEAD_SQL
+from transcripts import grades_query
+from routers import auth, students, courses, departments, collegeid, enrollments, grades, photos
+from routers.jobs import JOB_SQL, jobs_query
+
+LIMIT = page_size(None)
+STUDENT, COURSE, DEPT, COLLEGE_ID = "S0001", "CS101", "CS", "CIDS0001"
+
+# A representative key for each registered loader
+LOADER_KEYS = {
+    "students": STUDENT, "admins": "A001", "courses": COURSE, "college_ids": COLLEGE_ID,
+    "enrollments": STUDENT, "grades": STUDENT,
+}
+
+def _listing(table, key, columns, where=(), after="M"):
+    return build_list_query(table, key, columns, None, where, after, LIMIT)
+
+def _marks(sql, count, name="marks"):
+    """Fill the ``{marks}``-style placeholder of ``sql`` with ``count`` parameters"""
+    return sql.format(**{name: ", ".join(["%s"] * count)})
+
+# (name, sql, params, tables or aliases allowed to be scanned in full)
+QUERIES = [
+    ("auth.login", auth.LOGIN_SQL, (STUDENT, "student", "x" * 64), ()),
+    ("students.get", students.STUDENT_SQL, (STUDENT,), ()),
+    ("students.list", *_listing("STUDENT", "Student_ID", students.STUDENT_COLUMNS), ()),
+    ("students.list by department",
+     *_listing("STUDENT", "Student_ID", students.STUDENT_COLUMNS, [("Dept_ID = %s", DEPT)]), ()),
+    ("students.list by status",
+     *_listing("STUDENT", "Student_ID", students.STUDENT_COLUMNS, [(students.STATUS_FILTER, "Active")]), ()),
+    ("students.dashboard profile", students.DASHBOARD_PROFILE_SQL, (STUDENT,), ()),
+    ("students.dashboard courses", students.DASHBOARD_COURSES_SQL, (STUDENT, STUDENT), ()),
+    ("students.update", students.STUDENT_UPDATE_SQL.format(assignments="Email = %s"),
+     ("new@example.com", STUDENT), ()),
+    ("students.delete", students.STUDENT_COLLEGE_ID_SQL, (STUDENT,), ()),
+    ("students.bulk collisions", _marks(students.BULK_TAKEN_SQL, 2),
+     (STUDENT, "S0002", "a@example.com", "b@example.com"), ()),
+    # Every department, by design (a handful of rows)
+    ("students.bulk departments", students.DEPARTMENT_IDS_SQL, (), ("DEPARTMENT",)),
+    ("photos.student", photos.STUDENT_EXISTS_SQL, (STUDENT,), ()),
+    ("photos.current", photos.PHOTO_SQL, (STUDENT,), ()),
+    ("departments.list", *_listing("DEPARTMENT", "Dept_ID", departments.DEPARTMENT_COLUMNS, after="A"), ()),
+    ("departments.delete courses", *log_matching("courses", UPSERT, "Course_ID", departments.DEPARTMENT_COURSES,
+                                                 (DEPT,)), ()),
+    ("departments.delete students", *log_matching("students", UPSERT, "Student_ID",
+                                                  departments.DEPARTMENT_STUDENTS, (DEPT,)), ()),
+    ("departments.delete", departments.DEPARTMENT_DELETE_SQL, (DEPT,), ()),
+    ("courses.list", *_listing("COURSE", "Course_ID", courses.COURSE_COLUMNS), ()),
+    ("courses.list by department",
+     *_listing("COURSE", "Course_ID", courses.COURSE_COLUMNS, [("Dept_ID = %s", DEPT)]), ()),
+    ("courses.delete affected grades", courses.COURSE_GRADED_SQL, (COURSE,), ()),
+    ("courses.delete", courses.COURSE_DELETE_SQL, (COURSE,), ()),
+    ("college_ids.get", collegeid.COLLEGE_ID_SQL, (COLLEGE_ID,), ()),
+    ("college_ids.list", *_listing("COLLEGE_ID", "College_ID_Number", collegeid.COLLEGE_ID_COLUMNS), ()),
+    ("college_ids.list by status",
+     *_listing("COLLEGE_ID", "College_ID_Number", collegeid.COLLEGE_ID_COLUMNS,
+               [(collegeid.STATUS_FILTER, "Active")]), ()),
+    ("college_ids.list expiring soon",
+     *_listing("COLLEGE_ID", "College_ID_Number", collegeid.COLLEGE_ID_COLUMNS,
+               [(collegeid.STATUS_FILTER, "Active"), (collegeid.EXPIRING_FILTER, 30)]), ()),
+    ("college_ids.status counts", collegeid.STATUS_COUNTS_SQL, (), ()),
+    ("college_ids.delete holders", collegeid.HOLDERS_SQL, (COLLEGE_ID,), ()),
+    ("college_ids.delete", collegeid.COLLEGE_ID_DELETE_SQL, (COLLEGE_ID,), ()),
+    ("college_ids.expiry sweep", collegeid.LAPSED_SQL, (1000,), ()),
+    ("college_ids.expire", _marks(collegeid.EXPIRE_SQL, 2), (COLLEGE_ID, "CIDS0002"), ()),
+    ("enrollments.by student", enrollments.ENROLLMENTS_SQL, (STUDENT,), ()),
+    ("enrollments.seats", *enrollments.seats_query(COURSE, "2024-25"), ()),
+    ("enrollments.student waitlist", enrollments.STUDENT_WAITLIST_SQL, (STUDENT,), ()),
+    ("enrollments.leave waitlist", enrollments.LEAVE_WAITLIST_SQL, (STUDENT, COURSE), ()),
+    ("registration.waitlist head", WAITLIST_HEAD_SQL, (COURSE, 1, "2024-25"), ()),
+    ("grades.by student", grades.STUDENT_GRADES_SQL, (STUDENT,), ()),
+    ("grades.by course", *grades.course_grades_query(COURSE), ()),
+    ("grades.by course and semester", *grades.course_grades_query(COURSE, 1), ()),
+    ("grades.list", *grades.grade_page_query(limit=LIMIT), ()),
+    ("grades.list after cursor", *grades.grade_page_query(after=[STUDENT, COURSE, 1], limit=LIMIT), ()),
+    ("grades.list by course", *grades.grade_page_query(COURSE, after=[STUDENT, COURSE, 1], limit=LIMIT), ()),
+    ("grades.analytics by course", *grades.analytics_query("course", course_id=COURSE), ()),
+    ("grades.analytics by department", *grades.analytics_query("department", dept_id=DEPT), ()),
+    # Statistics over every marked grade read the table by design
+    ("grades.analytics all", *grades.analytics_query("course"), ("g", "c")),
+    ("grades.rankings by department", *grades.rankings_query(DEPT), ()),
+    # Ranking everyone (or a whole semester) ranks every summary row
+    ("grades.rankings all", *grades.rankings_query(), ("t",)),
+    ("grades.rankings by semester", *grades.rankings_query(semester_no=1), ("t",)),
+    ("grades.summary semesters", grades.SEMESTER_SUMMARY_SQL, (STUDENT,), ()),
+    ("grades.summary overall", grades.GPA_SUMMARY_SQL, (STUDENT,), ()),
+    ("grades.rebuild count", grades.STUDENT_COUNT_SQL, (), ()),
+    ("grades.bulk course", grades.COURSE_EXISTS_SQL, (COURSE,), ()),
+    ("grades.bulk students", _marks(grades.KNOWN_STUDENTS_SQL, 2), (STUDENT, "S0002"), ()),
+    ("grades.bulk existing", _marks(grades.GRADED_STUDENTS_SQL, 2), (COURSE, 1, STUDENT, "S0002"), ()),
+    ("grades.update", grades.GRADE_UPDATE_SQL, (80, "A", STUDENT, COURSE, 1), ()),
+    ("gpa.refresh semester",
+     *semester_refresh_query("(g.Student_ID, g.Semester_No) IN ((%s, %s))", [STUDENT, 1]), ()),
+    # Exports read everything by design; only the driving table may be scanned
+    ("exports.grades", *export_query("grades", academic_year="2023-24"), ("g",)),
+    ("exports.enrollments", *export_query("enrollments", dept_id=DEPT), ("e",)),
+    ("transcripts.grades", *grades_query([STUDENT, "S0002", "S0003"]), ()),
+    ("transcripts.grades up to semester", *grades_query([STUDENT, "S0002", "S0003"], 4), ()),
+    ("changes.head", HEAD_SQL, (5,), ()),
+    ("changes.since", SINCE_SQL, (5, 0, 5000), ()),
+    ("changes.prune", PRUNE_SQL, (30, 10000), ()),
+    ("jobs.get", JOB_SQL, ("0" * 32,), ()),
+    # Unfiltered, the job list sorts the whole (small) JOB table by creation time
+    ("jobs.list", *jobs_query(), ("JOB",)),
+    ("jobs.list by status", *jobs_query(status="running"), ()),
+    ("jobs.list by type", *jobs_query(job_type="exports"), ()),
+    ("jobs.claim", _marks(CLAIM_SQL, 2, "types"), ("exports", "gpa.rebuild"), ()),
+    ("jobs.fail stale", STALE_SQL, (120,), ()),
+] + [
+    (f"loaders.{name}", sql.format(keys="%s"), (LOADER_KEYS.get(name, "X"),), ())
+    for name, (sql, _, _) in sorted(LOADERS.items())
+]
+
+def full_scans(cursor, sql, params):
+    """Tables the plan for ``sql`` reads in full"""
+    cursor.execute("EXPLAIN " + sql, params)
+    return [row["table"] for row in cursor.fetchall()
+            if row["type"] == "ALL" and row["table"] and not row["table"].startswith("<")]
+
+def unexpected_scans(cursor, sql, params, allowed):
+    return [table for table in full_scans(cursor, sql, params) if table not in allowed]
+
+def check_plans(conn):
+    """Print one line per query; returns False if any query regressed to a full scan"""
+    cursor = conn.cursor(dictionary=True)
+    ok = True
+    try:
+        for name, sql, params, allowed in QUERIES:
+            scans = unexpected_scans(cursor, sql, params, allowed)
+            if scans:
+                ok = False
+                print(f"✗ {name}: full scan of {', '.join(scans)}")
+            else:
+                print(f"✓ {name}")
+    finally:
+        cursor.close()
+    return ok
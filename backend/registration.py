@@ -0,0 +1,283 @@
+"""Course registration against per-offering seat counters.
+
+An offering is a course in one semester of an academic year. Its seats are
+tracked in a COURSE_SEATS row (Capacity, Enrolled), created on first use with
+COURSE.Capacity as the capacity. Registering is one short transaction:
+
+    INSERT INTO ENROLLMENT ...                                  (new row only)
+    UPDATE COURSE_SEATS SET Enrolled = Enrolled + 1
+    WHERE <offering> AND (Capacity IS NULL OR Enrolled < Capacity)
+    COMMIT
+
+The conditional UPDATE is what cannot oversell: InnoDB serialises it on the
+counter row and a full offering matches no row, so the enrollment is rolled
+back. Because the counter is touched last, its row lock is held only for
+the commit, which keeps queues on a popular course short. Students who
+find an offering full join its WAITLIST; whenever a seat frees up (a drop or
+a capacity increase) the longest-waiting students are enrolled in turn.
+While anyone is waiting, the UPDATE also refuses direct registrations, so a
+seat freed by a drop goes to the head of the waitlist and not to whoever
+registers before the promotion runs.
+
+The functions take a connection and run on the database executor, so each
+transaction is one executor hop with no event-loop round trips inside it.
+"""
+from datetime import date
+from mysql.connector import Error, errorcode
+
+ENROLLED, WAITLISTED, FULL = "enrolled", "waitlisted", "full"
+# Deadlocks and lock wait timeouts roll back the whole transaction, which is safe to retry
+RETRYABLE = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+RETRIES = 3
+
+WAITLIST_HEAD_SQL = """
+    SELECT Waitlist_ID, Student_ID FROM WAITLIST
+    WHERE Course_ID = %s AND Semester_No = %s AND Academic_Year = %s
+    ORDER BY Waitlist_ID LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+
+class RegistrationError(Exception):
+    """A registration that can't succeed; ``status_code`` is the HTTP status to answer with"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def _take_seat(cursor, student_id, course_id, semester_no, academic_year, enrollment_date, waitlisted=False):
+    """Insert the enrollment and count it; False (nothing written) if the offering is full.
+
+    A direct registration (not ``waitlisted``) also finds the offering full
+    while its waitlist has anyone on it. Runs inside the caller's transaction
+    and rolls nothing back itself.
+    """
+    cursor.execute("""
+        INSERT INTO ENROLLMENT (Student_ID, Course_ID, Semester_No, Enrollment_Date, Academic_Year)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (student_id, course_id, semester_no, enrollment_date, academic_year))
+    offering = (course_id, semester_no, academic_year)
+    queue_clause = ""
+    if not waitlisted:
+        queue_clause = """AND NOT EXISTS (SELECT 1 FROM WAITLIST w WHERE w.Course_ID = %s
+                                              AND w.Semester_No = %s AND w.Academic_Year = %s)"""
+    cursor.execute(f"""
+        UPDATE COURSE_SEATS SET Enrolled = Enrolled + 1
+        WHERE Course_ID = %s AND Semester_No = %s AND Academic_Year = %s
+          AND (Capacity IS NULL OR Enrolled < Capacity) {queue_clause}
+    """, offering if waitlisted else offering + offering)
+    return cursor.rowcount == 1
+
+def _ensure_offering(conn, cursor, course_id, semester_no, academic_year):
+    """Create the offering's counter row if missing; False if the course does not exist"""
+    cursor.execute("""
+        INSERT IGNORE INTO COURSE_SEATS (Course_ID, Semester_No, Academic_Year, Capacity, Enrolled)
+        SELECT c.Course_ID, %s, %s, c.Capacity,
+               (SELECT COUNT(*) FROM ENROLLMENT e
+                WHERE e.Course_ID = c.Course_ID AND e.Semester_No = %s AND e.Academic_Year = %s)
+        FROM COURSE c WHERE c.Course_ID = %s
+    """, (semester_no, academic_year, semester_no, academic_year, course_id))
+    conn.commit()
+    cursor.execute("""
+        SELECT 1 FROM COURSE_SEATS WHERE Course_ID = %s AND Semester_No = %s AND Academic_Year = %s
+    """, (course_id, semester_no, academic_year))
+    return cursor.fetchone() is not None
+
+def _waitlist_position(cursor, student_id, course_id, semester_no, academic_year):
+    cursor.execute("""
+        SELECT COUNT(*) FROM WAITLIST w
+        JOIN WAITLIST mine ON mine.Student_ID = %s AND mine.Course_ID = w.Course_ID
+                          AND mine.Semester_No = w.Semester_No
+        WHERE w.Course_ID = %s AND w.Semester_No = %s AND w.Academic_Year = %s
+          AND w.Waitlist_ID <= mine.Waitlist_ID
+    """, (student_id, course_id, semester_no, academic_year))
+    return cursor.fetchone()[0] or None
+
+def register(conn, student_id, course_id, semester_no, academic_year, enrollment_date=None, waitlist=True):
+    """Enroll a student, or waitlist them if the offering is full or others are waiting for it.
+
+    Returns ``{"status": "enrolled"}``, ``{"status": "waitlisted", "position": n}``
+    or, without ``waitlist``, ``{"status": "full"}``.
+    """
+    enrollment_date = enrollment_date or date.today()
+    cursor = conn.cursor()
+    try:
+        checked = False
+        retries = RETRIES
+        while True:
+            try:
+                taken = _take_seat(cursor, student_id, course_id, semester_no, academic_year, enrollment_date)
+            except Error as e:
+                conn.rollback()
+                if e.errno in RETRYABLE and retries:
+                    retries -= 1
+                    continue
+                if e.errno == errorcode.ER_DUP_ENTRY:
+                    raise RegistrationError(409, "Student is already enrolled in this course for the semester")
+                if e.errno == errorcode.ER_NO_REFERENCED_ROW_2:
+                    raise RegistrationError(404, "Unknown student or course")
+                raise
+            if taken:
+                conn.commit()
+                return {"status": ENROLLED}
+            conn.rollback()
+            if checked:
+                break
+            # The offering is full, has a waitlist, or its counter row doesn't exist yet
+            checked = True
+            if not _ensure_offering(conn, cursor, course_id, semester_no, academic_year):
+                raise RegistrationError(404, "Unknown course")
+            cursor.execute("""
+                SELECT (s.Capacity IS NOT NULL AND s.Enrolled >= s.Capacity)
+                       OR EXISTS (SELECT 1 FROM WAITLIST w WHERE w.Course_ID = s.Course_ID
+                                  AND w.Semester_No = s.Semester_No AND w.Academic_Year = s.Academic_Year)
+                FROM COURSE_SEATS s
+                WHERE s.Course_ID = %s AND s.Semester_No = %s AND s.Academic_Year = %s
+            """, (course_id, semester_no, academic_year))
+            if cursor.fetchone()[0]:
+                break
+        if not waitlist:
+            return {"status": FULL}
+
+        try:
+            cursor.execute("""
+                INSERT INTO WAITLIST (Student_ID, Course_ID, Semester_No, Academic_Year)
+                VALUES (%s, %s, %s, %s)
+            """, (student_id, course_id, semester_no, academic_year))
+            conn.commit()
+        except Error as e:
+            conn.rollback()
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+    finally:
+        cursor.close()
+    # A seat may be free (freed since the failed UPDATE, or held back for the
+    # waitlist); promoting hands it to whoever has waited longest
+    promote(conn, course_id, semester_no, academic_year)
+    cursor = conn.cursor()
+    try:
+        position = _waitlist_position(cursor, student_id, course_id, semester_no, academic_year)
+    finally:
+        cursor.close()
+    return {"status": WAITLISTED, "position": position} if position else {"status": ENROLLED}
+
+def promote(conn, course_id, semester_no, academic_year):
+    """Enroll waitlisted students, longest-waiting first, while seats are free; returns their IDs"""
+    promoted = []
+    cursor = conn.cursor()
+    try:
+        while True:
+            # SKIP LOCKED: concurrent promoters take different students instead of queueing
+            cursor.execute(WAITLIST_HEAD_SQL, (course_id, semester_no, academic_year))
+            row = cursor.fetchone()
+            if not row:
+                conn.rollback()
+                break
+            waitlist_id, student_id = row
+            try:
+                taken = _take_seat(cursor, student_id, course_id, semester_no, academic_year, date.today(),
+                                   waitlisted=True)
+            except Error as e:
+                if e.errno != errorcode.ER_DUP_ENTRY:
+                    conn.rollback()
+                    raise
+                # Enrolled some other way in the meantime (InnoDB undid just the failed
+                # INSERT); only the waitlist entry has to go
+                taken = None
+            if taken is False:
+                conn.rollback()
+                break
+            cursor.execute("DELETE FROM WAITLIST WHERE Waitlist_ID = %s", (waitlist_id,))
+            conn.commit()
+            if taken:
+                promoted.append(student_id)
+    finally:
+        cursor.close()
+    if promoted:
+        print(f"✓ Promoted {len(promoted)} waitlisted students into {course_id} ({academic_year}, semester {semester_no})")
+    return promoted
+
+def promote_offerings(conn, offerings):
+    """promote() each ``(course_id, semester_no, academic_year)``; returns the promoted student IDs"""
+    promoted = []
+    for course_id, semester_no, academic_year in offerings:
+        promoted.extend(promote(conn, course_id, semester_no, academic_year))
+    return promoted
+
+def drop(conn, student_id, course_id):
+    """Remove a student's enrollments in a course, free their seats and fill them from the waitlists"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT Semester_No, Academic_Year FROM ENROLLMENT WHERE Student_ID = %s AND Course_ID = %s
+        """, (student_id, course_id))
+        offerings = cursor.fetchall()
+        cursor.execute("DELETE FROM ENROLLMENT WHERE Student_ID = %s AND Course_ID = %s", (student_id, course_id))
+        for semester_no, academic_year in offerings:
+            cursor.execute("""
+                UPDATE COURSE_SEATS SET Enrolled = Enrolled - 1
+                WHERE Course_ID = %s AND Semester_No = %s AND Academic_Year = %s AND Enrolled > 0
+            """, (course_id, semester_no, academic_year))
+        conn.commit()
+    finally:
+        cursor.close()
+    promote_offerings(conn, [(course_id, semester_no, academic_year) for semester_no, academic_year in offerings])
+    return len(offerings)
+
+def set_capacity(conn, course_id, semester_no, academic_year, capacity):
+    """Resize one offering (None = unlimited); extra seats go to the waitlist"""
+    cursor = conn.cursor()
+    try:
+        if not _ensure_offering(conn, cursor, course_id, semester_no, academic_year):
+            return None
+        cursor.execute("""
+            UPDATE COURSE_SEATS SET Capacity = %s
+            WHERE Course_ID = %s AND Semester_No = %s AND Academic_Year = %s
+        """, (capacity, course_id, semester_no, academic_year))
+        conn.commit()
+    finally:
+        cursor.close()
+    return promote(conn, course_id, semester_no, academic_year)
+
+def release_seats(cursor, where, params):
+    """Uncount the enrollments matching ``where`` (on alias e) before they are deleted in bulk.
+
+    Returns the offerings that had seats freed; promote_offerings() them once
+    the delete has committed.
+    """
+    cursor.execute(f"""
+        SELECT DISTINCT e.Course_ID, e.Semester_No, e.Academic_Year FROM ENROLLMENT e WHERE {where}
+    """, params)
+    offerings = [tuple(row) for row in cursor.fetchall()]
+    if not offerings:
+        return []
+    cursor.execute(f"""
+        UPDATE COURSE_SEATS s
+        JOIN (SELECT e.Course_ID, e.Semester_No, e.Academic_Year, COUNT(*) AS Leaving
+              FROM ENROLLMENT e WHERE {where}
+              GROUP BY e.Course_ID, e.Semester_No, e.Academic_Year) gone
+          ON gone.Course_ID = s.Course_ID AND gone.Semester_No = s.Semester_No
+         AND gone.Academic_Year = s.Academic_Year
+        SET s.Enrolled = GREATEST(s.Enrolled - gone.Leaving, 0)
+    """, params)
+    return offerings
+
+def rebuild_seat_counts(conn):
+    """Recount Enrolled for every offering from ENROLLMENT (after bulk loads)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO COURSE_SEATS (Course_ID, Semester_No, Academic_Year, Capacity, Enrolled)
+            SELECT e.Course_ID, e.Semester_No, e.Academic_Year, MAX(c.Capacity), COUNT(*)
+            FROM ENROLLMENT e JOIN COURSE c ON c.Course_ID = e.Course_ID
+            GROUP BY e.Course_ID, e.Semester_No, e.Academic_Year
+            ON DUPLICATE KEY UPDATE Enrolled = VALUES(Enrolled)
+        """)
+        cursor.execute("""
+            UPDATE COURSE_SEATS s SET s.Enrolled = 0
+            WHERE NOT EXISTS (SELECT 1 FROM ENROLLMENT e WHERE e.Course_ID = s.Course_ID
+                              AND e.Semester_No = s.Semester_No AND e.Academic_Year = s.Academic_Year)
+        """)
+        conn.commit()
+    finally:
+        cursor.close()
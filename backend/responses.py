@@ -0,0 +1,42 @@
+"""Fast JSON rendering for API responses.
+
+FastJSONResponse encodes with orjson, which handles dates natively; Decimal
+values (e.g. GRADE.Marks) become floats, as jsonable_encoder made them.
+FastAPI still runs plain return values through jsonable_encoder first, so
+list endpoints return ``rows_response(...)`` directly to skip that pass.
+"""
+import datetime
+import decimal
+import orjson
+from fastapi.responses import JSONResponse
+
+def _default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", "replace")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content):
+    return orjson.dumps(content, default=_default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+def columnar(rows, columns=()):
+    """``{"columns": [...], "rows": [[...], ...]}`` from dictionary rows"""
+    return {"columns": list(rows[0]) if rows else list(columns),
+            "rows": [list(row.values()) for row in rows]}
+
+def shape_rows(rows, format="json", columns=()):
+    """Dictionary rows as-is, or in columnar form for ``format=columnar``"""
+    return columnar(rows, columns) if format == "columnar" else rows
+
+def rows_response(rows, format="json", columns=(), headers=None):
+    return FastJSONResponse(shape_rows(rows, format, columns), headers=headers)
@@ -1,39 +1,40 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from models import LoginRequest
-from database import get_db_connection, close_db_connection
+from database import get_async_db, AsyncConnection
+from loaders import Loaders, register_loader
 import hashlib
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+register_loader("admins", "SELECT * FROM ADMIN WHERE Admin_ID IN ({keys})", "Admin_ID")
+
+LOGIN_SQL = """
+    SELECT * FROM USER_LOGIN
+    WHERE User_ID = %s AND User_Type = %s AND Password = %s
+"""
+
 def hash_password(password: str) -> str:
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 @router.post("/login")
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, conn: AsyncConnection = Depends(get_async_db)):
     """
     Authenticate user (admin or student) and return user information
     """
-    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
         hashed_pw = hash_password(request.password)
-        cursor.execute("""
-            SELECT * FROM USER_LOGIN 
-            WHERE User_ID = %s AND User_Type = %s AND Password = %s
-        """, (request.userId, request.userType, hashed_pw))
+        await cursor.execute(LOGIN_SQL, (request.userId, request.userType, hashed_pw))
         
-        user = cursor.fetchone()
+        user = await cursor.fetchone()
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        # Get additional user information based on user type
-        if request.userType == 'admin':
-            cursor.execute("SELECT * FROM ADMIN WHERE Admin_ID = %s", (request.userId,))
-            user_info = cursor.fetchone()
-        else:
-            cursor.execute("SELECT * FROM STUDENT WHERE Student_ID = %s", (request.userId,))
-            user_info = cursor.fetchone()
+        # Get additional user information based on user type (the "students"
+        # loader is registered by routers.students)
+        loaders = Loaders(conn)
+        user_info = await loaders["admins" if request.userType == 'admin' else "students"].load(request.userId)
         
         return {
             "userId": request.userId,
@@ -41,5 +42,4 @@ async def login(request: LoginRequest):
             "first_name": user_info.get('First_Name') if user_info else None
         }
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
\ No newline at end of file
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from database import get_async_db, async_connection, AsyncConnection
+from changes import read_changes, prune_changes
+from responses import dumps
+from routers.students import STUDENT_COLUMNS
+from routers.departments import DEPARTMENT_COLUMNS
+from routers.courses import COURSE_COLUMNS
+from routers.collegeid import COLLEGE_ID_COLUMNS
+from scheduler import scheduled
+from config import settings
+from typing import Optional
+import asyncio
+import time
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+ENTITIES = {
+    "students": ("STUDENT", "Student_ID", STUDENT_COLUMNS),
+    "departments": ("DEPARTMENT", "Dept_ID", DEPARTMENT_COLUMNS),
+    "courses": ("COURSE", "Course_ID", COURSE_COLUMNS),
+    "college_ids": ("COLLEGE_ID", "College_ID_Number", COLLEGE_ID_COLUMNS),
+}
+KEEPALIVE_SECONDS = 15
+
+@scheduled("changes.prune", settings.CHANGE_LOG_PRUNE_INTERVAL)
+async def prune_change_log(conn):
+    """Drop change log entries older than CHANGE_LOG_RETENTION_DAYS"""
+    pruned = await conn.run(prune_changes)
+    if pruned:
+        print(f"✓ Pruned {pruned} old change log entries")
+    return pruned
+
+def _entities(entities):
+    if not entities:
+        return ENTITIES
+    return {name: ENTITIES[name] for name in entities.split(",") if name in ENTITIES}
+
+# The feed reads the primary: the settle window compares Changed_At with the
+# clock of the server answering, which on a lagging replica would let the
+# cursor skip entries that haven't been replicated yet
+@router.get("")
+async def get_changes(since: Optional[int] = Query(None, ge=0),
+                      entities: Optional[str] = None,
+                      conn: AsyncConnection = Depends(get_async_db)):
+    """Rows inserted, updated or deleted since cursor ``since``, one entry per row.
+
+    Apply ``upserted`` rows and ``deleted`` keys, then ask again with the
+    returned ``cursor``. ``reset`` means the client is too far behind (or
+    sent no cursor): refetch the lists, then continue from ``cursor``.
+    ``has_more`` means the cursor advanced and there is another page to fetch
+    right away; entries that have not settled yet come back on a later call.
+    """
+    return await conn.run(read_changes, _entities(entities), since)
+
+@router.get("/stream")
+async def stream_changes(request: Request,
+                         since: Optional[int] = Query(None, ge=0),
+                         entities: Optional[str] = None):
+    """The same feed as Server-Sent Events: a ``changes`` event whenever something changed.
+
+    Each event's ``id`` is its cursor, so a reconnecting EventSource resumes
+    where it left off through the Last-Event-ID header.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    selected = _entities(entities)
+
+    async def events():
+        cursor, sent_upto = since, since or 0
+        quiet_since = time.monotonic()
+        while not await request.is_disconnected():
+            async with async_connection() as conn:
+                feed = await conn.run(read_changes, selected, cursor)
+            cursor = feed["cursor"]
+            # Unsettled entries come back on every poll until the cursor passes them
+            if feed["reset"] or (feed["latest_seq"] or 0) > sent_upto:
+                sent_upto = max(sent_upto, feed["latest_seq"] or cursor)
+                quiet_since = time.monotonic()
+                yield f"id: {cursor}\nevent: changes\ndata: ".encode() + dumps(feed) + b"\n\n"
+                if feed["has_more"]:
+                    continue
+            elif time.monotonic() - quiet_since >= KEEPALIVE_SECONDS:
+                quiet_since = time.monotonic()
+                yield b": keepalive\n\n"
+            await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
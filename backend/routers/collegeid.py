@@ -1,66 +1,167 @@
-from fastapi import APIRouter, HTTPException
-from models import CollegeIDCreate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from models import CollegeIDCreate, CollegeIDOut, ColumnarPage, BatchGet
+from database import get_async_db, get_async_read_db, async_connection, AsyncConnection
+from listing import list_rows
+from loaders import Loaders, get_loaders, register_loader, batch_get
+from changes import log_changes, UPSERT, DELETE
+from cohort import delete_students
+from registration import promote_offerings
+from cache import cached_page, reference_cache
+from search import student_search
+from scheduler import scheduled, scheduler
+from config import settings
 from mysql.connector import Error
+from typing import Optional, List, Union
 
 router = APIRouter(prefix="/college-ids", tags=["College IDs"])
 
-@router.get("")
-async def get_college_ids():
-    """Get all college IDs"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+COLLEGE_ID_COLUMNS = ("College_ID_Number", "Issue_Date", "Expiry_Date", "Status")
+
+register_loader("college_ids", "SELECT * FROM COLLEGE_ID WHERE College_ID_Number IN ({keys})", "College_ID_Number")
+
+COLLEGE_ID_SQL = "SELECT * FROM COLLEGE_ID WHERE College_ID_Number = %s"
+STATUS_COUNTS_SQL = "SELECT Status, COUNT(*) FROM COLLEGE_ID GROUP BY Status"
+HOLDERS_SQL = "SELECT Student_ID FROM STUDENT WHERE College_ID_Number = %s"
+COLLEGE_ID_DELETE_SQL = "DELETE FROM COLLEGE_ID WHERE College_ID_Number = %s"
+STATUS_FILTER = "Status = %s"
+EXPIRING_FILTER = "Expiry_Date BETWEEN CURDATE() AND CURDATE() + INTERVAL %s DAY"
+LAPSED_SQL = """
+    SELECT College_ID_Number FROM COLLEGE_ID
+    WHERE Status = 'Active' AND Expiry_Date < CURDATE()
+    ORDER BY Expiry_Date LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+EXPIRE_SQL = "UPDATE COLLEGE_ID SET Status = 'Expired' WHERE College_ID_Number IN ({marks})"
+
+def _expire_chunk(conn, chunk_size):
+    """Mark one chunk of lapsed Active IDs Expired; returns how many.
+
+    The rows are found through idx_college_id_status_expiry and locked with
+    SKIP LOCKED, so the sweep only ever holds locks on its own chunk and
+    never waits behind (or blocks) a request editing some other ID.
+    """
+    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM COLLEGE_ID")
-        return cursor.fetchall()
+        cursor.execute(LAPSED_SQL, (chunk_size,))
+        numbers = [row[0] for row in cursor.fetchall()]
+        if numbers:
+            cursor.execute(EXPIRE_SQL.format(marks=", ".join(["%s"] * len(numbers))), numbers)
+            cursor.execute(*log_changes("college_ids", UPSERT, numbers))
+        conn.commit()
+        return len(numbers)
     finally:
         cursor.close()
-        close_db_connection(conn)
+
+@scheduled("college_ids.expire", settings.EXPIRY_SWEEP_INTERVAL)
+async def expire_college_ids(conn):
+    """Flip Active IDs past their Expiry_Date to Expired, EXPIRY_SWEEP_CHUNK rows per transaction"""
+    expired = 0
+    while True:
+        count = await conn.run(_expire_chunk, settings.EXPIRY_SWEEP_CHUNK)
+        expired += count
+        if count < settings.EXPIRY_SWEEP_CHUNK:
+            break
+    if expired:
+        await reference_cache.invalidate("college_id_counts")
+        print(f"✓ Expired {expired} college IDs")
+    return expired
+
+@router.get("", response_model=Union[List[CollegeIDOut], ColumnarPage])
+async def get_college_ids(after: Optional[str] = None,
+                          limit: Optional[int] = Query(None, ge=1),
+                          fields: Optional[str] = None,
+                          status: Optional[str] = None,
+                          expiring_within_days: Optional[int] = Query(None, ge=0, le=3650),
+                          format: str = Query("json", pattern="^(json|ndjson|columnar)$"),
+                          conn: AsyncConnection = Depends(get_async_read_db)):
+    """Get college IDs a page at a time, optionally filtered by status and/or
+    an expiry date between today and ``expiring_within_days`` days from now"""
+    where = [(STATUS_FILTER, status)] if status else []
+    if expiring_within_days is not None:
+        where.append((EXPIRING_FILTER, expiring_within_days))
+    return await list_rows(conn, "COLLEGE_ID", "College_ID_Number", COLLEGE_ID_COLUMNS,
+                           fields, where, after, limit, format)
+
+@router.get("/status-counts")
+async def get_status_counts(request: Request):
+    """Number of college IDs per status (served from the reference cache)"""
+
+    async def load():
+        # The primary: a reload right after an invalidating write must not cache replica lag
+        async with async_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                await cursor.execute(STATUS_COUNTS_SQL)
+                return {status: count for status, count in await cursor.fetchall()}, None
+            finally:
+                await cursor.close()
+
+    return await cached_page(request, "college_id_counts", (), load)
+
+@router.post("/expire")
+async def run_expiry_sweep():
+    """Run the expiry sweep now instead of waiting for the scheduler"""
+    ran = await scheduler.run_once("college_ids.expire")
+    return {"ran": ran, "detail": None if ran else "A sweep is already running in another process"}
+
+@router.post("/batch-get")
+async def batch_get_college_ids(body: BatchGet, loaders: Loaders = Depends(get_loaders)):
+    """College IDs for a list of numbers with one query, plus the numbers that don't exist"""
+    return await batch_get(loaders, "college_ids", body.keys)
 
 @router.get("/{college_id_number}")
-async def get_college_id(college_id_number: str):
+async def get_college_id(college_id_number: str, conn: AsyncConnection = Depends(get_async_read_db)):
     """Get specific college ID"""
-    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT * FROM COLLEGE_ID WHERE College_ID_Number = %s", (college_id_number,))
-        result = cursor.fetchone()
+        await cursor.execute(COLLEGE_ID_SQL, (college_id_number,))
+        result = await cursor.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="College ID not found")
         return result
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
 @router.post("")
-async def create_college_id(college_id: CollegeIDCreate):
+async def create_college_id(college_id: CollegeIDCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Create a new college ID (Admin only)"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO COLLEGE_ID (College_ID_Number, Issue_Date, Expiry_Date, Status)
             VALUES (%s, %s, %s, %s)
         """, (college_id.college_id_number, college_id.issue_date, 
               college_id.expiry_date, college_id.status))
-        conn.commit()
+        await cursor.execute(*log_changes("college_ids", UPSERT, [college_id.college_id_number]))
+        await conn.commit()
+        await reference_cache.invalidate("college_id_counts")
         return {"message": "College ID created successfully"}
     except Error as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
 @router.delete("/{college_id_number}")
-async def delete_college_id(college_id_number: str):
+async def delete_college_id(college_id_number: str, conn: AsyncConnection = Depends(get_async_db)):
     """Delete a college ID"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM COLLEGE_ID WHERE College_ID_Number = %s", (college_id_number,))
-        conn.commit()
+        # Students holding the ID go with it; deleting them here rather than by the
+        # ON DELETE CASCADE frees their seats and records the deletes
+        await cursor.execute(HOLDERS_SQL, (college_id_number,))
+        student_ids = [row[0] for row in await cursor.fetchall()]
+        offerings = []
+        if student_ids:
+            _, offerings = await conn.run(delete_students, [(student_id, None) for student_id in student_ids])
+        await cursor.execute(COLLEGE_ID_DELETE_SQL, (college_id_number,))
+        if cursor.rowcount:
+            await cursor.execute(*log_changes("college_ids", DELETE, [college_id_number]))
+        await conn.commit()
+        await conn.run(promote_offerings, offerings)
+        for student_id in student_ids:
+            student_search.remove(student_id)
+        await reference_cache.invalidate("college_id_counts")
         return {"message": "College ID deleted successfully"}
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
\ No newline at end of file
@@ -1,49 +1,83 @@
-from fastapi import APIRouter, HTTPException
-from models import CourseCreate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from models import CourseCreate, CourseOut, ColumnarPage, BatchGet
+from database import get_async_db, async_connection, AsyncConnection
+from listing import fetch_page, select_columns, stream_ndjson, page_size
+from loaders import Loaders, get_loaders, register_loader, batch_get
+from responses import shape_rows
+from cache import cached_page, reference_cache
+from gpa import refresh_summaries
+from changes import log_changes, UPSERT, DELETE
 from mysql.connector import Error
+from typing import Optional, List, Union
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
-@router.get("")
-async def get_courses():
-    """Get all courses"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT * FROM COURSE")
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        close_db_connection(conn)
+COURSE_COLUMNS = ("Course_ID", "Course_Name", "Credits", "Dept_ID", "Capacity")
+
+register_loader("courses", f"SELECT {', '.join(COURSE_COLUMNS)} FROM COURSE WHERE Course_ID IN ({{keys}})", "Course_ID")
+
+# Student semesters whose GPA summaries change when the course goes
+COURSE_GRADED_SQL = "SELECT DISTINCT Student_ID, Semester_No FROM GRADE WHERE Course_ID = %s"
+COURSE_DELETE_SQL = "DELETE FROM COURSE WHERE Course_ID = %s"
+
+@router.get("", response_model=Union[List[CourseOut], ColumnarPage])
+async def get_courses(request: Request,
+                      after: Optional[str] = None,
+                      limit: Optional[int] = Query(None, ge=1),
+                      fields: Optional[str] = None,
+                      dept_id: Optional[str] = None,
+                      format: str = Query("json", pattern="^(json|ndjson|columnar)$")):
+    """Get courses a page at a time, optionally filtered by department (served from the reference cache)"""
+    where = [("Dept_ID = %s", dept_id)] if dept_id else []
+    if format == "ndjson":
+        return stream_ndjson("COURSE", "Course_ID", COURSE_COLUMNS, fields, where, after, limit)
+
+    async def load():
+        async with async_connection() as conn:
+            rows, next_cursor = await fetch_page(conn, "COURSE", "Course_ID", COURSE_COLUMNS,
+                                                 fields, where, after, limit)
+        return shape_rows(rows, format, select_columns(fields, COURSE_COLUMNS, "Course_ID")), next_cursor
+
+    key = (after, page_size(limit), tuple(select_columns(fields, COURSE_COLUMNS, "Course_ID")), dept_id, format)
+    return await cached_page(request, "courses", key, load)
+
+@router.post("/batch-get")
+async def batch_get_courses(body: BatchGet, loaders: Loaders = Depends(get_loaders)):
+    """Courses for a list of IDs with one query, plus the IDs that don't exist"""
+    return await batch_get(loaders, "courses", body.keys)
 
 @router.post("")
-async def create_course(course: CourseCreate):
+async def create_course(course: CourseCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Create a new course"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO COURSE (Course_ID, Course_Name, Credits, Dept_ID)
-            VALUES (%s, %s, %s, %s)
-        """, (course.course_id, course.course_name, course.credits, course.dept_id))
-        conn.commit()
+        await cursor.execute("""
+            INSERT INTO COURSE (Course_ID, Course_Name, Credits, Dept_ID, Capacity)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (course.course_id, course.course_name, course.credits, course.dept_id, course.capacity))
+        await cursor.execute(*log_changes("courses", UPSERT, [course.course_id]))
+        await conn.commit()
+        await reference_cache.invalidate("courses")
         return {"message": "Course created successfully"}
     except Error as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
 @router.delete("/{course_id}")
-async def delete_course(course_id: str):
+async def delete_course(course_id: str, conn: AsyncConnection = Depends(get_async_db)):
     """Delete a course"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM COURSE WHERE Course_ID = %s", (course_id,))
-        conn.commit()
+        # Grades cascade away with the course, so their GPA summaries must be redone
+        await cursor.execute(COURSE_GRADED_SQL, (course_id,))
+        affected = await cursor.fetchall()
+        await cursor.execute(COURSE_DELETE_SQL, (course_id,))
+        if cursor.rowcount:
+            await cursor.execute(*log_changes("courses", DELETE, [course_id]))
+        await conn.run(refresh_summaries, affected)
+        await conn.commit()
+        await reference_cache.invalidate("courses")
         return {"message": "Course deleted successfully"}
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
\ No newline at end of file
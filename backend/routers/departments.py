@@ -1,49 +1,72 @@
-from fastapi import APIRouter, HTTPException
-from models import DepartmentCreate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from models import DepartmentCreate, DepartmentOut, ColumnarPage
+from database import get_async_db, async_connection, AsyncConnection
+from listing import fetch_page, select_columns, stream_ndjson, page_size
+from responses import shape_rows
+from cache import cached_page, reference_cache
+from changes import log_changes, log_matching, UPSERT, DELETE
 from mysql.connector import Error
+from typing import Optional, List, Union
 
 router = APIRouter(prefix="/departments", tags=["Departments"])
 
-@router.get("")
-async def get_departments():
-    """Get all departments"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT * FROM DEPARTMENT")
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        close_db_connection(conn)
+DEPARTMENT_COLUMNS = ("Dept_ID", "Dept_Name", "HOD_Name")
+
+DEPARTMENT_COURSES = "COURSE WHERE Dept_ID = %s"
+DEPARTMENT_STUDENTS = "STUDENT WHERE Dept_ID = %s"
+DEPARTMENT_DELETE_SQL = "DELETE FROM DEPARTMENT WHERE Dept_ID = %s"
+
+@router.get("", response_model=Union[List[DepartmentOut], ColumnarPage])
+async def get_departments(request: Request,
+                          after: Optional[str] = None,
+                          limit: Optional[int] = Query(None, ge=1),
+                          fields: Optional[str] = None,
+                          format: str = Query("json", pattern="^(json|ndjson|columnar)$")):
+    """Get departments a page at a time (served from the reference cache)"""
+    if format == "ndjson":
+        return stream_ndjson("DEPARTMENT", "Dept_ID", DEPARTMENT_COLUMNS, fields, (), after, limit)
+
+    async def load():
+        async with async_connection() as conn:
+            rows, next_cursor = await fetch_page(conn, "DEPARTMENT", "Dept_ID", DEPARTMENT_COLUMNS,
+                                                 fields, (), after, limit)
+        return shape_rows(rows, format, select_columns(fields, DEPARTMENT_COLUMNS, "Dept_ID")), next_cursor
+
+    key = (after, page_size(limit), tuple(select_columns(fields, DEPARTMENT_COLUMNS, "Dept_ID")), format)
+    return await cached_page(request, "departments", key, load)
 
 @router.post("")
-async def create_department(dept: DepartmentCreate):
+async def create_department(dept: DepartmentCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Create a new department"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO DEPARTMENT (Dept_ID, Dept_Name, HOD_Name)
             VALUES (%s, %s, %s)
         """, (dept.dept_id, dept.dept_name, dept.hod_name))
-        conn.commit()
+        await cursor.execute(*log_changes("departments", UPSERT, [dept.dept_id]))
+        await conn.commit()
+        await reference_cache.invalidate("departments")
         return {"message": "Department created successfully"}
     except Error as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
 @router.delete("/{dept_id}")
-async def delete_department(dept_id: str):
+async def delete_department(dept_id: str, conn: AsyncConnection = Depends(get_async_db)):
     """Delete a department"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM DEPARTMENT WHERE Dept_ID = %s", (dept_id,))
-        conn.commit()
+        # Its courses and students lose their Dept_ID (ON DELETE SET NULL), so they change too
+        await cursor.execute(*log_matching("courses", UPSERT, "Course_ID", DEPARTMENT_COURSES, (dept_id,)))
+        await cursor.execute(*log_matching("students", UPSERT, "Student_ID", DEPARTMENT_STUDENTS, (dept_id,)))
+        await cursor.execute(DEPARTMENT_DELETE_SQL, (dept_id,))
+        if cursor.rowcount:
+            await cursor.execute(*log_changes("departments", DELETE, [dept_id]))
+        await conn.commit()
+        # Courses of the department have their Dept_ID set to NULL
+        await reference_cache.invalidate("departments", "courses")
         return {"message": "Department deleted successfully"}
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
\ No newline at end of file
@@ -1,58 +1,141 @@
-from fastapi import APIRouter, HTTPException
-from models import EnrollmentCreate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query
+from models import EnrollmentCreate, EnrollmentOut, ColumnarPage, SeatCapacity, BatchGet
+from database import get_async_db, get_async_read_db, AsyncConnection
+from responses import rows_response
+from loaders import Loaders, get_loaders, register_loader, batch_get
+from registration import register, drop, set_capacity, RegistrationError, WAITLISTED, FULL
 from mysql.connector import Error
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/enrollments", tags=["Enrollments"])
 
-@router.get("/{student_id}")
-async def get_student_enrollments(student_id: str):
+register_loader("enrollments", """
+    SELECT e.*, c.Course_Name, c.Credits
+    FROM ENROLLMENT e
+    JOIN COURSE c ON e.Course_ID = c.Course_ID
+    WHERE e.Student_ID IN ({keys})
+""", "Student_ID", many=True)
+
+ENROLLMENTS_SQL = """
+    SELECT e.*, c.Course_Name, c.Credits
+    FROM ENROLLMENT e
+    JOIN COURSE c ON e.Course_ID = c.Course_ID
+    WHERE e.Student_ID = %s
+"""
+STUDENT_WAITLIST_SQL = """
+    SELECT w.Course_ID, c.Course_Name, w.Semester_No, w.Academic_Year, w.Requested_At,
+           (SELECT COUNT(*) FROM WAITLIST ahead
+            WHERE ahead.Course_ID = w.Course_ID AND ahead.Semester_No = w.Semester_No
+              AND ahead.Academic_Year = w.Academic_Year
+              AND ahead.Waitlist_ID <= w.Waitlist_ID) AS Position
+    FROM WAITLIST w
+    JOIN COURSE c ON c.Course_ID = w.Course_ID
+    WHERE w.Student_ID = %s
+    ORDER BY w.Requested_At
+"""
+LEAVE_WAITLIST_SQL = "DELETE FROM WAITLIST WHERE Student_ID = %s AND Course_ID = %s"
+
+def seats_query(course_id, academic_year=None):
+    """``(sql, params)`` for the offerings of a course with their seat and waitlist counts"""
+    where, params = "s.Course_ID = %s", [course_id]
+    if academic_year:
+        where += " AND s.Academic_Year = %s"
+        params.append(academic_year)
+    return f"""
+        SELECT s.Course_ID, s.Semester_No, s.Academic_Year, s.Capacity, s.Enrolled,
+               GREATEST(s.Capacity - s.Enrolled, 0) AS Available,
+               (SELECT COUNT(*) FROM WAITLIST w
+                WHERE w.Course_ID = s.Course_ID AND w.Semester_No = s.Semester_No
+                  AND w.Academic_Year = s.Academic_Year) AS Waitlisted
+        FROM COURSE_SEATS s
+        WHERE {where}
+        ORDER BY s.Academic_Year, s.Semester_No
+    """, params
+
+@router.post("/batch-get")
+async def batch_get_enrollments(body: BatchGet, loaders: Loaders = Depends(get_loaders)):
+    """Enrollments of several students with one query, keyed by student ID"""
+    return await batch_get(loaders, "enrollments", body.keys)
+
+@router.get("/{student_id}", response_model=Union[List[EnrollmentOut], ColumnarPage])
+async def get_student_enrollments(student_id: str,
+                                  format: str = Query("json", pattern="^(json|columnar)$"),
+                                  conn: AsyncConnection = Depends(get_async_read_db)):
     """Get all enrollments for a specific student"""
-    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            SELECT e.*, c.Course_Name, c.Credits
-            FROM ENROLLMENT e
-            JOIN COURSE c ON e.Course_ID = c.Course_ID
-            WHERE e.Student_ID = %s
-        """, (student_id,))
-        return cursor.fetchall()
+        await cursor.execute(ENROLLMENTS_SQL, (student_id,))
+        return rows_response(await cursor.fetchall(), format, cursor.column_names)
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
-@router.post("")
-async def create_enrollment(enrollment: EnrollmentCreate):
-    """Create a new enrollment"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@router.get("/seats/{course_id}")
+async def get_course_seats(course_id: str,
+                           academic_year: Optional[str] = None,
+                           conn: AsyncConnection = Depends(get_async_read_db)):
+    """Capacity, enrolled count, free seats and waitlist length of each offering of a course"""
+    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            INSERT INTO ENROLLMENT (Student_ID, Course_ID, Semester_No, Enrollment_Date, Academic_Year)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (enrollment.student_id, enrollment.course_id, enrollment.semester_no,
-              enrollment.enrollment_date, enrollment.academic_year))
-        conn.commit()
-        return {"message": "Enrollment created successfully"}
-    except Error as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        await cursor.execute(*seats_query(course_id, academic_year))
+        return rows_response(await cursor.fetchall())
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
-@router.delete("/{student_id}/{course_id}")
-async def delete_enrollment(student_id: str, course_id: str):
-    """Delete an enrollment"""
-    conn = get_db_connection()
+@router.put("/seats/{course_id}")
+async def update_course_seats(course_id: str, seats: SeatCapacity, conn: AsyncConnection = Depends(get_async_db)):
+    """Set the capacity of one offering; seats added this way go to waitlisted students"""
+    if seats.capacity is not None and seats.capacity < 0:
+        raise HTTPException(status_code=400, detail="Capacity cannot be negative")
+    promoted = await conn.run(set_capacity, course_id, seats.semester_no, seats.academic_year, seats.capacity)
+    if promoted is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return {"message": "Capacity updated successfully", "promoted": promoted}
+
+@router.get("/waitlist/{student_id}")
+async def get_student_waitlist(student_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
+    """Offerings a student is waiting for, with their place in each queue"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(STUDENT_WAITLIST_SQL, (student_id,))
+        return rows_response(await cursor.fetchall())
+    finally:
+        await cursor.close()
+
+@router.delete("/waitlist/{student_id}/{course_id}")
+async def leave_waitlist(student_id: str, course_id: str, conn: AsyncConnection = Depends(get_async_db)):
+    """Take a student off a course's waitlist"""
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            DELETE FROM ENROLLMENT 
-            WHERE Student_ID = %s AND Course_ID = %s
-        """, (student_id, course_id))
-        conn.commit()
-        return {"message": "Enrollment deleted successfully"}
+        await cursor.execute(LEAVE_WAITLIST_SQL, (student_id, course_id))
+        await conn.commit()
+        if not cursor.rowcount:
+            raise HTTPException(status_code=404, detail="Student is not waitlisted for this course")
+        return {"message": "Removed from the waitlist"}
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
+
+@router.post("")
+async def create_enrollment(enrollment: EnrollmentCreate, conn: AsyncConnection = Depends(get_async_db)):
+    """Enroll a student if the offering has a free seat, otherwise put them on its waitlist.
+
+    Seats are taken atomically, so concurrent registrations never exceed the
+    capacity. With ``waitlist: false`` a full offering is answered with 409.
+    """
+    try:
+        result = await conn.run(register, enrollment.student_id, enrollment.course_id, enrollment.semester_no,
+                                enrollment.academic_year, enrollment.enrollment_date, enrollment.waitlist)
+    except RegistrationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Error as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["status"] == FULL:
+        raise HTTPException(status_code=409, detail="Course is full")
+    if result["status"] == WAITLISTED:
+        return {"message": f"Course is full; added to the waitlist at position {result['position']}", **result}
+    return {"message": "Enrollment created successfully", **result}
+
+@router.delete("/{student_id}/{course_id}")
+async def delete_enrollment(student_id: str, course_id: str, conn: AsyncConnection = Depends(get_async_db)):
+    """Delete an enrollment; the freed seat goes to the first student on the waitlist"""
+    await conn.run(drop, student_id, course_id)
+    return {"message": "Enrollment deleted successfully"}
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from exporter import COLUMNS, export_batches, csv_chunks, gzip_chunks, parquet_chunks, parquet_available
+from jobs import job_runner, job_handler, job_file, accepted
+from typing import Optional
+import re
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+def _encode(kind, batches, format, compress):
+    """``(chunks, media_type, extension)`` for row batches in the requested format"""
+    if format == "parquet":
+        return parquet_chunks(batches, COLUMNS[kind]), "application/vnd.apache.parquet", ".parquet"
+    if compress:
+        return gzip_chunks(csv_chunks(batches, list(COLUMNS[kind]))), "application/gzip", ".csv.gz"
+    return csv_chunks(batches, list(COLUMNS[kind])), "text/csv", ".csv"
+
+def _filename(kind, filters):
+    return "_".join([kind] + [re.sub(r"[^\w-]", "_", str(value))
+                              for value in filters.values() if value is not None])
+
+@job_handler("exports")
+async def run_export(job, kind, format, compress, filters):
+    """Write an export to a file that GET /jobs/{id}/download serves"""
+    rows = 0
+
+    async def counted(batches):
+        nonlocal rows
+        async for batch in batches:
+            rows += len(batch)
+            job.progress(rows)
+            yield batch
+
+    chunks, media_type, extension = _encode(kind, counted(export_batches(kind, **filters)), format, compress)
+    filename = _filename(kind, filters) + extension
+    path = await run_in_threadpool(job_file, f"{job.job_id}{extension}")
+    size = 0
+    # Exports can run to hundreds of MB; file I/O on the event loop would stall every request
+    f = await run_in_threadpool(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            await run_in_threadpool(f.write, chunk)
+            size += len(chunk)
+    finally:
+        await run_in_threadpool(f.close)
+    return {"rows": rows, "bytes": size, "file": path, "filename": filename, "media_type": media_type,
+            "download_url": f"/jobs/{job.job_id}/download"}
+
+@router.get("/{kind}")
+async def export_rows(kind: str,
+                      academic_year: Optional[str] = None,
+                      dept_id: Optional[str] = None,
+                      semester_no: Optional[int] = None,
+                      format: str = Query("csv", pattern="^(csv|parquet)$"),
+                      compress: bool = True,
+                      background: bool = False):
+    """Stream every grade or enrollment row, joined with student and course, as CSV or Parquet.
+
+    CSV is gzip-compressed unless ``compress=false``; Parquet files are
+    always compressed internally. With ``background=true`` the file is built
+    by a job instead and downloaded from the job once it has finished.
+    """
+    if kind not in COLUMNS:
+        raise HTTPException(status_code=404, detail="Unknown export; use 'grades' or 'enrollments'")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs the 'pyarrow' package")
+
+    filters = {"academic_year": academic_year, "dept_id": dept_id, "semester_no": semester_no}
+    if background:
+        return accepted(await job_runner.submit("exports", {"kind": kind, "format": format,
+                                                            "compress": compress, "filters": filters}))
+    chunks, media_type, extension = _encode(kind, export_batches(kind, **filters), format, compress)
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{_filename(kind, filters)}{extension}"'})
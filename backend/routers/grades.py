@@ -1,61 +1,341 @@
-from fastapi import APIRouter, HTTPException
-from models import GradeCreate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query
+from models import GradeCreate, GradeBulkUpsert, GradeOut, ColumnarPage, BatchGet
+from database import get_async_db, get_async_read_db, async_connection, AsyncConnection
 from mysql.connector import Error
+from grading import letter_for
+from gpa import refresh_summaries, rebuild_summaries
+from listing import keyset_predicate, page_size
+from analytics import grade_statistics
+from responses import rows_response
+from loaders import Loaders, get_loaders, register_loader, batch_get
+from jobs import job_runner, job_handler, accepted
+import json
+from typing import Optional, List, Union
 
 router = APIRouter(prefix="/grades", tags=["Grades"])
 
-@router.get("/{student_id}")
-async def get_student_grades(student_id: str):
+register_loader("grades", """
+    SELECT g.*, c.Course_Name, c.Credits
+    FROM GRADE g
+    JOIN COURSE c ON g.Course_ID = c.Course_ID
+    WHERE g.Student_ID IN ({keys})
+""", "Student_ID", many=True)
+
+GRADE_LIST_SELECT = """
+    SELECT g.*, s.First_Name, s.Last_Name, c.Course_Name, c.Credits
+    FROM GRADE g
+    JOIN STUDENT s ON g.Student_ID = s.Student_ID
+    JOIN COURSE c ON g.Course_ID = c.Course_ID
+"""
+GRADE_KEY = ("g.Student_ID", "g.Course_ID", "g.Semester_No")
+STUDENT_GRADES_SQL = """
+    SELECT g.*, c.Course_Name, c.Credits
+    FROM GRADE g
+    JOIN COURSE c ON g.Course_ID = c.Course_ID
+    WHERE g.Student_ID = %s
+"""
+SEMESTER_SUMMARY_SQL = """
+    SELECT Semester_No, Credits_Attempted, Credits_Earned, Grade_Points, SGPA
+    FROM STUDENT_SEMESTER_SUMMARY
+    WHERE Student_ID = %s
+    ORDER BY Semester_No
+"""
+GPA_SUMMARY_SQL = """
+    SELECT Credits_Attempted, Credits_Earned, Grade_Points, CGPA, Updated_At
+    FROM STUDENT_GPA_SUMMARY
+    WHERE Student_ID = %s
+"""
+STUDENT_COUNT_SQL = "SELECT COUNT(*) FROM STUDENT"
+COURSE_EXISTS_SQL = "SELECT Course_ID FROM COURSE WHERE Course_ID = %s"
+# {marks} is one placeholder per student of the upload
+KNOWN_STUDENTS_SQL = "SELECT Student_ID FROM STUDENT WHERE Student_ID IN ({marks})"
+GRADED_STUDENTS_SQL = """
+    SELECT Student_ID FROM GRADE
+    WHERE Course_ID = %s AND Semester_No = %s AND Student_ID IN ({marks})
+"""
+GRADE_UPDATE_SQL = """
+    UPDATE GRADE
+    SET Marks = %s, Grade_Letter = %s
+    WHERE Student_ID = %s AND Course_ID = %s AND Semester_No = %s
+"""
+
+def rankings_query(dept_id=None, semester_no=None, limit=100):
+    """``(sql, params)`` ranking students by CGPA, or by SGPA in one semester"""
+    where, params = [], []
+    if dept_id:
+        where.append("s.Dept_ID = %s")
+        params.append(dept_id)
+    if semester_no is not None:
+        table, score = "STUDENT_SEMESTER_SUMMARY", "SGPA"
+        where.append("t.Semester_No = %s")
+        params.append(semester_no)
+    else:
+        table, score = "STUDENT_GPA_SUMMARY", "CGPA"
+    return f"""
+        SELECT RANK() OVER (ORDER BY t.{score} DESC) AS `Rank`,
+               s.Student_ID, s.First_Name, s.Last_Name, s.Dept_ID,
+               t.Credits_Attempted, t.Credits_Earned, t.{score}
+        FROM {table} t
+        JOIN STUDENT s ON s.Student_ID = t.Student_ID
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY t.{score} DESC, s.Student_ID
+        LIMIT %s
+    """, params + [limit]
+
+def analytics_query(group_by="course", course_id=None, dept_id=None, semester_no=None):
+    """``(sql, params)`` for (group key, marks, grade letter) of every marked grade selected"""
+    where, params = ["g.Marks IS NOT NULL"], []
+    if course_id:
+        where.append("g.Course_ID = %s")
+        params.append(course_id)
+    if dept_id:
+        where.append("c.Dept_ID = %s")
+        params.append(dept_id)
+    if semester_no is not None:
+        where.append("g.Semester_No = %s")
+        params.append(semester_no)
+    key = "g.Course_ID" if group_by == "course" else "c.Dept_ID"
+    return f"""
+        SELECT {key}, CAST(g.Marks AS DOUBLE), COALESCE(g.Grade_Letter, '')
+        FROM GRADE g
+        JOIN COURSE c ON g.Course_ID = c.Course_ID
+        WHERE {" AND ".join(where)}
+    """, params
+
+def course_grades_query(course_id, semester_no=None):
+    """``(sql, params)`` for the grades recorded for a course"""
+    where, params = "g.Course_ID = %s", [course_id]
+    if semester_no is not None:
+        where += " AND g.Semester_No = %s"
+        params.append(semester_no)
+    return f"{GRADE_LIST_SELECT} WHERE {where} ORDER BY g.Semester_No, g.Student_ID", params
+
+def grade_page_query(course_id=None, semester_no=None, after=None, limit=None):
+    """``(sql, params)`` for the page of grades after key ``after`` in primary-key order"""
+    where, params = [], []
+    if course_id:
+        where.append("g.Course_ID = %s")
+        params.append(course_id)
+    if semester_no is not None:
+        where.append("g.Semester_No = %s")
+        params.append(semester_no)
+    if after:
+        clause, clause_params = keyset_predicate(GRADE_KEY, after)
+        where.append(clause)
+        params.extend(clause_params)
+    return f"""
+        {GRADE_LIST_SELECT}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY g.Student_ID, g.Course_ID, g.Semester_No
+        LIMIT %s
+    """, params + [page_size(limit)]
+
+@router.get("/rankings")
+async def get_rankings(dept_id: Optional[str] = None,
+                       semester_no: Optional[int] = None,
+                       limit: int = Query(100, ge=1, le=1000),
+                       conn: AsyncConnection = Depends(get_async_read_db)):
+    """Rank students by CGPA (or by SGPA for one semester) from the precomputed summaries"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(*rankings_query(dept_id, semester_no, limit))
+        return await cursor.fetchall()
+    finally:
+        await cursor.close()
+
+@router.get("/analytics")
+async def get_grade_analytics(group_by: str = Query("course", pattern="^(course|department)$"),
+                              course_id: Optional[str] = None,
+                              dept_id: Optional[str] = None,
+                              semester_no: Optional[int] = None,
+                              conn: AsyncConnection = Depends(get_async_read_db)):
+    """Mark statistics, grade-letter histograms and pass rates per course or department"""
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(*analytics_query(group_by, course_id, dept_id, semester_no))
+        rows = await cursor.fetchall()
+    finally:
+        await cursor.close()
+    # Transpose the tuples into columns once and hand them to NumPy
+    keys, marks, letters = zip(*rows) if rows else ((), (), ())
+    groups = grade_statistics(keys, marks, letters)
+    overall = grade_statistics(["all"] * len(marks), marks, letters)
+    return {
+        "group_by": group_by,
+        "overall": overall[0] if overall else None,
+        "groups": groups,
+    }
+
+@router.get("/course/{course_id}", response_model=Union[List[GradeOut], ColumnarPage])
+async def get_course_grades(course_id: str, semester_no: Optional[int] = None,
+                            format: str = Query("json", pattern="^(json|columnar)$"),
+                            conn: AsyncConnection = Depends(get_async_read_db)):
+    """Get all grades recorded for a course"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(*course_grades_query(course_id, semester_no))
+        return rows_response(await cursor.fetchall(), format, cursor.column_names)
+    finally:
+        await cursor.close()
+
+@router.get("", response_model=Union[List[GradeOut], ColumnarPage])
+async def get_grades(after: Optional[str] = None,
+                     limit: Optional[int] = Query(None, ge=1),
+                     course_id: Optional[str] = None,
+                     semester_no: Optional[int] = None,
+                     format: str = Query("json", pattern="^(json|columnar)$"),
+                     conn: AsyncConnection = Depends(get_async_read_db)):
+    """Get grades a page at a time in primary-key order.
+
+    The cursor in ``X-Next-Cursor``/``after=`` is the JSON-encoded
+    ``[student_id, course_id, semester_no]`` of the last row returned.
+    """
+    values = None
+    if after:
+        try:
+            values = json.loads(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # [student_id, course_id, semester_no]; True and False are ints to isinstance()
+        if not (isinstance(values, list) and len(values) == 3
+                and isinstance(values[0], str) and isinstance(values[1], str)
+                and isinstance(values[2], int) and not isinstance(values[2], bool)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = page_size(limit)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(*grade_page_query(course_id, semester_no, values, limit))
+        rows = await cursor.fetchall()
+        columns = cursor.column_names
+    finally:
+        await cursor.close()
+    headers = None
+    if len(rows) == limit:
+        last = rows[-1]
+        headers = {"X-Next-Cursor": json.dumps([last["Student_ID"], last["Course_ID"], last["Semester_No"]])}
+    return rows_response(rows, format, columns, headers)
+
+@router.get("/{student_id}/summary")
+async def get_student_summary(student_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
+    """Precomputed credits, SGPA per semester and CGPA for a student"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(SEMESTER_SUMMARY_SQL, (student_id,))
+        semesters = await cursor.fetchall()
+        await cursor.execute(GPA_SUMMARY_SQL, (student_id,))
+        overall = await cursor.fetchone()
+        return {"student_id": student_id, "semesters": semesters, "overall": overall}
+    finally:
+        await cursor.close()
+
+@router.post("/batch-get")
+async def batch_get_grades(body: BatchGet, loaders: Loaders = Depends(get_loaders)):
+    """Grades of several students with one query, keyed by student ID"""
+    return await batch_get(loaders, "grades", body.keys)
+
+@router.get("/{student_id}", response_model=Union[List[GradeOut], ColumnarPage])
+async def get_student_grades(student_id: str,
+                             format: str = Query("json", pattern="^(json|columnar)$"),
+                             conn: AsyncConnection = Depends(get_async_read_db)):
     """Get all grades for a specific student"""
-    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            SELECT g.*, c.Course_Name, c.Credits
-            FROM GRADE g
-            JOIN COURSE c ON g.Course_ID = c.Course_ID
-            WHERE g.Student_ID = %s
-        """, (student_id,))
-        return cursor.fetchall()
+        await cursor.execute(STUDENT_GRADES_SQL, (student_id,))
+        return rows_response(await cursor.fetchall(), format, cursor.column_names)
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
 
 @router.post("")
-async def create_grade(grade: GradeCreate):
+async def create_grade(grade: GradeCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Create a new grade record"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO GRADE (Student_ID, Course_ID, Semester_No, Marks, Grade_Letter)
             VALUES (%s, %s, %s, %s, %s)
         """, (grade.student_id, grade.course_id, grade.semester_no, 
               grade.marks, grade.grade_letter))
-        conn.commit()
+        await conn.run(refresh_summaries, [(grade.student_id, grade.semester_no)])
+        await conn.commit()
         return {"message": "Grade created successfully"}
     except Error as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
+
+@job_handler("gpa.rebuild")
+async def run_summary_rebuild(job):
+    async with async_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            await cursor.execute(STUDENT_COUNT_SQL)
+            job.progress(0, (await cursor.fetchone())[0])
+        finally:
+            await cursor.close()
+        return {"students": await conn.run(rebuild_summaries, progress=job.progress)}
+
+@router.post("/summaries/rebuild", status_code=202)
+async def rebuild_grade_summaries():
+    """Recompute every student's SGPA/CGPA summaries from GRADE in a background job"""
+    return accepted(await job_runner.submit("gpa.rebuild", {}))
+
+@router.post("/bulk")
+async def upsert_grades_bulk(upsert: GradeBulkUpsert, conn: AsyncConnection = Depends(get_async_db)):
+    """Insert or update the grades of a whole course section in one transaction"""
+    if not upsert.entries:
+        raise HTTPException(status_code=400, detail="No grade entries supplied")
+    student_ids = [entry.student_id for entry in upsert.entries]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=400, detail="Each student may appear only once")
+    marks = ", ".join(["%s"] * len(student_ids))
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(COURSE_EXISTS_SQL, (upsert.course_id,))
+        if not await cursor.fetchall():
+            raise HTTPException(status_code=404, detail="Course not found")
+        await cursor.execute(KNOWN_STUDENTS_SQL.format(marks=marks), student_ids)
+        known = {row[0] for row in await cursor.fetchall()}
+        unknown = [student_id for student_id in student_ids if student_id not in known]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown students: {', '.join(unknown)}")
+        await cursor.execute(GRADED_STUDENTS_SQL.format(marks=marks),
+                             [upsert.course_id, upsert.semester_no] + student_ids)
+        existing = len(await cursor.fetchall())
+
+        rows = []
+        for entry in upsert.entries:
+            letter = entry.grade_letter
+            if upsert.derive_grade_letters or not letter:
+                letter = letter_for(entry.marks)
+            rows.append((entry.student_id, upsert.course_id, upsert.semester_no, entry.marks, letter))
+        await cursor.executemany("""
+            INSERT INTO GRADE (Student_ID, Course_ID, Semester_No, Marks, Grade_Letter)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE Marks = VALUES(Marks), Grade_Letter = VALUES(Grade_Letter)
+        """, rows)
+        await conn.run(refresh_summaries, [(student_id, upsert.semester_no) for student_id in student_ids])
+        await conn.commit()
+        return {
+            "message": "Grades saved successfully",
+            "inserted": len(rows) - existing,
+            "updated": existing,
+        }
+    except Error as e:
+        await conn.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await cursor.close()
 
 @router.put("/{student_id}/{course_id}/{semester_no}")
-async def update_grade(student_id: str, course_id: str, semester_no: int, grade: GradeCreate):
+async def update_grade(student_id: str, course_id: str, semester_no: int, grade: GradeCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Update a grade record"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            UPDATE GRADE 
-            SET Marks = %s, Grade_Letter = %s
-            WHERE Student_ID = %s AND Course_ID = %s AND Semester_No = %s
-        """, (grade.marks, grade.grade_letter, student_id, course_id, semester_no))
-        conn.commit()
+        await cursor.execute(GRADE_UPDATE_SQL, (grade.marks, grade.grade_letter, student_id, course_id, semester_no))
+        await conn.run(refresh_summaries, [(student_id, semester_no)])
+        await conn.commit()
         return {"message": "Grade updated successfully"}
     except Error as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
\ No newline at end of file
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import FileResponse
+from database import get_async_read_db, AsyncConnection
+from typing import Optional
+import json
+import os
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+JOB_COLUMNS = ("Job_ID, Job_Type, Status, Params, Progress, Total, Result, Error, Worker, "
+               "Created_At, Started_At, Finished_At")
+JOB_SQL = f"SELECT {JOB_COLUMNS} FROM JOB WHERE Job_ID = %s"
+
+def jobs_query(status=None, job_type=None, limit=50):
+    """``(sql, params)`` for the most recent jobs, optionally of one status and type"""
+    where, params = [], []
+    if status:
+        where.append("Status = %s")
+        params.append(status)
+    if job_type:
+        where.append("Job_Type = %s")
+        params.append(job_type)
+    return f"""
+        SELECT {JOB_COLUMNS} FROM JOB
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY Created_At DESC LIMIT %s
+    """, params + [limit]
+
+def _describe(row):
+    return {
+        "job_id": row["Job_ID"],
+        "type": row["Job_Type"],
+        "status": row["Status"],
+        "progress": row["Progress"],
+        "total": row["Total"],
+        "percent": round(100 * row["Progress"] / row["Total"], 1) if row["Total"] else None,
+        "params": json.loads(row["Params"]) if row["Params"] else None,
+        "result": json.loads(row["Result"]) if row["Result"] else None,
+        "error": row["Error"],
+        "worker": row["Worker"],
+        "created_at": row["Created_At"],
+        "started_at": row["Started_At"],
+        "finished_at": row["Finished_At"],
+    }
+
+async def _fetch_job(conn, job_id):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(JOB_SQL, (job_id,))
+        row = await cursor.fetchone()
+    finally:
+        await cursor.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return row
+
+@router.get("")
+async def get_jobs(status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$"),
+                   type: Optional[str] = None,
+                   limit: int = Query(50, ge=1, le=500),
+                   conn: AsyncConnection = Depends(get_async_read_db)):
+    """Most recent jobs first, optionally filtered by status and type"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(*jobs_query(status, type, limit))
+        return [_describe(row) for row in await cursor.fetchall()]
+    finally:
+        await cursor.close()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
+    """Status, progress, counts and errors of a job"""
+    return _describe(await _fetch_job(conn, job_id))
+
+@router.get("/{job_id}/download")
+async def download_job_result(job_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
+    """The file a finished job produced (e.g. a background export)"""
+    job = _describe(await _fetch_job(conn, job_id))
+    result = job["result"] or {}
+    if job["status"] != "succeeded" or "file" not in result:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']} and has no file to download")
+    if not os.path.exists(result["file"]):
+        raise HTTPException(status_code=410, detail="The job's file has been removed")
+    return FileResponse(result["file"], media_type=result.get("media_type"), filename=result.get("filename"))
@@ -0,0 +1,140 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from database import get_async_db, get_async_read_db, AsyncConnection
+from photo_store import (ingest, ingest_stream, blob_path, photo_url, iter_file, PhotoTooLarge, NotAnImage,
+                         CONTENT_TYPES)
+from config import settings
+from mysql.connector import Error
+import os
+import re
+
+router = APIRouter(tags=["Photos"])
+
+BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.(\w+)$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Room for the boundaries and part headers around the file in a multipart upload
+MULTIPART_OVERHEAD = 16 * 1024
+
+STUDENT_EXISTS_SQL = "SELECT Student_ID FROM STUDENT WHERE Student_ID = %s"
+PHOTO_SQL = "SELECT Content_Hash, Thumbnail_Hash, Content_Type FROM PHOTO WHERE Student_ID = %s"
+
+async def _ingest_upload(request):
+    """Store the photo in a request body: the raw image, or a multipart form with a ``file`` field"""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.PHOTO_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise PhotoTooLarge(f"Photo exceeds {settings.PHOTO_MAX_BYTES} bytes")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return await ingest_stream(request.stream())
+    # The form parser spools the whole body before we see it, so only bodies
+    # whose size is known up front are accepted in this form
+    if not length:
+        raise HTTPException(status_code=411, detail="Multipart photo uploads need a Content-Length")
+    form = await request.form()
+    try:
+        file = form.get("file")
+        if file is None or isinstance(file, str):
+            raise HTTPException(status_code=400, detail="Missing file field")
+        return await run_in_threadpool(ingest, file.file)
+    finally:
+        await form.close()
+
+@router.post("/students/{student_id}/photo")
+async def upload_photo(student_id: str, request: Request, conn: AsyncConnection = Depends(get_async_db)):
+    """Upload a student photo into the content-addressed store.
+
+    Send the image itself as the body (streamed into the store and cut off
+    at PHOTO_MAX_BYTES) or, for older clients, a multipart form with a
+    ``file`` field.
+    """
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(STUDENT_EXISTS_SQL, (student_id,))
+        if not await cursor.fetchall():
+            raise HTTPException(status_code=404, detail="Student not found")
+        try:
+            digest, size, content_type, thumbnail = await _ingest_upload(request)
+        except PhotoTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except NotAnImage as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        await cursor.execute("""
+            INSERT INTO PHOTO (Student_ID, Content_Hash, Thumbnail_Hash, Content_Type, Size_Bytes)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                Photo = NULL,
+                Content_Hash = VALUES(Content_Hash),
+                Thumbnail_Hash = VALUES(Thumbnail_Hash),
+                Content_Type = VALUES(Content_Type),
+                Size_Bytes = VALUES(Size_Bytes),
+                Uploaded_At = CURRENT_TIMESTAMP
+        """, (student_id, digest, thumbnail, content_type, size))
+        await conn.commit()
+        return {
+            "message": "Photo uploaded successfully",
+            "photo_url": photo_url(digest, content_type),
+            "thumbnail_url": photo_url(thumbnail, "image/jpeg"),
+        }
+    except Error as e:
+        await conn.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await cursor.close()
+
+@router.get("/students/{student_id}/photo")
+async def get_photo(student_id: str, thumbnail: bool = False,
+                    conn: AsyncConnection = Depends(get_async_read_db)):
+    """Redirect to the immutable URL of a student's current photo or thumbnail"""
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(PHOTO_SQL, (student_id,))
+        row = await cursor.fetchone()
+    finally:
+        await cursor.close()
+    if not row or not row[0]:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    url = photo_url(row[1], "image/jpeg") if thumbnail else photo_url(row[0], row[2])
+    # The redirect itself must be revalidated; the target never changes
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-cache"})
+
+@router.get("/photos/{name}")
+async def get_photo_blob(name: str, request: Request):
+    """Serve a stored photo with ETag, long-lived caching and byte-range support"""
+    match = BLOB_NAME.match(name)
+    if not match or match.group(2) not in CONTENT_TYPES:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    digest, extension = match.groups()
+    path = blob_path(digest)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == headers["ETag"]):
+        match = RANGE.match(range_header.strip())
+        # Multiple ranges are not supported; such requests get the whole file
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start >= size or start > end:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(path, start, end), status_code=status_code,
+                             media_type=CONTENT_TYPES[extension], headers=headers)
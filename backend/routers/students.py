@@ -1,55 +1,185 @@
-from fastapi import APIRouter, HTTPException
-from models import StudentCreate, StudentUpdate
-from database import get_db_connection, close_db_connection
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from models import StudentCreate, StudentUpdate, CohortDelete, StudentOut, ColumnarPage, BatchGet
+from database import get_async_db, get_async_read_db, async_connection, AsyncConnection
+from listing import list_rows
+from loaders import Loaders, get_loaders, register_loader, batch_get
+from ingest import iter_csv_records, iter_ndjson_records, validation_message, spool, file_chunks
 from routers.auth import hash_password
+from grading import summarize
+from photo_store import photo_url
+from cohort import count_cohort, delete_cohort, delete_students
+from registration import promote_offerings
+from changes import log_changes, UPSERT
+from search import student_search
+from cache import reference_cache
+from jobs import job_runner, job_handler, job_file, accepted
+from config import settings
 from mysql.connector import Error
+from pydantic import ValidationError
+from typing import Optional, List, Union
+from datetime import date
+import asyncio
+import os
+import time
+import uuid
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
-@router.get("")
-async def get_students():
-    """Get all students"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT * FROM STUDENT")
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        close_db_connection(conn)
+STUDENT_COLUMNS = ("Student_ID", "First_Name", "Last_Name", "DOB", "Email", "Phone",
+                   "Dept_ID", "College_ID_Number")
+
+register_loader("students", "SELECT * FROM STUDENT WHERE Student_ID IN ({keys})", "Student_ID")
+
+STUDENT_SQL = "SELECT * FROM STUDENT WHERE Student_ID = %s"
+STUDENT_COLLEGE_ID_SQL = "SELECT College_ID_Number FROM STUDENT WHERE Student_ID = %s"
+STATUS_FILTER = "College_ID_Number IN (SELECT College_ID_Number FROM COLLEGE_ID WHERE Status = %s)"
+STUDENT_UPDATE_SQL = "UPDATE STUDENT SET {assignments} WHERE Student_ID = %s"
+DEPARTMENT_IDS_SQL = "SELECT Dept_ID FROM DEPARTMENT"
+# Students a bulk import would collide with; {marks} is one placeholder per row
+BULK_TAKEN_SQL = """
+    SELECT Student_ID, Email FROM STUDENT
+    WHERE Student_ID IN ({marks}) OR Email IN ({marks})
+"""
+DASHBOARD_PROFILE_SQL = """
+    SELECT s.*, c.Issue_Date, c.Expiry_Date, c.Status,
+           a.Address_ID, a.Street, a.City, a.State, a.ZIP,
+           p.Content_Hash, p.Thumbnail_Hash, p.Content_Type
+    FROM STUDENT s
+    LEFT JOIN COLLEGE_ID c ON c.College_ID_Number = s.College_ID_Number
+    LEFT JOIN ADDRESS a ON a.College_ID_Number = s.College_ID_Number
+    LEFT JOIN PHOTO p ON p.Student_ID = s.Student_ID
+    WHERE s.Student_ID = %s
+    ORDER BY a.Address_ID DESC
+    LIMIT 1
+"""
+# Enrollments and grades share one round trip; Kind tells them apart
+DASHBOARD_COURSES_SQL = """
+    SELECT 'enrollment' AS Kind, e.Course_ID, e.Semester_No, e.Enrollment_Date, e.Academic_Year,
+           NULL AS Marks, NULL AS Grade_Letter, c.Course_Name, c.Credits
+    FROM ENROLLMENT e
+    JOIN COURSE c ON e.Course_ID = c.Course_ID
+    WHERE e.Student_ID = %s
+    UNION ALL
+    SELECT 'grade', g.Course_ID, g.Semester_No, NULL, NULL,
+           g.Marks, g.Grade_Letter, c.Course_Name, c.Credits
+    FROM GRADE g
+    JOIN COURSE c ON g.Course_ID = c.Course_ID
+    WHERE g.Student_ID = %s
+"""
+
+@router.get("", response_model=Union[List[StudentOut], ColumnarPage])
+async def get_students(after: Optional[str] = None,
+                       limit: Optional[int] = Query(None, ge=1),
+                       fields: Optional[str] = None,
+                       dept_id: Optional[str] = None,
+                       status: Optional[str] = None,
+                       format: str = Query("json", pattern="^(json|ndjson|columnar)$"),
+                       conn: AsyncConnection = Depends(get_async_read_db)):
+    """Get students a page at a time, optionally filtered by department or college ID status"""
+    where = []
+    if dept_id:
+        where.append(("Dept_ID = %s", dept_id))
+    if status:
+        where.append((STATUS_FILTER, status))
+    return await list_rows(conn, "STUDENT", "Student_ID", STUDENT_COLUMNS,
+                           fields, where, after, limit, format)
+
+@router.get("/search")
+async def search_students(q: str = Query(..., min_length=1),
+                          limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_LIMIT),
+                          offset: int = Query(0, ge=0, le=1000)):
+    """Type-ahead search over names, email, student ID and college ID, best matches first.
+
+    ``truncated`` means the query was too broad to rank every match; keep typing.
+    """
+    total, truncated, results = await student_search.search(q, limit, offset)
+    return {"query": q, "total": total, "truncated": truncated, "offset": offset, "limit": limit,
+            "results": results}
+
+def _search_doc(student, college_id):
+    """Search index entry for a StudentCreate"""
+    return {"Student_ID": student.student_id, "First_Name": student.first_name, "Last_Name": student.last_name,
+            "Email": student.email, "College_ID_Number": college_id, "Dept_ID": student.dept_id}
+
+@router.post("/batch-get")
+async def batch_get_students(body: BatchGet, loaders: Loaders = Depends(get_loaders)):
+    """Students for a list of IDs with one query, plus the IDs that don't exist"""
+    return await batch_get(loaders, "students", body.keys)
 
 @router.get("/{student_id}")
-async def get_student(student_id: str):
+async def get_student(student_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
     """Get a specific student by ID"""
-    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT * FROM STUDENT WHERE Student_ID = %s", (student_id,))
-        student = cursor.fetchone()
+        await cursor.execute(STUDENT_SQL, (student_id,))
+        student = await cursor.fetchone()
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         return student
+    finally:
+        await cursor.close()
+
+def _load_dashboard(conn, student_id):
+    """Fetch everything the student dashboard shows with two queries"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(DASHBOARD_PROFILE_SQL, (student_id,))
+        profile = cursor.fetchone()
+        if not profile:
+            return None, []
+        cursor.execute(DASHBOARD_COURSES_SQL, (student_id, student_id))
+        return profile, cursor.fetchall()
     finally:
         cursor.close()
-        close_db_connection(conn)
+
+@router.get("/{student_id}/dashboard")
+async def get_student_dashboard(student_id: str, conn: AsyncConnection = Depends(get_async_read_db)):
+    """Profile, address, college ID, enrollments, grades and SGPA/CGPA in one response"""
+    profile, course_rows = await conn.run(_load_dashboard, student_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    address = {key: profile.pop(key) for key in ("Address_ID", "Street", "City", "State", "ZIP")}
+    college_id = {key: profile.pop(key) for key in ("Issue_Date", "Expiry_Date", "Status")}
+    college_id["College_ID_Number"] = profile["College_ID_Number"]
+    profile["address"] = address if address["Address_ID"] is not None else None
+    profile["college_id"] = college_id if profile["College_ID_Number"] else None
+    profile["photo_url"] = photo_url(profile.pop("Content_Hash"), profile.pop("Content_Type"))
+    profile["thumbnail_url"] = photo_url(profile.pop("Thumbnail_Hash"), "image/jpeg")
+
+    enrollments, grades = [], []
+    for row in course_rows:
+        common = {"Student_ID": student_id, "Course_ID": row["Course_ID"], "Semester_No": row["Semester_No"]}
+        if row["Kind"] == "enrollment":
+            enrollments.append({**common, "Enrollment_Date": row["Enrollment_Date"],
+                                "Academic_Year": row["Academic_Year"],
+                                "Course_Name": row["Course_Name"], "Credits": row["Credits"]})
+        else:
+            grades.append({**common, "Marks": row["Marks"], "Grade_Letter": row["Grade_Letter"],
+                           "Course_Name": row["Course_Name"], "Credits": row["Credits"]})
+    return {
+        "student": profile,
+        "enrollments": enrollments,
+        "grades": grades,
+        "gpa": summarize(grades),
+    }
 
 @router.post("")
-async def create_student(student: StudentCreate):
+async def create_student(student: StudentCreate, conn: AsyncConnection = Depends(get_async_db)):
     """Create a new student with college ID and login credentials"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         # Generate college ID
         college_id = f"CID{student.student_id}"
         
         # Insert into COLLEGE_ID table
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO COLLEGE_ID (College_ID_Number, Issue_Date, Expiry_Date, Status)
             VALUES (%s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 4 YEAR), 'Active')
         """, (college_id,))
         
         # Insert into STUDENT table
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO STUDENT (Student_ID, First_Name, Last_Name, DOB, Email, Phone, Dept_ID, College_ID_Number)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """, (student.student_id, student.first_name, student.last_name, 
@@ -57,24 +187,207 @@ async def create_student(student: StudentCreate):
         
         # Insert into USER_LOGIN table
         hashed_pw = hash_password(student.password)
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO USER_LOGIN (User_ID, User_Type, Password)
             VALUES (%s, 'student', %s)
         """, (student.student_id, hashed_pw))
+        await cursor.execute(*log_changes("college_ids", UPSERT, [college_id]))
+        await cursor.execute(*log_changes("students", UPSERT, [student.student_id]))
         
-        conn.commit()
+        await conn.commit()
+        student_search.upsert(_search_doc(student, college_id))
+        await reference_cache.invalidate("college_id_counts")
         return {"message": "Student created successfully", "college_id": college_id}
     except Error as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await cursor.close()
+
+def _college_id_dates(today):
+    """Issue and expiry dates matching create_student's CURDATE() + 4 years"""
+    try:
+        return today, today.replace(year=today.year + 4)
+    except ValueError:  # 29 February
+        return today, today.replace(year=today.year + 4, day=28)
+
+def _insert_student_batch(conn, batch, departments):
+    """Insert a batch of validated students; returns (inserted students, errors).
+
+    Rows that would collide with existing students or reference an unknown
+    department are rejected up front. The rest go in with one multi-row
+    INSERT per table; if that still fails, the batch is replayed row by row
+    under savepoints so only the offending rows are reported.
+    """
+    errors = []
+    cursor = conn.cursor()
+    try:
+        ids = [student.student_id for _, student in batch]
+        emails = [student.email for _, student in batch]
+        marks = ", ".join(["%s"] * len(batch))
+        cursor.execute(BULK_TAKEN_SQL.format(marks=marks), ids + emails)
+        taken_ids, taken_emails = set(), set()
+        for student_id, email in cursor.fetchall():
+            taken_ids.add(student_id)
+            taken_emails.add(email)
+
+        rows = []
+        for row_no, student in batch:
+            if student.student_id in taken_ids:
+                errors.append({"row": row_no, "student_id": student.student_id, "error": "Student ID already exists"})
+            elif student.email in taken_emails:
+                errors.append({"row": row_no, "student_id": student.student_id, "error": "Email already exists"})
+            elif student.dept_id not in departments:
+                errors.append({"row": row_no, "student_id": student.student_id, "error": f"Unknown department '{student.dept_id}'"})
+            else:
+                taken_ids.add(student.student_id)
+                taken_emails.add(student.email)
+                rows.append((row_no, student))
+        if not rows:
+            return [], errors
+
+        issue_date, expiry_date = _college_id_dates(date.today())
+        statements = [
+            ("""INSERT INTO COLLEGE_ID (College_ID_Number, Issue_Date, Expiry_Date, Status)
+                VALUES (%s, %s, %s, 'Active')""",
+             lambda s: (f"CID{s.student_id}", issue_date, expiry_date)),
+            ("""INSERT INTO STUDENT (Student_ID, First_Name, Last_Name, DOB, Email, Phone, Dept_ID, College_ID_Number)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+             lambda s: (s.student_id, s.first_name, s.last_name, s.dob, s.email, s.phone,
+                        s.dept_id, f"CID{s.student_id}")),
+            ("""INSERT INTO USER_LOGIN (User_ID, User_Type, Password)
+                VALUES (%s, 'student', %s)""",
+             lambda s: (s.student_id, hash_password(s.password))),
+        ]
+
+        def log(students):
+            if students:
+                cursor.execute(*log_changes("college_ids", UPSERT, [f"CID{s.student_id}" for s in students]))
+                cursor.execute(*log_changes("students", UPSERT, [s.student_id for s in students]))
+
+        try:
+            for sql, params in statements:
+                cursor.executemany(sql, [params(student) for _, student in rows])
+            log([student for _, student in rows])
+            conn.commit()
+            return [student for _, student in rows], errors
+        except Error:
+            conn.rollback()
+
+        inserted = []
+        for row_no, student in rows:
+            cursor.execute("SAVEPOINT bulk_row")
+            try:
+                for sql, params in statements:
+                    cursor.execute(sql, params(student))
+                cursor.execute("RELEASE SAVEPOINT bulk_row")
+                inserted.append(student)
+            except Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                errors.append({"row": row_no, "student_id": student.student_id, "error": str(e)})
+        log(inserted)
+        conn.commit()
+        return inserted, errors
     finally:
         cursor.close()
-        close_db_connection(conn)
+
+def _indexed(students):
+    """Add freshly inserted students to the search index; returns how many there were"""
+    for student in students:
+        student_search.upsert(_search_doc(student, f"CID{student.student_id}"))
+    return len(students)
+
+async def _import_students(conn, chunks, format, progress=None):
+    """Parse a CSV or NDJSON byte stream and insert it in BULK_BATCH_SIZE transactions"""
+    records = iter_ndjson_records if format == "ndjson" else iter_csv_records
+
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(DEPARTMENT_IDS_SQL)
+        departments = {row[0] for row in await cursor.fetchall()}
+    finally:
+        await cursor.close()
+
+    started = time.perf_counter()
+    received = inserted = 0
+    errors = []
+    batch = []
+    seen = set()
+    async for row_no, record in records(chunks):
+        received += 1
+        if not isinstance(record, dict):
+            errors.append({"row": row_no, "student_id": None, "error": f"Malformed row: {record}"})
+            continue
+        try:
+            student = StudentCreate(**record)
+        except ValidationError as e:
+            errors.append({"row": row_no, "student_id": record.get("student_id"), "error": validation_message(e)})
+            continue
+        if student.student_id in seen:
+            errors.append({"row": row_no, "student_id": student.student_id, "error": "Duplicate student ID in upload"})
+            continue
+        seen.add(student.student_id)
+        batch.append((row_no, student))
+        if len(batch) >= settings.BULK_BATCH_SIZE:
+            students, batch_errors = await conn.run(_insert_student_batch, batch, departments)
+            inserted += _indexed(students)
+            errors.extend(batch_errors)
+            batch = []
+            if progress:
+                progress(received)
+    if batch:
+        students, batch_errors = await conn.run(_insert_student_batch, batch, departments)
+        inserted += _indexed(students)
+        errors.extend(batch_errors)
+    if inserted:
+        await reference_cache.invalidate("college_id_counts")
+
+    elapsed = time.perf_counter() - started
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(received / elapsed, 1) if elapsed else None,
+    }
+
+@job_handler("students.import")
+async def run_import(job, path, format):
+    try:
+        async with async_connection() as conn:
+            result = await _import_students(conn, file_chunks(path), format, job.progress)
+        job.progress(result["received"], result["received"])
+        return result
+    finally:
+        os.remove(path)
+
+@router.post("/bulk")
+async def create_students_bulk(request: Request,
+                               format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+                               background: bool = False,
+                               conn: AsyncConnection = Depends(get_async_db)):
+    """Onboard many students from a CSV or NDJSON request body.
+
+    The body is parsed as it streams in and inserted in batched transactions
+    of BULK_BATCH_SIZE rows. Invalid rows are reported individually instead
+    of failing the upload. The format comes from ``format=`` or the
+    Content-Type (text/csv or application/x-ndjson). With ``background=true``
+    the upload is saved and imported by a job; the response is its ID.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "ndjson" in content_type or "json" in content_type else "csv"
+    if background:
+        path = job_file(f"upload-{uuid.uuid4().hex}.{format}")
+        await spool(request.stream(), path)
+        return accepted(await job_runner.submit("students.import", {"path": path, "format": format}))
+    return await _import_students(conn, request.stream(), format)
 
 @router.put("/{student_id}")
-async def update_student(student_id: str, student: StudentUpdate):
+async def update_student(student_id: str, student: StudentUpdate, conn: AsyncConnection = Depends(get_async_db)):
     """Update student information"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         updates = []
@@ -97,41 +410,87 @@ async def update_student(student_id: str, student: StudentUpdate):
             raise HTTPException(status_code=400, detail="No fields to update")
         
         values.append(student_id)
-        query = f"UPDATE STUDENT SET {', '.join(updates)} WHERE Student_ID = %s"
-        cursor.execute(query, values)
-        conn.commit()
+        await cursor.execute(STUDENT_UPDATE_SQL.format(assignments=", ".join(updates)), values)
+        if cursor.rowcount:
+            await cursor.execute(*log_changes("students", UPSERT, [student_id]))
+        await conn.commit()
+        if cursor.rowcount:
+            student_search.upsert({"Student_ID": student_id, "First_Name": student.first_name,
+                                   "Last_Name": student.last_name, "Email": student.email})
         
         return {"message": "Student updated successfully"}
     except Error as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
+        await cursor.close()
+
+def _unindexer():
+    """Callback for delete_cohort() that drops each committed chunk from the search
+    index; it runs on an executor thread, so the removal is handed to the event loop"""
+    loop = asyncio.get_running_loop()
+    return lambda student_ids: loop.call_soon_threadsafe(lambda: student_search.remove(*student_ids))
+
+@job_handler("students.cohort_delete")
+async def run_cohort_delete(job, archive, selection):
+    async with async_connection() as conn:
+        job.progress(0, await conn.run(count_cohort, **selection))
+        try:
+            return await conn.run(delete_cohort, archive=archive, progress=job.progress,
+                                  deleted=_unindexer(), **selection)
+        finally:
+            await reference_cache.invalidate("college_id_counts")
+
+@router.post("/cohort/delete")
+async def delete_student_cohort(cohort: CohortDelete,
+                                background: bool = False,
+                                conn: AsyncConnection = Depends(get_async_db)):
+    """Delete every student matching an ID list, department and/or admission year.
+
+    Students are removed in set-based chunks of COHORT_CHUNK_SIZE, one
+    transaction each; with ``archive`` their grades and enrollments are
+    copied to GRADE_ARCHIVE and ENROLLMENT_ARCHIVE first. With
+    ``background=true`` a job does the deleting; the response is its ID.
+    """
+    if cohort.student_ids is None and not cohort.dept_id and not cohort.admission_year:
+        raise HTTPException(status_code=400, detail="Select students by student_ids, dept_id or admission_year")
+    if cohort.student_ids == []:
+        return {"matched": 0, "deleted": 0}
+    selection = {"student_ids": cohort.student_ids, "dept_id": cohort.dept_id,
+                 "admission_year": cohort.admission_year}
+    if cohort.dry_run:
+        return {"matched": await conn.run(count_cohort, **selection), "deleted": 0}
+    if background:
+        return accepted(await job_runner.submit("students.cohort_delete",
+                                                {"archive": cohort.archive, "selection": selection}))
+    started = time.perf_counter()
+    try:
+        totals = await conn.run(delete_cohort, archive=cohort.archive, deleted=_unindexer(), **selection)
+    except Error as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Earlier chunks are committed even if a later one fails
+        await reference_cache.invalidate("college_id_counts")
+    return {**totals, "elapsed_seconds": round(time.perf_counter() - started, 3)}
 
 @router.delete("/{student_id}")
-async def delete_student(student_id: str):
+async def delete_student(student_id: str, conn: AsyncConnection = Depends(get_async_db)):
     """Delete student and all related records"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         # Get college ID
-        cursor.execute("SELECT College_ID_Number FROM STUDENT WHERE Student_ID = %s", (student_id,))
-        result = cursor.fetchone()
+        await cursor.execute(STUDENT_COLLEGE_ID_SQL, (student_id,))
+        result = await cursor.fetchone()
+        offerings = []
         if result:
-            college_id = result[0]
-            # Delete from all related tables (cascading deletes)
-            cursor.execute("DELETE FROM USER_LOGIN WHERE User_ID = %s", (student_id,))
-            cursor.execute("DELETE FROM GRADE WHERE Student_ID = %s", (student_id,))
-            cursor.execute("DELETE FROM ENROLLMENT WHERE Student_ID = %s", (student_id,))
-            cursor.execute("DELETE FROM PHOTO WHERE Student_ID = %s", (student_id,))
-            cursor.execute("DELETE FROM ADDRESS WHERE College_ID_Number = %s", (college_id,))
-            cursor.execute("DELETE FROM STUDENT WHERE Student_ID = %s", (student_id,))
-            cursor.execute("DELETE FROM COLLEGE_ID WHERE College_ID_Number = %s", (college_id,))
-        conn.commit()
+            _, offerings = await conn.run(delete_students, [(student_id, result[0])])
+        await conn.commit()
+        # Their seats go to whoever is waiting for them
+        await conn.run(promote_offerings, offerings)
+        student_search.remove(student_id)
+        await reference_cache.invalidate("college_id_counts")
         return {"message": "Student deleted successfully"}
     except Error as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        cursor.close()
-        close_db_connection(conn)
\ No newline at end of file
+        await cursor.close()
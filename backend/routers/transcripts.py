@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException
+from models import TranscriptRequest
+from database import async_connection
+from transcripts import count_students, fetch_chunk, render_chunk, pdf_available, ZipSink, DirectorySink
+from jobs import job_runner, job_handler, job_file, accepted
+from config import settings
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import collections
+import multiprocessing
+import os
+
+router = APIRouter(prefix="/transcripts", tags=["Transcripts"])
+
+def _write_all(sink, documents):
+    for name, content in documents:
+        sink.write(name, content)
+
+@job_handler("transcripts")
+async def run_transcripts(job, dept_id, semester_no, format, output):
+    """Render the selected students' transcripts on a process pool into a zip or directory"""
+    async with async_connection(read=True) as conn:
+        job.progress(0, await conn.run(count_students, dept_id, semester_no))
+    workers = settings.TRANSCRIPT_WORKERS or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    if output == "zip":
+        sink = ZipSink(job_file(f"{job.job_id}.zip"), format)
+    else:
+        sink = DirectorySink(job_file(job.job_id))
+    # Spawned rather than forked: this process has threads and open database sockets
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    rendering = collections.deque()
+    done, after = 0, ""
+    try:
+        while True:
+            async with async_connection(read=True) as conn:
+                chunk = await conn.run(fetch_chunk, after, dept_id, semester_no)
+            if chunk:
+                after = chunk[-1][0]["Student_ID"]
+                rendering.append(loop.run_in_executor(pool, render_chunk, chunk, format))
+            # Two chunks per worker keeps every core busy without holding the whole run in memory
+            while rendering and (len(rendering) >= 2 * workers or not chunk):
+                documents = await rendering.popleft()
+                await loop.run_in_executor(None, _write_all, sink, documents)
+                done += len(documents)
+                job.progress(done)
+            if not chunk:
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        sink.close()
+    if output == "zip":
+        filters = "_".join(str(value) for value in (dept_id, semester_no) if value is not None)
+        return {"students": done, "file": sink.path, "filename": f"transcripts{'_' + filters if filters else ''}.zip",
+                "media_type": "application/zip", "download_url": f"/jobs/{job.job_id}/download"}
+    return {"students": done, "directory": os.path.abspath(sink.path)}
+
+@router.post("")
+async def generate_transcripts(request: TranscriptRequest):
+    """Queue transcripts for a department, a semester or (with neither) every student.
+
+    Documents are HTML or PDF, one per student, in a zip archive (download it
+    from the job once it has finished) or a directory under JOB_FILES_DIR.
+    Progress is reported on ``GET /jobs/{id}``.
+    """
+    if request.format not in ("html", "pdf") or request.output not in ("zip", "directory"):
+        raise HTTPException(status_code=400, detail="format must be 'html' or 'pdf', output 'zip' or 'directory'")
+    if request.format == "pdf" and not pdf_available():
+        raise HTTPException(status_code=501, detail="PDF transcripts need the 'reportlab' package")
+    return accepted(await job_runner.submit("transcripts", request.model_dump()))
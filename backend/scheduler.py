@@ -0,0 +1,78 @@
+"""Periodic maintenance tasks run inside the API processes.
+
+Modules register coroutines with ``@scheduled(name, interval)``; the
+scheduler, started by main.py, runs each one every ``interval`` seconds.
+Every worker process runs a scheduler, so a run first takes a MySQL advisory
+lock named after the task (``GET_LOCK(..., 0)``, which does not wait): the
+first worker to get it does the work, the others skip that round. The lock
+belongs to the connection handed to the task, and it is released, with the
+connection, when the task returns.
+"""
+import asyncio
+import random
+from database import async_connection
+
+TASKS = {}
+
+def scheduled(name, interval):
+    """Register a coroutine ``task(conn)`` to run every ``interval`` seconds"""
+    def register(task):
+        TASKS[name] = (task, interval)
+        return task
+    return register
+
+def _try_lock(conn, name):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (f"college_db:{name}",))
+        return cursor.fetchone()[0] == 1
+    finally:
+        cursor.close()
+
+def _release_lock(conn, name):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (f"college_db:{name}",))
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+class Scheduler:
+    def __init__(self):
+        self._tasks = []
+
+    async def run_once(self, name):
+        """Run a task now unless another process is already running it; True if it ran"""
+        task, _ = TASKS[name]
+        async with async_connection() as conn:
+            if not await conn.run(_try_lock, name):
+                return False
+            try:
+                await task(conn)
+            finally:
+                await conn.run(_release_lock, name)
+        return True
+
+    async def _loop(self, name, interval):
+        # Workers start together; spread their first runs out
+        await asyncio.sleep(random.uniform(0, min(interval, 30)))
+        while True:
+            try:
+                await self.run_once(name)
+            except Exception as e:
+                # Keep the schedule going; the next round retries
+                print(f"! Scheduled task {name} failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self):
+        self._tasks = [asyncio.ensure_future(self._loop(name, interval))
+                       for name, (_, interval) in TASKS.items()]
+        print(f"✓ Scheduler running {len(self._tasks)} tasks")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+scheduler = Scheduler()
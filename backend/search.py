@@ -0,0 +1,260 @@
+"""In-process search index over students for type-ahead lookups.
+
+Every student is indexed under the lower-cased Student_ID, First_Name,
+Last_Name, Email and College_ID_Number, plus the alphanumeric parts of each
+(so "jane.doe@college.edu" is also found under "doe"). Terms match a token
+exactly, as a prefix, or, when that finds too little, as a prefix within a
+small edit distance ("jonh" finds "johnson"). Every term of a query must
+match; students are ranked by how well their best tokens match.
+
+The index is loaded on first use and kept current by the students router's
+writes. Writes made by other worker processes are picked up by a full reload
+every SEARCH_INDEX_TTL seconds, served from the old index meanwhile.
+"""
+import asyncio
+import bisect
+import heapq
+import re
+import threading
+import time
+from config import settings
+from database import async_connection
+
+FIELDS = ("Student_ID", "First_Name", "Last_Name", "Email", "College_ID_Number", "Dept_ID")
+INDEXED = ("Student_ID", "First_Name", "Last_Name", "Email", "College_ID_Number")
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+# Bigrams shared by more tokens than this carry too little signal for fuzzy candidates
+MAX_GRAM_POSTINGS = 5000
+MAX_FUZZY_CANDIDATES = 200
+# A prefix matching more tokens than this (e.g. "s" against every Student_ID) only
+# considers the first ones alphabetically and reports the result as truncated
+MAX_PREFIX_TOKENS = 1000
+_PARTS = re.compile(r"[0-9a-z]+")
+
+def _tokens(doc):
+    tokens = set()
+    for field in INDEXED:
+        value = (doc.get(field) or "").lower()
+        if value:
+            tokens.add(value)
+            # The mail domain is shared by everyone, so only the local part is split up
+            tokens.update(_PARTS.findall(value.partition("@")[0] if field == "Email" else value))
+    return tokens
+
+def _fuzzy(token):
+    """Only name-like tokens take part in typo-tolerant matching; IDs must be typed exactly"""
+    return token.isalpha()
+
+def _grams(token):
+    """Character bigrams, with a start marker so that the first letter weighs in"""
+    padded = "^" + token
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+def _max_edits(term):
+    return 0 if len(term) < 4 else 1 if len(term) < 7 else 2
+
+def _prefix_distance(term, token, max_edits):
+    """Smallest edit distance (counting a swap of neighbours as one edit) between
+    ``term`` and any prefix of ``token``, or None if it exceeds ``max_edits``"""
+    token = token[:len(term) + max_edits]
+    before, previous = None, list(range(len(token) + 1))
+    for i, char in enumerate(term, 1):
+        current = [i]
+        for j, other in enumerate(token, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other))
+            if i > 1 and j > 1 and char == token[j - 2] and term[i - 2] == other:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > max_edits:
+            return None
+        before, previous = previous, current
+    best = min(previous[max(len(term) - max_edits, 0):])
+    return best if best <= max_edits else None
+
+class StudentIndex:
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._sort_keys = {}
+        self._doc_tokens = {}
+        self._postings = {}
+        self._grams = {}
+        for row in rows:
+            self._add(row)
+        self._sorted = sorted(self._postings)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, doc, keep_sorted=False):
+        student_id = doc["Student_ID"]
+        tokens = _tokens(doc)
+        self._docs[student_id] = {field: doc.get(field) for field in FIELDS}
+        self._sort_keys[student_id] = ((doc.get("Last_Name") or "").lower(),
+                                       (doc.get("First_Name") or "").lower(), student_id)
+        self._doc_tokens[student_id] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                if _fuzzy(token):
+                    for gram in _grams(token):
+                        self._grams.setdefault(gram, set()).add(token)
+                if keep_sorted:
+                    bisect.insort(self._sorted, token)
+            postings.add(student_id)
+
+    def _remove(self, student_id):
+        self._docs.pop(student_id, None)
+        self._sort_keys.pop(student_id, None)
+        for token in self._doc_tokens.pop(student_id, ()):
+            postings = self._postings[token]
+            postings.discard(student_id)
+            if not postings:
+                del self._postings[token]
+                if _fuzzy(token):
+                    for gram in _grams(token):
+                        self._grams[gram].discard(token)
+                index = bisect.bisect_left(self._sorted, token)
+                del self._sorted[index]
+
+    def upsert(self, doc):
+        """Add a student or apply changed fields to an indexed one"""
+        with self._lock:
+            current = self._docs.get(doc["Student_ID"], {})
+            merged = {**current, **{key: value for key, value in doc.items() if value is not None}}
+            self._remove(doc["Student_ID"])
+            self._add(merged, keep_sorted=True)
+
+    def remove(self, student_id):
+        with self._lock:
+            self._remove(student_id)
+
+    def _match_term(self, term):
+        """Tokens matching one query term with their scores, and whether the
+        prefix matched too many tokens to consider them all"""
+        matches = {}
+        start = bisect.bisect_left(self._sorted, term)
+        end = bisect.bisect_left(self._sorted, term + "\U0010ffff", start)
+        for token in self._sorted[start:min(end, start + MAX_PREFIX_TOKENS)]:
+            # Shorter completions rank higher: "ann" before "annabelle"
+            matches[token] = EXACT if token == term else PREFIX + len(term) / len(token)
+        max_edits = _max_edits(term)
+        if len(matches) < MAX_FUZZY_CANDIDATES and max_edits and _fuzzy(term):
+            shared = {}
+            for gram in _grams(term):
+                tokens = self._grams.get(gram, ())
+                if len(tokens) <= MAX_GRAM_POSTINGS:
+                    for token in tokens:
+                        shared[token] = shared.get(token, 0) + 1
+            for token in heapq.nlargest(MAX_FUZZY_CANDIDATES, shared, key=shared.get):
+                if token not in matches:
+                    distance = _prefix_distance(term, token, max_edits)
+                    if distance is not None:
+                        matches[token] = FUZZY - distance / (max_edits + 1)
+        return matches, end - start > MAX_PREFIX_TOKENS
+
+    def search(self, query, limit, offset=0):
+        """Ranked ``(total, truncated, results)`` for a query; results carry a ``score``"""
+        terms = [term for term in query.lower().split() if term]
+        if not terms:
+            return 0, False, []
+        truncated = False
+        with self._lock:
+            scores = None
+            for term in terms:
+                term_scores = {}
+                matches, term_truncated = self._match_term(term)
+                truncated = truncated or term_truncated
+                # Ascending score order, so a student ends up with their best token's score
+                for token, score in sorted(matches.items(), key=lambda item: item[1]):
+                    term_scores.update(dict.fromkeys(self._postings[token], score))
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {student_id: scores[student_id] + score
+                              for student_id, score in term_scores.items() if student_id in scores}
+                if not scores:
+                    return 0, truncated, []
+            # Rank by score, then name; only the score bands that reach the page get sorted
+            bands = {}
+            for student_id, score in scores.items():
+                bands.setdefault(score, []).append(student_id)
+            top = []
+            for score in sorted(bands, reverse=True):
+                top.extend(sorted(bands[score], key=self._sort_keys.__getitem__))
+                if len(top) >= offset + limit:
+                    break
+            results = [{**self._docs[student_id], "score": round(scores[student_id], 3)}
+                       for student_id in top[offset:offset + limit]]
+        return len(scores), truncated, results
+
+def _load_rows(conn):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT {', '.join(FIELDS)} FROM STUDENT")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+class SearchService:
+    """Owns the live index: loads it lazily and reloads it in the background when stale"""
+
+    def __init__(self):
+        self._index = None
+        self._loaded_at = 0.0
+        self._loading = None
+        self._replay = []
+        self._generation = 0
+
+    async def _reload(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Writes that land while the snapshot is read are replayed onto the new index
+            generation, self._replay = self._generation, []
+            async with async_connection() as conn:
+                rows = await conn.run(_load_rows)
+            index = await loop.run_in_executor(None, StudentIndex, rows)
+            # Invalidated while loading: the snapshot may predate the writes, so read it again
+            if generation == self._generation:
+                break
+        for apply, arg in self._replay:
+            getattr(index, apply)(arg)
+        self._index, self._replay = index, []
+        self._loaded_at = time.monotonic()
+        print(f"✓ Student search index loaded ({len(self._index)} students)")
+
+    def _start_reload(self):
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(self._reload())
+        return self._loading
+
+    async def index(self):
+        if self._index is None:
+            await asyncio.shield(self._start_reload())
+        elif time.monotonic() - self._loaded_at > settings.SEARCH_INDEX_TTL:
+            self._start_reload()
+        return self._index
+
+    async def search(self, query, limit, offset=0):
+        return (await self.index()).search(query, limit, offset)
+
+    def _apply(self, apply, arg):
+        if self._loading is not None and not self._loading.done():
+            self._replay.append((apply, arg))
+        if self._index is not None:
+            getattr(self._index, apply)(arg)
+
+    def upsert(self, doc):
+        self._apply("upsert", doc)
+
+    def remove(self, *student_ids):
+        for student_id in student_ids:
+            self._apply("remove", student_id)
+
+    def invalidate(self):
+        """Force a full reload on the next search (after writes too large to apply one by one)"""
+        self._generation += 1
+        self._loaded_at = 0.0
+
+student_search = SearchService()
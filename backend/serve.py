@@ -0,0 +1,77 @@
+"""Production entry point: several worker processes serving one port.
+
+    python serve.py                      one worker per CPU core (WEB_WORKERS)
+    python serve.py --workers 4 --port 8000
+
+With gunicorn installed, workers are uvicorn workers under a gunicorn master:
+``kill -HUP <master>`` replaces them one by one without dropping requests,
+and ``TERM`` gives each GRACEFUL_TIMEOUT seconds to drain. Without gunicorn
+(e.g. on Windows) uvicorn's own process manager runs the workers, which
+supports a graceful stop but not HUP reloads.
+
+The default admin is seeded once here, before any worker starts, instead of
+by every worker. Each worker warms its connection pool before it accepts
+traffic; point load balancer health checks at /readyz.
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+from config import settings
+from bootstrap import seed_admin
+from database import get_pool
+
+def worker_count(requested):
+    return requested or settings.WEB_WORKERS or multiprocessing.cpu_count()
+
+def serve_gunicorn(host, port, workers):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("graceful_timeout", settings.GRACEFUL_TIMEOUT)
+            # Imported by each worker after the fork, so no sockets are shared
+            self.cfg.set("preload_app", False)
+
+        def load(self):
+            from main import app
+            return app
+
+    Application().run()
+
+def serve_uvicorn(host, port, workers):
+    import uvicorn
+    uvicorn.run("main:app", host=host, port=port, workers=workers,
+                timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=0, help="default: WEB_WORKERS, else one per CPU core")
+    parser.add_argument("--no-seed", action="store_true", help="don't create the default admin")
+    args = parser.parse_args()
+
+    if settings.SEED_ADMIN and not args.no_seed:
+        try:
+            seed_admin()
+        except Exception as e:
+            print(f"Error initializing database: {e}")
+        # Forked workers must not inherit the seeding connection's socket
+        get_pool().dispose()
+    # Workers inherit the environment (uvicorn) or this module's settings (gunicorn fork)
+    os.environ["SEED_ADMIN"] = "false"
+    settings.SEED_ADMIN = False
+
+    workers = worker_count(args.workers)
+    print(f"→ Serving on {args.host}:{args.port} with {workers} workers")
+    if importlib.util.find_spec("gunicorn"):
+        serve_gunicorn(args.host, args.port, workers)
+    else:
+        serve_uvicorn(args.host, args.port, workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Change feed cursor handling in read_changes(), against an in-memory CHANGE_LOG."""
+import pytest
+from changes import read_changes, HEAD_SQL, SINCE_SQL, UPSERT, DELETE, RESET
+
+ENTITIES = {"students": ("STUDENT", "Student_ID", ["Student_ID", "First_Name"])}
+
+class _Cursor:
+    """Answers the statements read_changes() runs from ``log`` and ``students``.
+
+    ``log`` holds ``(seq, entity, key, op, settled)`` rows in Seq order.
+    """
+
+    def __init__(self, log, students=()):
+        self.log, self.students = log, {row["Student_ID"]: row for row in students}
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        self.column_names = ()
+        if sql.startswith("SELECT MIN(Seq)"):
+            self.rows = [(self.log[0][0] if self.log else None,)]
+        elif sql == HEAD_SQL:
+            self.rows = [(entry[0],) for entry in reversed(self.log) if entry[4]][:1]
+        elif sql == SINCE_SQL:
+            _, since, limit = params
+            self.rows = [entry for entry in self.log if entry[0] > since][:limit]
+        else:
+            self.column_names = tuple(ENTITIES["students"][2])
+            self.rows = [tuple(self.students[key].values()) for key in params if key in self.students]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+def _log(*entries):
+    return [(seq, "students", key, op, settled) for seq, key, op, settled in entries]
+
+def test_no_cursor_or_pruned_cursor_resets():
+    conn = _Cursor(_log((5, "S1", UPSERT, True), (6, "S2", UPSERT, False)))
+    for since in (None, 2):
+        feed = read_changes(conn, ENTITIES, since)
+        assert feed["reset"] and feed["cursor"] == 5
+
+def test_reset_entry_resets():
+    conn = _Cursor(_log((1, "S1", UPSERT, True)) + [(2, "*", None, RESET, True)])
+    assert read_changes(conn, ENTITIES, 0)["reset"]
+
+def test_latest_operation_per_row_wins():
+    conn = _Cursor(_log((1, "S1", UPSERT, True), (2, "S2", UPSERT, True), (3, "S1", DELETE, True),
+                        (4, "S3", UPSERT, True)),
+                   [{"Student_ID": "S2", "First_Name": "Bob"}])
+    feed = read_changes(conn, ENTITIES, 0)
+    assert feed["cursor"] == 4 and not feed["has_more"]
+    # S3 was deleted again after its entry was written
+    assert feed["changes"] == {"students": {"upserted": [{"Student_ID": "S2", "First_Name": "Bob"}],
+                                            "deleted": ["S1", "S3"]}}
+
+def test_cursor_stops_at_the_first_unsettled_entry():
+    conn = _Cursor(_log((1, "S1", UPSERT, True), (2, "S2", UPSERT, False), (3, "S3", UPSERT, True)))
+    feed = read_changes(conn, ENTITIES, 0)
+    assert feed["cursor"] == 1
+    assert feed["latest_seq"] == 3
+
+@pytest.mark.parametrize("settled, cursor, has_more", [(True, 2, True), (False, 0, False)])
+def test_has_more_only_when_the_cursor_advanced(settled, cursor, has_more):
+    conn = _Cursor(_log(*[(seq, f"S{seq}", UPSERT, settled) for seq in range(1, 6)]))
+    feed = read_changes(conn, ENTITIES, 0, limit=2)
+    assert (feed["cursor"], feed["has_more"]) == (cursor, has_more)
+
+def test_other_entities_are_skipped():
+    conn = _Cursor([(1, "courses", "CS101", UPSERT, True)])
+    feed = read_changes(conn, ENTITIES, 0)
+    assert feed["changes"] == {} and feed["cursor"] == 1
+    assert len(conn.statements) == 2
@@ -0,0 +1,31 @@
+"""Grade letters and GPA summaries under the default GRADING_SCALE and GRADE_POINTS."""
+import pytest
+from grading import letter_for, summarize
+
+@pytest.mark.parametrize("marks, letter", [
+    (100, "A+"), (90, "A+"), (89.5, "A"), (80, "A"), (75, "B+"), (60, "B"), (50, "C+"), (40, "C"),
+    (39.9, "F"), (0, "F"),
+])
+def test_letter_for(marks, letter):
+    assert letter_for(marks) == letter
+
+def test_summarize_weights_by_credits():
+    summary = summarize([
+        {"Semester_No": 1, "Grade_Letter": "A", "Credits": 4},
+        {"Semester_No": 1, "Grade_Letter": "B", "Credits": 2},
+        {"Semester_No": 2, "Grade_Letter": "F", "Credits": 3},
+        {"Semester_No": 2, "Grade_Letter": "C", "Credits": 3},
+    ])
+    assert summary["semesters"] == [
+        {"semester_no": 1, "credits_attempted": 6, "credits_earned": 6, "grade_points": 22.0, "sgpa": 3.67},
+        {"semester_no": 2, "credits_attempted": 6, "credits_earned": 3, "grade_points": 6.0, "sgpa": 1.0},
+    ]
+    assert (summary["credits_attempted"], summary["credits_earned"]) == (12, 9)
+    assert summary["grade_points"] == 28.0
+    assert summary["cgpa"] == 2.33
+
+def test_summarize_without_credits():
+    summary = summarize([{"Semester_No": 1, "Grade_Letter": "A", "Credits": None}])
+    assert summary["semesters"][0]["sgpa"] is None
+    assert summary["cgpa"] is None
+    assert summarize([])["semesters"] == []
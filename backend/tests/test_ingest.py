@@ -0,0 +1,40 @@
+"""Streaming CSV and NDJSON parsing for bulk imports."""
+import asyncio
+from ingest import iter_csv_records, iter_ndjson_records
+
+async def _chunks(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def _records(parse, data, size=7):
+    async def collect():
+        return [record async for record in parse(_chunks(data, size))]
+    return asyncio.run(collect())
+
+def test_csv_header_is_lower_cased_and_blanks_are_none():
+    data = b"Student_ID,First_Name,Phone\r\nS0001,Ann,\r\n\r\nS0002,Bob,555\r\n"
+    assert _records(iter_csv_records, data) == [
+        (1, {"student_id": "S0001", "first_name": "Ann", "phone": None}),
+        (2, {"student_id": "S0002", "first_name": "Bob", "phone": "555"}),
+    ]
+
+def test_csv_quoted_fields_span_lines_and_chunks():
+    data = ('student_id,address\n'
+            'S0001,"12 Main St\nApt ""B""\nSpringfield"\n'
+            'S0002,"One, line"\n').encode()
+    for size in (1, 5, len(data)):
+        assert _records(iter_csv_records, data, size) == [
+            (1, {"student_id": "S0001", "address": '12 Main St\nApt "B"\nSpringfield'}),
+            (2, {"student_id": "S0002", "address": "One, line"}),
+        ]
+
+def test_csv_byte_order_mark_and_split_characters():
+    data = "\ufeffname\nJosé\n".encode()
+    # One-byte chunks split the two bytes of "é"
+    assert _records(iter_csv_records, data, 1) == [(1, {"name": "José"})]
+
+def test_ndjson_reports_bad_lines_in_place():
+    records = _records(iter_ndjson_records, b'{"a": 1}\n\nnot json\n{"a": 2}')
+    assert [record_no for record_no, _ in records] == [1, 2, 3]
+    assert records[0][1] == {"a": 1} and records[2][1] == {"a": 2}
+    assert isinstance(records[1][1], ValueError)
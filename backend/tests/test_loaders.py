@@ -0,0 +1,40 @@
+"""DataLoader batching and coalescing, with a batch function in place of the database."""
+import asyncio
+import pytest
+from loaders import DataLoader
+
+def _loader(calls, fail=False):
+    async def batch(keys):
+        calls.append(list(keys))
+        if fail:
+            raise RuntimeError("database down")
+        return {key: key.upper() for key in keys if key != "missing"}
+    return DataLoader(batch)
+
+def test_loads_in_one_tick_share_a_batch():
+    calls = []
+
+    async def scenario():
+        loader = _loader(calls)
+        first = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+        # Keys seen earlier in the request are answered without another batch
+        second = await loader.load_many(["b", "c"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == ["A", "B", "A", None]
+    assert second == ["B", "C"]
+    assert calls == [["a", "b", "missing"], ["c"]]
+
+def test_failed_batch_is_retried_on_the_next_load():
+    calls = []
+
+    async def scenario():
+        loader = _loader(calls, fail=True)
+        with pytest.raises(RuntimeError):
+            await loader.load("a")
+        loader._batch = _loader(calls)._batch
+        return await loader.load("a")
+
+    assert asyncio.run(scenario()) == "A"
+    assert calls == [["a"], ["a"]]
@@ -0,0 +1,27 @@
+"""Plan regressions for every query in query_plans.QUERIES.
+
+Needs the MySQL database from config.py, loaded with realistic data (see
+benchmarks/datagen.py); the tests are skipped when it can't be reached.
+"""
+import pytest
+from mysql.connector import Error
+from database import get_db_connection, close_db_connection, PoolTimeout
+from query_plans import QUERIES, unexpected_scans
+
+@pytest.fixture(scope="module")
+def cursor():
+    try:
+        conn = get_db_connection()
+    except (Error, PoolTimeout) as e:
+        pytest.skip(f"No MySQL database to EXPLAIN against: {e}")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        close_db_connection(conn)
+
+@pytest.mark.parametrize("sql, params, allowed", [query[1:] for query in QUERIES],
+                         ids=[query[0] for query in QUERIES])
+def test_no_unexpected_full_scan(cursor, sql, params, allowed):
+    assert unexpected_scans(cursor, sql, params, allowed) == []
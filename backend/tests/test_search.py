@@ -0,0 +1,114 @@
+"""StudentIndex matching and ranking, and SearchService reloads; no database needed."""
+import asyncio
+import search
+from search import StudentIndex, SearchService, EXACT
+
+STUDENTS = [
+    {"Student_ID": "S0001", "First_Name": "Ann", "Last_Name": "Johnson", "Email": "ann.johnson@college.edu",
+     "College_ID_Number": "CIDS0001", "Dept_ID": "CS"},
+    {"Student_ID": "S0002", "First_Name": "Annabelle", "Last_Name": "Smith", "Email": "asmith@college.edu",
+     "College_ID_Number": "CIDS0002", "Dept_ID": "EE"},
+    {"Student_ID": "S0003", "First_Name": "John", "Last_Name": "Doe", "Email": "jane.doe@college.edu",
+     "College_ID_Number": "CIDS0003", "Dept_ID": "CS"},
+]
+
+def ids(results):
+    return [row["Student_ID"] for row in results]
+
+def test_exact_match_ranks_before_prefix():
+    total, truncated, results = StudentIndex(STUDENTS).search("ann", 10)
+    assert (total, truncated) == (2, False)
+    assert ids(results) == ["S0001", "S0002"]
+    assert results[0]["score"] == EXACT
+
+def test_prefix_and_email_parts():
+    index = StudentIndex(STUDENTS)
+    # "john" is one edit from "johns", so it follows the real prefix match
+    assert ids(index.search("johns", 10)[2]) == ["S0001", "S0003"]
+    # The local part of the address is split, the shared domain is not
+    assert ids(index.search("doe", 10)[2]) == ["S0003"]
+    assert index.search("college", 10)[0] == 0
+
+def test_every_term_must_match():
+    index = StudentIndex(STUDENTS)
+    assert ids(index.search("ann smith", 10)[2]) == ["S0002"]
+    assert index.search("ann doe", 10)[0] == 0
+
+def test_typos_match_names_through_bigrams():
+    index = StudentIndex(STUDENTS)
+    assert "S0001" in ids(index.search("jhonson", 10)[2])
+    # Neighbouring letters swapped count as one edit
+    assert ids(index.search("smiht", 10)[2]) == ["S0002"]
+
+def test_ids_need_exact_prefixes():
+    assert StudentIndex(STUDENTS).search("s0010", 10)[0] == 0
+
+def test_paging():
+    index = StudentIndex(STUDENTS)
+    # Equal scores are ordered by last name: Doe, Johnson, Smith
+    total, _, results = index.search("cids", 1, offset=1)
+    assert total == 3
+    assert ids(results) == ["S0001"]
+
+def test_upsert_and_remove():
+    index = StudentIndex(STUDENTS)
+    index.upsert({"Student_ID": "S0003", "Last_Name": "Roe"})
+    assert index.search("doe", 10)[2][0]["Last_Name"] == "Roe"
+    assert ids(index.search("roe", 10)[2]) == ["S0003"]
+    # Unchanged fields are kept
+    assert ids(index.search("john roe", 10)[2]) == ["S0003"]
+    index.remove("S0003")
+    assert len(index) == 2
+    assert index.search("roe", 10)[0] == 0
+    assert index.search("cids0003", 10)[0] == 0
+
+class _Connection:
+    """Reads a snapshot of ``rows``, then lets other tasks run before returning it"""
+
+    def __init__(self, rows, loads):
+        self.rows, self.loads = rows, loads
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def run(self, load):
+        snapshot = list(self.rows)
+        self.loads.append(snapshot)
+        await asyncio.sleep(0.01)
+        return snapshot
+
+def _service(monkeypatch, rows):
+    loads = []
+    monkeypatch.setattr(search, "async_connection", lambda: _Connection(rows, loads))
+    return SearchService(), loads
+
+def test_writes_during_a_reload_are_replayed(monkeypatch):
+    async def scenario():
+        service, _ = _service(monkeypatch, STUDENTS[:2])
+        loading = service._start_reload()
+        await asyncio.sleep(0)
+        service.upsert(STUDENTS[2])
+        service.remove("S0001")
+        await loading
+        return await service.search("cids", 10)
+
+    assert ids(asyncio.run(scenario())[2]) == ["S0003", "S0002"]
+
+def test_invalidate_restarts_a_running_reload(monkeypatch):
+    async def scenario():
+        rows = list(STUDENTS)
+        service, loads = _service(monkeypatch, rows)
+        loading = service._start_reload()
+        await asyncio.sleep(0)
+        # A cohort delete commits after the snapshot was read
+        del rows[0]
+        service.invalidate()
+        await loading
+        return loads, await service.search("cids", 10)
+
+    loads, (total, _, results) = asyncio.run(scenario())
+    assert len(loads) == 2
+    assert ids(results) == ["S0003", "S0002"]
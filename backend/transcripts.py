@@ -0,0 +1,180 @@
+"""Bulk transcripts: set-based prefetch, rendering on a process pool.
+
+Students are read in keyset chunks of TRANSCRIPT_CHUNK_SIZE; each chunk's
+grades (joined with course credits) come from a single ``WHERE Student_ID IN
+(...)`` query. Whole chunks are rendered in worker processes, so the cost
+per student is constant and the run scales with the number of students and
+cores. While the workers render one chunk, the next is fetched, and finished
+documents are written to a zip archive or a directory as they arrive.
+
+This module is imported by the worker processes, so it must not touch the
+database itself: the fetch functions take a connection from the caller.
+"""
+import html
+import io
+import os
+import re
+import zipfile
+from config import settings
+from grading import summarize
+
+STUDENT_SQL = """
+    SELECT s.Student_ID, s.First_Name, s.Last_Name, s.Dept_ID, d.Dept_Name, s.College_ID_Number
+    FROM STUDENT s
+    LEFT JOIN DEPARTMENT d ON d.Dept_ID = s.Dept_ID
+"""
+
+def _selection(dept_id=None, semester_no=None):
+    where, params = [], []
+    if dept_id:
+        where.append("s.Dept_ID = %s")
+        params.append(dept_id)
+    if semester_no is not None:
+        # Students graded in that semester; their transcript runs up to it
+        where.append("EXISTS (SELECT 1 FROM GRADE g WHERE g.Student_ID = s.Student_ID AND g.Semester_No = %s)")
+        params.append(semester_no)
+    return where, params
+
+def grades_query(student_ids, semester_no=None):
+    """``(sql, params)`` for the grades of a chunk of students, up to ``semester_no`` if given"""
+    semester_clause = "AND g.Semester_No <= %s" if semester_no is not None else ""
+    return f"""
+        SELECT g.Student_ID, g.Course_ID, c.Course_Name, c.Credits, g.Semester_No, g.Marks, g.Grade_Letter
+        FROM GRADE g
+        JOIN COURSE c ON c.Course_ID = g.Course_ID
+        WHERE g.Student_ID IN ({', '.join(['%s'] * len(student_ids))}) {semester_clause}
+        ORDER BY g.Student_ID, g.Semester_No, g.Course_ID
+    """, list(student_ids) + ([semester_no] if semester_no is not None else [])
+
+def count_students(conn, dept_id=None, semester_no=None):
+    where, params = _selection(dept_id, semester_no)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM STUDENT s WHERE {' AND '.join(where) or '1 = 1'}", params)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def fetch_chunk(conn, after="", dept_id=None, semester_no=None, chunk_size=None):
+    """The next chunk of students after ``after`` with their grades: ``[(student, grades), ...]``"""
+    chunk_size = chunk_size or settings.TRANSCRIPT_CHUNK_SIZE
+    where, params = _selection(dept_id, semester_no)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""{STUDENT_SQL}
+            WHERE {' AND '.join(where + ['s.Student_ID > %s'])}
+            ORDER BY s.Student_ID LIMIT %s
+        """, params + [after, chunk_size])
+        students = cursor.fetchall()
+        if not students:
+            return []
+        grades = {student["Student_ID"]: [] for student in students}
+        cursor.execute(*grades_query(list(grades), semester_no))
+        for row in cursor.fetchall():
+            grades[row["Student_ID"]].append(row)
+        return [(student, grades[student["Student_ID"]]) for student in students]
+    finally:
+        cursor.close()
+
+def pdf_available():
+    try:
+        import reportlab  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def render_html(student, grades):
+    """One student's transcript as an HTML document (bytes)"""
+    summary = summarize(grades)
+    sgpa = {semester["semester_no"]: semester["sgpa"] for semester in summary["semesters"]}
+    name = html.escape(f"{student['First_Name']} {student['Last_Name']}")
+    rows = []
+    for semester_no in sorted(sgpa):
+        rows.append(f'<tr class="semester"><th colspan="5">Semester {semester_no} &mdash; '
+                    f'SGPA {sgpa[semester_no] if sgpa[semester_no] is not None else "-"}</th></tr>')
+        for grade in grades:
+            if grade["Semester_No"] == semester_no:
+                rows.append("<tr>" + "".join(f"<td>{html.escape(str(value if value is not None else ''))}</td>"
+                                             for value in (grade["Course_ID"], grade["Course_Name"], grade["Credits"],
+                                                           grade["Marks"], grade["Grade_Letter"])) + "</tr>")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Transcript {html.escape(student['Student_ID'])}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;width:100%}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:left}}tr.semester th{{background:#eee}}</style></head>
+<body><h1>{html.escape(settings.API_TITLE)} &mdash; Transcript</h1>
+<p><b>{name}</b><br>Student ID {html.escape(student['Student_ID'])} &middot;
+College ID {html.escape(student['College_ID_Number'] or '-')} &middot; {html.escape(student['Dept_Name'] or student['Dept_ID'] or '-')}</p>
+<table><tr><th>Course</th><th>Title</th><th>Credits</th><th>Marks</th><th>Grade</th></tr>
+{''.join(rows)}</table>
+<p>Credits attempted {summary['credits_attempted']} &middot; earned {summary['credits_earned']} &middot;
+<b>CGPA {summary['cgpa'] if summary['cgpa'] is not None else '-'}</b></p></body></html>
+""".encode()
+
+def render_pdf(student, grades):
+    """The same transcript as a PDF (needs the optional 'reportlab' package)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    summary = summarize(grades)
+    sgpa = {semester["semester_no"]: semester["sgpa"] for semester in summary["semesters"]}
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 60
+
+    def line(text, x=50, size=10, bold=False):
+        nonlocal y
+        if y < 60:
+            pdf.showPage()
+            y = height - 60
+        pdf.setFont("Helvetica-Bold" if bold else "Helvetica", size)
+        pdf.drawString(x, y, text)
+        y -= size + 6
+
+    line(f"{settings.API_TITLE} - Transcript", size=16, bold=True)
+    line(f"{student['First_Name']} {student['Last_Name']}", size=12, bold=True)
+    line(f"Student ID {student['Student_ID']}   College ID {student['College_ID_Number'] or '-'}   "
+         f"{student['Dept_Name'] or student['Dept_ID'] or '-'}")
+    for semester_no in sorted(sgpa):
+        y -= 6
+        line(f"Semester {semester_no}   SGPA {sgpa[semester_no] if sgpa[semester_no] is not None else '-'}", bold=True)
+        for grade in grades:
+            if grade["Semester_No"] == semester_no:
+                line(f"{grade['Course_ID']:<10} {str(grade['Course_Name'])[:45]:<45} "
+                     f"{grade['Credits']:>3} cr  {grade['Marks'] if grade['Marks'] is not None else '-':>6}  "
+                     f"{grade['Grade_Letter'] or ''}")
+    y -= 6
+    line(f"Credits attempted {summary['credits_attempted']}   earned {summary['credits_earned']}   "
+         f"CGPA {summary['cgpa'] if summary['cgpa'] is not None else '-'}", bold=True)
+    pdf.save()
+    return buffer.getvalue()
+
+def render_chunk(chunk, format):
+    """Render a fetched chunk in a worker process; returns ``[(file name, document bytes), ...]``"""
+    render = render_pdf if format == "pdf" else render_html
+    return [(re.sub(r"[^\w-]", "_", student["Student_ID"]) + "." + format, render(student, grades))
+            for student, grades in chunk]
+
+class ZipSink:
+    """Collects documents into a zip archive (already compressed PDFs are stored as they are)"""
+
+    def __init__(self, path, format):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED if format == "pdf" else zipfile.ZIP_DEFLATED)
+
+    def write(self, name, content):
+        self._zip.writestr(name, content)
+
+    def close(self):
+        self._zip.close()
+
+class DirectorySink:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name, content):
+        with open(os.path.join(self.path, name), "wb") as f:
+            f.write(content)
+
+    def close(self):
+        pass
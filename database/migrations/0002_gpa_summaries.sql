@@ -0,0 +1,23 @@
+-- STUDENT_SEMESTER_SUMMARY table (maintained by the grades router, see backend/gpa.py)
+CREATE TABLE IF NOT EXISTS STUDENT_SEMESTER_SUMMARY (
+    Student_ID VARCHAR(20),
+    Semester_No INT,
+    Credits_Attempted INT NOT NULL DEFAULT 0,
+    Credits_Earned INT NOT NULL DEFAULT 0,
+    Grade_Points DECIMAL(8,2) NOT NULL DEFAULT 0,
+    SGPA DECIMAL(4,2),
+    PRIMARY KEY (Student_ID, Semester_No),
+    FOREIGN KEY (Student_ID) REFERENCES STUDENT(Student_ID) ON DELETE CASCADE
+);
+
+-- STUDENT_GPA_SUMMARY table (one row per student with grades)
+CREATE TABLE IF NOT EXISTS STUDENT_GPA_SUMMARY (
+    Student_ID VARCHAR(20) PRIMARY KEY,
+    Credits_Attempted INT NOT NULL DEFAULT 0,
+    Credits_Earned INT NOT NULL DEFAULT 0,
+    Grade_Points DECIMAL(10,2) NOT NULL DEFAULT 0,
+    CGPA DECIMAL(4,2),
+    Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_gpa_summary_cgpa (CGPA),
+    FOREIGN KEY (Student_ID) REFERENCES STUDENT(Student_ID) ON DELETE CASCADE
+);
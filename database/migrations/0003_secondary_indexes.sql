@@ -0,0 +1,33 @@
+-- Explicit secondary indexes for the hot router queries.
+-- Each ALTER runs as online DDL so reads and writes continue during the build;
+-- MySQL drops the implicit foreign-key indexes these supersede.
+
+-- GET /students?dept_id=... (keyset on Student_ID within a department)
+ALTER TABLE STUDENT
+    ADD INDEX idx_student_dept (Dept_ID, Student_ID),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Dashboard / student delete: address lookup by college ID
+ALTER TABLE ADDRESS
+    ADD INDEX idx_address_college_id (College_ID_Number),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Course rosters and seat counts
+ALTER TABLE ENROLLMENT
+    ADD INDEX idx_enrollment_course (Course_ID, Semester_No, Student_ID),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- GET /grades/course/{id} and per-course analytics (covering: no row lookups)
+ALTER TABLE GRADE
+    ADD INDEX idx_grade_course (Course_ID, Semester_No, Marks, Grade_Letter),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- GET /college-ids?status=... and expiry sweeps
+ALTER TABLE COLLEGE_ID
+    ADD INDEX idx_college_id_status_expiry (Status, Expiry_Date),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Per-department course listings
+ALTER TABLE COURSE
+    ADD INDEX idx_course_dept (Dept_ID, Course_ID),
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,11 @@
+-- Photos move out of PHOTO.Photo into a content-addressed file store
+-- (backend/photo_store.py); the table keeps only digests and metadata.
+-- Existing blobs stay readable until `python photo_store.py import-legacy`
+-- has moved them.
+ALTER TABLE PHOTO
+    ADD COLUMN Content_Hash CHAR(64) NULL,
+    ADD COLUMN Thumbnail_Hash CHAR(64) NULL,
+    ADD COLUMN Content_Type VARCHAR(50) NULL,
+    ADD COLUMN Size_Bytes INT NULL,
+    ADD COLUMN Uploaded_At TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    ALGORITHM=INPLACE, LOCK=NONE;
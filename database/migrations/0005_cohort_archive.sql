@@ -0,0 +1,24 @@
+-- Archive tables for graduated cohorts (see backend/cohort.py).
+-- Rows keep their original keys but no foreign keys, since the students
+-- they belonged to are deleted from the live tables.
+
+CREATE TABLE IF NOT EXISTS GRADE_ARCHIVE (
+    Student_ID VARCHAR(20),
+    Course_ID VARCHAR(10),
+    Semester_No INT,
+    Marks DECIMAL(5,2),
+    Grade_Letter VARCHAR(2),
+    Archived_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Student_ID, Course_ID, Semester_No),
+    INDEX idx_grade_archive_course (Course_ID, Semester_No)
+);
+
+CREATE TABLE IF NOT EXISTS ENROLLMENT_ARCHIVE (
+    Student_ID VARCHAR(20),
+    Course_ID VARCHAR(10),
+    Semester_No INT NOT NULL,
+    Enrollment_Date DATE NOT NULL,
+    Academic_Year VARCHAR(10) NOT NULL,
+    Archived_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Student_ID, Course_ID, Semester_No)
+);
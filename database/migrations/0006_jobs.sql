@@ -0,0 +1,22 @@
+-- Background jobs (see backend/jobs.py). A job is queued by an API request
+-- and claimed by whichever process polls first (SELECT ... FOR UPDATE SKIP
+-- LOCKED); Heartbeat_At is refreshed while it runs so that jobs of a process
+-- that died can be recognised and failed.
+
+CREATE TABLE IF NOT EXISTS JOB (
+    Job_ID CHAR(32) PRIMARY KEY,
+    Job_Type VARCHAR(50) NOT NULL,
+    Status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded or failed
+    Params JSON NOT NULL,
+    Progress INT NOT NULL DEFAULT 0,
+    Total INT NULL,
+    Result JSON NULL,
+    Error TEXT NULL,
+    Worker VARCHAR(100) NULL,
+    Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    Started_At TIMESTAMP NULL,
+    Heartbeat_At TIMESTAMP NULL,
+    Finished_At TIMESTAMP NULL,
+    INDEX idx_job_status (Status, Created_At),
+    INDEX idx_job_type (Job_Type, Created_At)
+);
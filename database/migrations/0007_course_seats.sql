@@ -0,0 +1,38 @@
+-- Seat capacity and waitlists for course registration (see backend/registration.py).
+-- COURSE.Capacity is the default size of each offering of a course (NULL means
+-- unlimited). COURSE_SEATS holds one counter row per offering, i.e. per
+-- course, semester and academic year; a seat is taken with a single
+-- conditional UPDATE of that row, so concurrent registrations cannot oversell.
+
+ALTER TABLE COURSE
+    ADD COLUMN Capacity INT NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+CREATE TABLE IF NOT EXISTS COURSE_SEATS (
+    Course_ID VARCHAR(10),
+    Semester_No INT,
+    Academic_Year VARCHAR(10),
+    Capacity INT NULL,
+    Enrolled INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Course_ID, Semester_No, Academic_Year),
+    FOREIGN KEY (Course_ID) REFERENCES COURSE(Course_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS WAITLIST (
+    Waitlist_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+    Student_ID VARCHAR(20) NOT NULL,
+    Course_ID VARCHAR(10) NOT NULL,
+    Semester_No INT NOT NULL,
+    Academic_Year VARCHAR(10) NOT NULL,
+    Requested_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_waitlist_student (Student_ID, Course_ID, Semester_No),
+    INDEX idx_waitlist_offering (Course_ID, Semester_No, Academic_Year, Waitlist_ID),
+    FOREIGN KEY (Student_ID) REFERENCES STUDENT(Student_ID) ON DELETE CASCADE,
+    FOREIGN KEY (Course_ID) REFERENCES COURSE(Course_ID) ON DELETE CASCADE
+);
+
+-- Counters for the enrollments that already exist
+INSERT INTO COURSE_SEATS (Course_ID, Semester_No, Academic_Year, Enrolled)
+SELECT Course_ID, Semester_No, Academic_Year, COUNT(*) FROM ENROLLMENT
+GROUP BY Course_ID, Semester_No, Academic_Year
+ON DUPLICATE KEY UPDATE Enrolled = VALUES(Enrolled);
@@ -0,0 +1,14 @@
+-- Change feed for dashboards (see backend/changes.py). Every write to the
+-- student, department, course and college ID tables appends the keys it
+-- touched here, in the same transaction; clients ask GET /changes for
+-- everything after the last Seq they saw instead of refetching the tables.
+-- Op is 'upsert', 'delete' or 'reset' (bulk loads: refetch everything).
+
+CREATE TABLE IF NOT EXISTS CHANGE_LOG (
+    Seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    Entity VARCHAR(20) NOT NULL,
+    Entity_Key VARCHAR(64) NULL,
+    Op VARCHAR(10) NOT NULL,
+    Changed_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_change_log_time (Changed_At)
+);
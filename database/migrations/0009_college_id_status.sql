@@ -0,0 +1,9 @@
+-- College ID status filtering (see backend/routers/collegeid.py).
+-- idx_college_id_status_expiry (0003) drives the expiry sweep and
+-- expiring_within_days; a GET /college-ids?status=... page is a keyset range
+-- on College_ID_Number within one status, which this index serves without a
+-- sort. Online DDL, so the table stays writable during the build.
+
+ALTER TABLE COLLEGE_ID
+    ADD INDEX idx_college_id_status (Status, College_ID_Number),
+    ALGORITHM=INPLACE, LOCK=NONE;
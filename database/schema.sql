@@ -1,3 +1,7 @@
+-- Baseline schema (migration version 1).
+-- Later schema changes live in database/migrations; after running this script
+-- apply them with `python migrate.py` from the backend directory.
+
 -- Create database
 CREATE DATABASE IF NOT EXISTS college_db;
 USE college_db;
@@ -1,12 +1,20 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Users, Building2, BookOpen, CreditCard, GraduationCap } from 'lucide-react';
-import { departmentAPI, courseAPI, studentAPI, collegeIDAPI } from '../services/api';
+import { departmentAPI, courseAPI, studentAPI, collegeIDAPI, changeAPI } from '../services/api';
 import StudentTable from './StudentTable';
 import DepartmentTable from './DepartmentTable';
 import CourseTable from './CourseTable';
 import CollegeIDTable from './CollegeIDTable';
 import GradeManagement from './GradeManagement';
 
+// Replace changed rows, drop deleted ones and keep the list in key order
+const applyChanges = (rows, change, key) => {
+  if (!change) return rows;
+  const replaced = new Set([...change.deleted, ...change.upserted.map((row) => String(row[key]))]);
+  return [...rows.filter((row) => !replaced.has(String(row[key]))), ...change.upserted]
+    .sort((a, b) => String(a[key]).localeCompare(String(b[key])));
+};
+
 function AdminDashboard({ setError, setSuccess }) {
   const [activeTab, setActiveTab] = useState('students');
   const [departments, setDepartments] = useState([]);
@@ -14,6 +22,7 @@ function AdminDashboard({ setError, setSuccess }) {
   const [students, setStudents] = useState([]);
   const [collegeIDs, setCollegeIDs] = useState([]);
   const [loading, setLoading] = useState(false);
+  const changeCursor = useRef(null);
 
   useEffect(() => {
     fetchAllData();
@@ -22,6 +31,8 @@ function AdminDashboard({ setError, setSuccess }) {
   const fetchAllData = async () => {
     setLoading(true);
     try {
+      // Take the cursor first so nothing written during the fetch is missed
+      const feed = await changeAPI.since();
       const [deptRes, courseRes, studentRes, idRes] = await Promise.all([
         departmentAPI.getAll(),
         courseAPI.getAll(),
@@ -32,6 +43,7 @@ function AdminDashboard({ setError, setSuccess }) {
       setCourses(courseRes.data);
       setStudents(studentRes.data);
       setCollegeIDs(idRes.data);
+      changeCursor.current = feed.data.cursor;
     } catch (err) {
       setError('Failed to fetch data');
     } finally {
@@ -39,12 +51,34 @@ function AdminDashboard({ setError, setSuccess }) {
     }
   };
 
+  // Fetch only what changed since the last load instead of every table again
+  const syncChanges = async () => {
+    if (changeCursor.current == null) return fetchAllData();
+    try {
+      let feed, since;
+      do {
+        since = changeCursor.current;
+        feed = (await changeAPI.since(since)).data;
+        if (feed.reset) return fetchAllData();
+        const { students: s, departments: d, courses: c, college_ids: ids } = feed.changes;
+        setStudents((rows) => applyChanges(rows, s, 'Student_ID'));
+        setDepartments((rows) => applyChanges(rows, d, 'Dept_ID'));
+        setCourses((rows) => applyChanges(rows, c, 'Course_ID'));
+        setCollegeIDs((rows) => applyChanges(rows, ids, 'College_ID_Number'));
+        changeCursor.current = feed.cursor;
+        // An unmoved cursor means the rest has not settled yet; the next sync picks it up
+      } while (feed.has_more && feed.cursor !== since);
+    } catch (err) {
+      setError('Failed to refresh data');
+    }
+  };
+
   const handleDeleteStudent = async (studentId) => {
     if (window.confirm('Are you sure you want to delete this student?')) {
       try {
         await studentAPI.delete(studentId);
         setSuccess('Student deleted successfully!');
-        fetchAllData();
+        syncChanges();
       } catch (err) {
         setError('Failed to delete student');
       }
@@ -55,7 +89,7 @@ function AdminDashboard({ setError, setSuccess }) {
     try {
       await studentAPI.create(studentData);
       setSuccess('Student added successfully!');
-      fetchAllData();
+      syncChanges();
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to add student');
     }
@@ -65,7 +99,7 @@ function AdminDashboard({ setError, setSuccess }) {
     try {
       await collegeIDAPI.create(idData);
       setSuccess('College ID created successfully!');
-      fetchAllData();
+      syncChanges();
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to create college ID');
     }
@@ -76,7 +110,7 @@ function AdminDashboard({ setError, setSuccess }) {
       try {
         await collegeIDAPI.delete(idNumber);
         setSuccess('College ID deleted successfully!');
-        fetchAllData();
+        syncChanges();
       } catch (err) {
         setError('Failed to delete college ID');
       }
@@ -1,12 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { User, BookOpen, GraduationCap, MapPin, Camera } from 'lucide-react';
-import { studentAPI, enrollmentAPI, gradeAPI } from '../services/api';
+import { studentAPI, API_URL } from '../services/api';
 
 function StudentDashboard({ currentUser, setError, setSuccess }) {
     const [activeTab, setActiveTab] = useState('profile');
     const [studentData, setStudentData] = useState(null);
     const [enrollments, setEnrollments] = useState([]);
     const [grades, setGrades] = useState([]);
+    const [gpa, setGpa] = useState(null);
     const [editMode, setEditMode] = useState(false);
     const [addressMode, setAddressMode] = useState(false);
     const [photoPreview, setPhotoPreview] = useState(null);
@@ -21,50 +22,35 @@ function StudentDashboard({ currentUser, setError, setSuccess }) {
     useEffect(() => {
         if (currentUser?.userId) {
             fetchStudentData();
-            fetchEnrollments();
-            fetchGrades();
         }
     }, [currentUser]);
 
+    // Profile, enrollments and grades arrive together from the dashboard endpoint
     const fetchStudentData = async () => {
         try {
-            const response = await studentAPI.getOne(currentUser.userId);
-            setStudentData(response.data);
-            setFormData(response.data);
-            if (response.data.address) {
+            const response = await studentAPI.getDashboard(currentUser.userId);
+            const { student, enrollments, grades, gpa } = response.data;
+            setStudentData(student);
+            setFormData(student);
+            setEnrollments(enrollments);
+            setGrades(grades);
+            setGpa(gpa);
+            if (student.address) {
                 setAddressData({
-                    street: response.data.address.Street || '',
-                    city: response.data.address.City || '',
-                    state: response.data.address.State || '',
-                    zip_code: response.data.address.ZIP || ''
+                    street: student.address.Street || '',
+                    city: student.address.City || '',
+                    state: student.address.State || '',
+                    zip_code: student.address.ZIP || ''
                 });
             }
-            if (response.data.photo) {
-                setPhotoPreview(`data:image/jpeg;base64,${response.data.photo}`);
+            if (student.photo_url) {
+                setPhotoPreview(`${API_URL}${student.photo_url}`);
             }
         } catch (err) {
             setError('Failed to fetch student data');
         }
     };
 
-    const fetchEnrollments = async () => {
-        try {
-            const response = await enrollmentAPI.getByStudent(currentUser.userId);
-            setEnrollments(response.data);
-        } catch (err) {
-            setError('Failed to fetch enrollments');
-        }
-    };
-
-    const fetchGrades = async () => {
-        try {
-            const response = await gradeAPI.getByStudent(currentUser.userId);
-            setGrades(response.data);
-        } catch (err) {
-            setError('Failed to fetch grades');
-        }
-    };
-
     const handleUpdateProfile = async (e) => {
         e.preventDefault();
         try {
@@ -92,9 +78,7 @@ function StudentDashboard({ currentUser, setError, setSuccess }) {
             reader.readAsDataURL(file);
 
             try {
-                const form = new FormData();
-                form.append('file', file);
-                await studentAPI.uploadPhoto(currentUser.userId, form);
+                await studentAPI.uploadPhoto(currentUser.userId, file);
                 setSuccess('Photo uploaded successfully!');
                 fetchStudentData();
             } catch (err) {
@@ -121,16 +105,7 @@ function StudentDashboard({ currentUser, setError, setSuccess }) {
     };
 
     const calculateGPA = () => {
-        if (grades.length === 0) return '0.00';
-        const gradePoints = {
-            'A+': 4.0, 'A': 4.0, 'B+': 3.5, 'B': 3.0,
-            'C+': 2.5, 'C': 2.0, 'F': 0.0
-        };
-        const totalPoints = grades.reduce((sum, grade) => {
-            return sum + (gradePoints[grade.Grade_Letter] || 0) * (grade.Credits || 0);
-        }, 0);
-        const totalCredits = grades.reduce((sum, grade) => sum + (grade.Credits || 0), 0);
-        return totalCredits > 0 ? (totalPoints / totalCredits).toFixed(2) : '0.00';
+        return gpa?.cgpa != null ? gpa.cgpa.toFixed(2) : '0.00';
     };
 
     return (
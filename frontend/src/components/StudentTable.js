@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import { studentAPI } from '../services/api';
 
 function StudentTable({ students, departments, collegeIDs, onDelete, onAdd }) {
   const [showForm, setShowForm] = useState(false);
@@ -14,6 +15,30 @@ function StudentTable({ students, departments, collegeIDs, onDelete, onAdd }) {
     password: ''
   });
 
+  const [query, setQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+
+  // Search runs on the server; the full list is only shown without a query
+  useEffect(() => {
+    if (!query.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await studentAPI.search(query.trim());
+        if (!cancelled) setSearchResults(res.data.results);
+      } catch (err) {
+        if (!cancelled) setSearchResults([]);
+      }
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     await onAdd(formData);
@@ -163,6 +188,16 @@ function StudentTable({ students, departments, collegeIDs, onDelete, onAdd }) {
         </div>
       )}
 
+      <div className="mb-4">
+        <input
+          type="search"
+          placeholder="Search by name, email, student ID or college ID"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-indigo-500"
+        />
+      </div>
+
       <div className="bg-white shadow overflow-hidden rounded-lg">
         <div className="overflow-x-auto">
           <table className="min-w-full divide-y divide-gray-200">
@@ -178,7 +213,7 @@ function StudentTable({ students, departments, collegeIDs, onDelete, onAdd }) {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {students.map(student => (
+              {(searchResults ?? students).map(student => (
                 <tr key={student.Student_ID}>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">{student.Student_ID}</td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-600">{student.College_ID_Number}</td>
@@ -1,6 +1,6 @@
 import axios from 'axios';
 
-const API_URL = 'http://localhost:8000';
+export const API_URL = 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_URL,
@@ -9,18 +9,51 @@ const api = axios.create({
   },
 });
 
+// After a write the API may serve reads from a lagging replica; echoing the
+// X-Read-Your-Writes token sends them to the primary until it expires
+let readYourWrites;
+api.interceptors.response.use((response) => {
+  readYourWrites = response.headers['x-read-your-writes'] || readYourWrites;
+  return response;
+});
+api.interceptors.request.use((config) => {
+  if (readYourWrites && Number(readYourWrites) * 1000 > Date.now()) {
+    config.headers['X-Read-Your-Writes'] = readYourWrites;
+  }
+  return config;
+});
+
+// List endpoints are keyset-paginated; follow X-Next-Cursor until the last page
+const fetchAllPages = async (path, params = {}) => {
+  const rows = [];
+  let after;
+  do {
+    const response = await api.get(path, { params: after ? { ...params, after } : params });
+    rows.push(...response.data);
+    after = response.headers['x-next-cursor'];
+  } while (after);
+  return { data: rows };
+};
+
 export const authAPI = {
   login: (credentials) => api.post('/auth/login', credentials),
 };
 
 export const studentAPI = {
-  getAll: () => api.get('/students'),
+  getAll: () => fetchAllPages('/students'),
   getOne: (id) => api.get(`/students/${id}`),
+  getMany: (ids) => api.post('/students/batch-get', { keys: ids }),
+  search: (q, params = {}) => api.get('/students/search', { params: { q, ...params } }),
+  getDashboard: (id) => api.get(`/students/${id}/dashboard`),
   create: (data) => api.post('/students', data),
+  bulkCreate: (file) => api.post('/students/bulk', file, {
+    headers: { 'Content-Type': file.name?.endsWith('.csv') ? 'text/csv' : 'application/x-ndjson' }
+  }),
   update: (id, data) => api.put(`/students/${id}`, data),
   delete: (id) => api.delete(`/students/${id}`),
-  uploadPhoto: (id, formData) => axios.post(`${API_URL}/students/${id}/photo`, formData, {
-    headers: { 'Content-Type': 'multipart/form-data' }
+  // The raw file as the body, so the server can stream it straight into the photo store
+  uploadPhoto: (id, file) => axios.post(`${API_URL}/students/${id}/photo`, file, {
+    headers: { 'Content-Type': file.type || 'application/octet-stream' }
   }),
   getPhoto: (id) => api.get(`/students/${id}/photo`),
   createAddress: (id, data) => api.post(`/students/${id}/address`, data),
@@ -28,28 +61,33 @@ export const studentAPI = {
 };
 
 export const departmentAPI = {
-  getAll: () => api.get('/departments'),
+  getAll: () => fetchAllPages('/departments'),
   create: (data) => api.post('/departments', data),
   delete: (id) => api.delete(`/departments/${id}`),
 };
 
 export const courseAPI = {
-  getAll: () => api.get('/courses'),
+  getAll: () => fetchAllPages('/courses'),
+  getMany: (ids) => api.post('/courses/batch-get', { keys: ids }),
   create: (data) => api.post('/courses', data),
   delete: (id) => api.delete(`/courses/${id}`),
 };
 
 export const enrollmentAPI = {
   getByStudent: (id) => api.get(`/enrollments/${id}`),
+  getByStudents: (ids) => api.post('/enrollments/batch-get', { keys: ids }),
   create: (data) => api.post('/enrollments', data),
   delete: (studentId, courseId) => api.delete(`/enrollments/${studentId}/${courseId}`),
 };
 
 export const gradeAPI = {
   getByStudent: (id) => api.get(`/grades/${id}`),
-  getAll: () => api.get('/grades'),
+  getByStudents: (ids) => api.post('/grades/batch-get', { keys: ids }),
+  getAll: () => fetchAllPages('/grades'),
+  getAnalytics: (params) => api.get('/grades/analytics', { params }),
   getByCourse: (courseId) => api.get(`/grades/course/${courseId}`),
   create: (data) => api.post('/grades', data),
+  bulkUpsert: (data) => api.post('/grades/bulk', data),
   update: (studentId, courseId, semesterNo, data) => 
     api.put(`/grades/${studentId}/${courseId}/${semesterNo}`, data),
   delete: (studentId, courseId, semesterNo) => 
@@ -57,10 +95,16 @@ export const gradeAPI = {
 };
 
 export const collegeIDAPI = {
-  getAll: () => api.get('/college-ids'),
+  getAll: () => fetchAllPages('/college-ids'),
   getOne: (id) => api.get(`/college-ids/${id}`),
+  getMany: (ids) => api.post('/college-ids/batch-get', { keys: ids }),
   create: (data) => api.post('/college-ids', data),
   delete: (id) => api.delete(`/college-ids/${id}`),
 };
 
+// Rows changed since a cursor from an earlier call (no cursor: just get one)
+export const changeAPI = {
+  since: (cursor) => api.get('/changes', { params: cursor == null ? {} : { since: cursor } }),
+};
+
 export default api;
\ No newline at end of file